@@ -1,10 +1,20 @@
 # app/api/v1/analysis_router.py
-from fastapi import APIRouter, BackgroundTasks, HTTPException, status, Depends
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, Request, Response, status, Depends
+from datetime import datetime
+from typing import Literal, Optional
 from pydantic import ValidationError
-from gotrue.types import User
+from starlette.concurrency import run_in_threadpool
+from app.schemas.auth_schema import AuthenticatedUser
+import logging
 import uuid
 
+from app.core.admission import AdmissionTicket, llm_pool
+from app.core.logger import log_context
+from app.core.metrics import job_enqueued, job_running
+from app.core.profiler import profiling, requested_profile_id
+from app.core.responses import FastJSONResponse
 from app.schemas.analysis_schema import (
+    ANALYSIS_RESULT_SCHEMA_VERSION,
     AnalysisRequest,
     AnalysisTaskStartResponse,
     AnalysisTaskStatusResponse,
@@ -12,78 +22,116 @@ from app.schemas.analysis_schema import (
     AnalysisJobListResponse,
     AnalysisJobListItem,
 )
-from app.services.ai_service import run_full_analysis
-from app.core.supabase_client import get_supabase_client
+from app.services import analysis_export, analysis_result_cache, revision_service
+from app.repositories import analysis_repository, cv_repository
 from app.core.security import get_current_user  # Güvenlik (Token doğrulama)
+from app.core.limiter import rate_limit, ANALYSIS_EXPORT_LIMIT, ANALYSIS_START_LIMIT
 
 router = APIRouter(
     prefix="/analysis",
     tags=["Analysis (Kilitli)"],  # Swagger başlığı
 )
-
-supabase = get_supabase_client()
+logger = logging.getLogger(__name__)
 
 
 # --- ARKA PLAN GÖREVİ ---
-def run_analysis_background_task(
+async def run_analysis_background_task(
     task_id: uuid.UUID,
     cv_id: uuid.UUID,
     job_description_text: str,
     user_id: uuid.UUID,
+    enqueued_at: float,
+    profile_id: Optional[str] = None,
+    llm_ticket: Optional[AdmissionTicket] = None,
 ) -> None:
     """
     Arka planda (asenkron) çalışan ana AI analiz görevi.
     1. DB'den CV metnini çeker (sahiplik kontrolü ile).
-    2. AI servisini (Gemini) çalıştırır.
+    2. CV bir revizyonsa ve üst sürümün aynı ilan için analizi varsa sadece değişen
+       bölümler analiz edilir (bkz. revision_service); aksi halde tam analiz.
+       LLM çağrısı, LLM havuzunda sırası gelince yapılır.
     3. Sonucu 'analysis_jobs' tablosuna 'completed' veya 'failed' olarak günceller.
+    'profile_id' verilmişse görev süresince profil alınır (bkz. app/core/profiler.py).
+    'llm_ticket', istek anında kabul kontrolünden alınan yerdir (bkz. app/core/admission.py).
     """
+    if llm_ticket is None:
+        llm_ticket = llm_pool.reserve(str(user_id), enforce_deadline=False)
+    try:
+        with log_context(job_id=str(task_id)), job_running("analysis", enqueued_at):
+            async with profiling(profile_id):
+                await _run_analysis(task_id, cv_id, job_description_text, user_id, llm_ticket)
+    finally:
+        llm_ticket.cancel()  # LLM'e hiç gelinmediyse (örn. CV bulunamadı) yer bırakılır
+
+
+async def _run_analysis(
+    task_id: uuid.UUID,
+    cv_id: uuid.UUID,
+    job_description_text: str,
+    user_id: uuid.UUID,
+    llm_ticket: AdmissionTicket,
+) -> None:
     try:
-        print(f"Arka plan görevi {task_id} (Kullanıcı: {user_id}) başladı...")
+        logger.info("Analiz görevi başladı.", extra={"user_id": str(user_id)})
 
         # 1) CV metnini güvenli şekilde getir (sadece kullanıcıya aitse)
-        cv_response = (
-            supabase.table("user_cvs")
-            .select("cv_text_content")
-            .eq("id", str(cv_id))
-            .eq("user_id", str(user_id))
-            .execute()
-        )
+        cv_row = await cv_repository.get_cv(str(cv_id), str(user_id), "cv_text_content, parent_cv_id, cv_sections")
 
-        if not cv_response.data:
+        if not cv_row:
             raise Exception(
                 f"CV ID ({cv_id}) bulunamadı veya kullanıcıya ({user_id}) ait değil."
             )
 
-        cv_text = cv_response.data[0].get("cv_text_content")
+        cv_text = cv_row.get("cv_text_content")
         if not cv_text:
             raise Exception(
                 f"CV ID'si {cv_id} için 'cv_text_content' (ayrıştırılmış metin) boş."
             )
 
-        # 2) AI analizini çalıştır (yavaş kısım)
-        analysis_result: FullAnalysisResponse = run_full_analysis(
-            cv_text, job_description_text
+        # 2) AI analizini çalıştır (yavaş kısım; senkron Gemini çağrısı -> threadpool)
+        plan = await revision_service.plan_analysis(
+            str(user_id), cv_text, cv_row.get("parent_cv_id"), job_description_text, cv_row.get("cv_sections")
         )
+        if plan.base_task_id:
+            logger.info("Revizyon analizi: '%s' (temel görev: %s).", plan.mode, plan.base_task_id)
+        if plan.needs_llm:
+            async with llm_ticket:
+                analysis_result: FullAnalysisResponse = await run_in_threadpool(
+                    revision_service.execute, plan, cv_text, job_description_text
+                )
+        else:
+            analysis_result = revision_service.execute(plan, cv_text, job_description_text)
 
         # 3) Başarılı sonuç ile iş kaydını güncelle
-        supabase.table("analysis_jobs").update(
+        await analysis_repository.update_job(
+            str(task_id),
+            str(user_id),
             {
                 "status": "completed",
-                "result": analysis_result.model_dump(),  # Pydantic -> dict
-            }
-        ).eq("id", str(task_id)).eq("user_id", str(user_id)).execute()
+                # Yazılırken doğrulanmış sonuç sürümüyle etiketlenir (okurken tekrar doğrulanmaz)
+                "result": {
+                    **analysis_result.model_dump(mode="json"),
+                    "schema_version": ANALYSIS_RESULT_SCHEMA_VERSION,
+                },
+            },
+        )
 
-        print(f"Arka plan görevi {task_id} tamamlandı.")
+        logger.info("Analiz görevi tamamlandı.", extra={"mode": plan.mode})
 
     except Exception as e:
-        print(f"HATA: Arka plan görevi {task_id} başarısız oldu: {e}")
+        logger.exception("Analiz görevi başarısız oldu.")
         # Hata durumunu iş kaydına yaz
-        supabase.table("analysis_jobs").update(
-            {
-                "status": "failed",
-                "result": {"error": str(e)},
-            }
-        ).eq("id", str(task_id)).eq("user_id", str(user_id)).execute()
+        try:
+            await analysis_repository.update_job(
+                str(task_id),
+                str(user_id),
+                {
+                    "status": "failed",
+                    "result": {"error": str(e)},
+                },
+            )
+        except Exception as update_exc:
+            logger.error("Görev 'failed' olarak işaretlenemedi: %s", update_exc)
 
 
 # --- API ENDPOINT'LERİ ---
@@ -92,16 +140,22 @@ def run_analysis_background_task(
     "/start",
     response_model=AnalysisTaskStartResponse,
     status_code=status.HTTP_202_ACCEPTED,
+    dependencies=[Depends(rate_limit(ANALYSIS_START_LIMIT))],
 )
 async def start_analysis(
     analysis_request: AnalysisRequest,  # Body (cv_id, job_description_text)
     background_tasks: BackgroundTasks,  # Arka plan görevi
-    user: User = Depends(get_current_user),  # Kimlik doğrulama
+    request: Request,
+    response: Response,
+    user: AuthenticatedUser = Depends(get_current_user),  # Kimlik doğrulama
 ):
     """
     Kimliği doğrulanmış kullanıcı için yeni bir analiz görevi başlatır.
     Kullanıcı başına dakikada 8 istek ile sınırlandırılmıştır.
+    LLM havuzu doluysa (tahmini bekleme sınırı aşılıyorsa) iş kaydı oluşturulmadan
+    503 + Retry-After döner.
     """
+    llm_ticket = llm_pool.reserve(str(user.id))
     try:
         # 1) 'analysis_jobs' tablosuna 'pending' kayıt ekle
         new_job_data = {
@@ -111,14 +165,7 @@ async def start_analysis(
             "user_id": str(user.id),  # Token'dan gelen user.id
         }
 
-        response = supabase.table("analysis_jobs").insert(new_job_data).execute()
-
-        if not response.data:
-            raise Exception(
-                "Veritabanına 'job' kaydı başarısız oldu, veri dönmedi."
-            )
-
-        new_task = response.data[0]
+        new_task = await analysis_repository.insert_job(new_job_data)
         task_id = new_task.get("id")
 
         # 2) Yanıtı Pydantic ile doğrula
@@ -127,27 +174,32 @@ async def start_analysis(
                 task_id=task_id, status="pending"
             )
         except ValidationError as e:
-            print(
-                f"HATA: Pydantic validasyonu başarısız (task_id UUID değil mi?): {e}"
-            )
+            logger.error("Pydantic validasyonu başarısız (task_id UUID değil mi?): %s", e)
             raise HTTPException(
                 status_code=500, detail="Oluşturulan görev ID'si geçersiz."
             )
 
-        # 3) Ağır işi arka plana at
+        # 3) Ağır işi arka plana at (istenmişse arka plan görevi profillenir)
+        profile_id = requested_profile_id(request)
+        if profile_id is not None:
+            response.headers["X-Profile-Id"] = profile_id
         background_tasks.add_task(
             run_analysis_background_task,
             task_id,
             analysis_request.cv_id,
             analysis_request.job_description_text,
             user.id,
+            job_enqueued("analysis"),
+            profile_id,
+            llm_ticket,
         )
 
         # 4) Hemen yanıt dön
         return response_model
 
-    except Exception as e:
-        print(f"HATA: Analiz başlatılamadı: {e}")
+    except Exception:
+        llm_ticket.cancel()
+        logger.exception("Analiz başlatılamadı.")
         # Not: FK hatası gibi durumlar 404'e maplenir
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -159,25 +211,19 @@ async def start_analysis(
 
 
 @router.get("", response_model=AnalysisJobListResponse)
-async def list_user_analysis_jobs(user: User = Depends(get_current_user)):
+async def list_user_analysis_jobs(user: AuthenticatedUser = Depends(get_current_user)):
     """
     Giriş yapmış kullanıcının başlattığı tüm analiz işlerini listeler.
     İlişkili CV'nin adını da JOIN ile getirir.
     """
     try:
-        response = (
-            supabase.table("analysis_jobs")
-            .select("id, job_description_text, status, created_at, user_cvs(file_name)")
-            .eq("user_id", str(user.id))  # RLS + ek kontrol
-            .order("created_at", desc=True)
-            .execute()
-        )
+        rows = await analysis_repository.list_jobs(str(user.id))  # RLS + ek kontrol
 
-        if not response.data:
+        if not rows:
             return AnalysisJobListResponse(jobs=[])
 
         job_list_processed = []
-        for item in response.data:
+        for item in rows:
             snippet = item.get("job_description_text", "")
             if snippet and len(snippet) > 100:
                 snippet = snippet[:100] + "..."
@@ -197,56 +243,95 @@ async def list_user_analysis_jobs(user: User = Depends(get_current_user)):
 
         return AnalysisJobListResponse(jobs=job_list_processed)
 
-    except Exception as e:
-        print(f"HATA: Analiz iş listesi alınamadı: {e}")
+    except Exception:
+        logger.exception("Analiz iş listesi alınamadı.")
         raise HTTPException(
             status_code=500, detail="Analiz iş listesi alınırken bir sunucu hatası oluştu."
         )
 
 
+@router.get("/export", dependencies=[Depends(rate_limit(ANALYSIS_EXPORT_LIMIT))])
+async def export_user_analysis_jobs(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    job_status: Optional[Literal["pending", "completed", "failed"]] = Query(None, alias="status"),
+    cv_id: Optional[uuid.UUID] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    gzip: bool = False,
+    user: AuthenticatedUser = Depends(get_current_user),
+):
+    """
+    Kullanıcının analizlerini (sonuç alanları sütunlara açılmış) NDJSON veya CSV olarak akıtır.
+    Filtreler: 'status', 'cv_id', oluşturulma tarihi aralığı [created_from, created_to).
+    'gzip=true': yanıt .gz dosyası olarak iner (bkz. app/services/analysis_export.py).
+    """
+    filters = analysis_export.build_filters(
+        str(user.id),
+        status=job_status,
+        cv_id=str(cv_id) if cv_id else None,
+        created_from=created_from,
+        created_to=created_to,
+    )
+    try:
+        return await analysis_export.export_response(filters, format, gzip)
+    except Exception:
+        logger.exception("Analiz dışa aktarma başlatılamadı.")
+        raise HTTPException(
+            status_code=500, detail="Analizler dışa aktarılırken bir sunucu hatası oluştu."
+        )
+
+
 @router.get("/status/{task_id}", response_model=AnalysisTaskStatusResponse)
 async def get_analysis_status(
-    task_id: uuid.UUID, user: User = Depends(get_current_user)
+    task_id: uuid.UUID, user: AuthenticatedUser = Depends(get_current_user)
 ):
     """
     Giriş yapmış kullanıcının BELİRLİ bir analiz işinin durumunu ve sonucunu sorgular.
     """
     try:
-        response = (
-            supabase.table("analysis_jobs")
-            .select("status, result")
-            .eq("id", str(task_id))
-            .eq("user_id", str(user.id))  # RLS + explicit check
-            .execute()
-        )
+        # Tamamlanmış sonuçlar değişmez: önbellekteyse DB'ye gidilmez
+        cached_result = await analysis_result_cache.get_result(str(user.id), str(task_id))
+        if cached_result is not None:
+            return FastJSONResponse({"task_id": str(task_id), "status": "completed", "result": cached_result})
+
+        job_data = await analysis_repository.get_job(str(task_id), str(user.id))  # RLS + explicit check
 
-        if not response.data:
+        if not job_data:
             raise HTTPException(
                 status_code=404, detail="Görev bulunamadı veya bu kullanıcıya ait değil."
             )
 
-        job_data = response.data[0]
-        job_data["task_id"] = task_id
-
-        # 'result' (JSONB) alanını doğrula
-        if job_data.get("result"):
-            if "error" in job_data["result"]:  # Arka planda hata olmuşsa
-                job_data["result"] = None
-            else:
-                job_data["result"] = FullAnalysisResponse.model_validate(
-                    job_data["result"]
-                )
+        result = job_data.get("result")
+        if not result or "error" in result:  # Henüz bitmemiş veya arka planda hata olmuş
+            return AnalysisTaskStatusResponse(task_id=task_id, status=job_data["status"])
+
+        # Hızlı yol: yazılırken doğrulanmış (güncel sürümle etiketli) sonuç, tekrar
+        # Pydantic'ten geçirilmeden doğrudan JSON'a yazılır
+        if result.pop("schema_version", None) == ANALYSIS_RESULT_SCHEMA_VERSION:
+            if job_data["status"] == "completed":
+                await analysis_result_cache.remember_result(str(user.id), str(task_id), result)
+            return FastJSONResponse(
+                {"task_id": str(task_id), "status": job_data["status"], "result": result}
+            )
 
-        return AnalysisTaskStatusResponse.model_validate(job_data)
+        # Etiketsiz (eski) kayıtlar: sonuç bir kez doğrulanır, sarmalayıcı yeniden doğrulanmaz
+        return AnalysisTaskStatusResponse(
+            task_id=task_id,
+            status=job_data["status"],
+            result=FullAnalysisResponse.model_validate(result),
+        )
 
+    except HTTPException:
+        raise
     except ValidationError as e:
-        print(f"HATA: Sonuç validasyonu başarısız: {e}")
+        # Hata metni sonuçtan alıntı içerir: sadece hata sayısı loglanır
+        logger.error("Sonuç validasyonu başarısız (%d hata).", e.error_count(), extra={"task_id": str(task_id)})
         raise HTTPException(
             status_code=500,
             detail="Analiz sonucu veritabanında, ancak beklenen formata uymuyor.",
         )
-    except Exception as e:
-        print(f"HATA: Görev durumu alınamadı: {e}")
+    except Exception:
+        logger.exception("Görev durumu alınamadı.", extra={"task_id": str(task_id)})
         raise HTTPException(
             status_code=500, detail="Görev durumu alınırken bir hata oluştu."
         )
@@ -254,22 +339,19 @@ async def get_analysis_status(
 
 @router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_user_analysis_job(
-    task_id: uuid.UUID, user: User = Depends(get_current_user)
+    task_id: uuid.UUID, user: AuthenticatedUser = Depends(get_current_user)
 ):
     """
     Giriş yapmış kullanıcının BELİRLİ bir analiz işini siler.
     (RLS politikası sayesinde sadece kendi işini silebilir)
     """
     try:
-        supabase.table("analysis_jobs").delete().eq("id", str(task_id)).eq(
-            "user_id", str(user.id)
-        ).execute()
+        await analysis_repository.delete_job(str(task_id), str(user.id))
+        await analysis_result_cache.forget_result(str(user.id), str(task_id))
 
-        print(
-            f"Bilgi: Analiz işi ({task_id}) silindi (veya zaten yoktu/başkasına aitti)."
-        )
-    except Exception as e:
-        print(f"HATA: Analiz işi silinemedi ({task_id}): {e}")
+        logger.info("Analiz işi silindi (veya zaten yoktu/başkasına aitti).", extra={"task_id": str(task_id)})
+    except Exception:
+        logger.exception("Analiz işi silinemedi.", extra={"task_id": str(task_id)})
         raise HTTPException(
             status_code=500, detail="Analiz işi silinirken bir sunucu hatası oluştu."
         )
\ No newline at end of file
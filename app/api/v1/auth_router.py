@@ -1,25 +1,34 @@
 # app/api/v1/auth_router.py
 
+import logging
+
 from fastapi import APIRouter, HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordRequestForm
+from starlette.concurrency import run_in_threadpool
 from app.core.supabase_client import get_supabase_client
 from app.schemas.auth_schema import UserCreate, Token, UserResponse
-from gotrue.errors import AuthApiError  # <--- NİHAİ DÜZELTME: APIError -> AuthApiError
+from app.core.limiter import rate_limit_by_ip, AUTH_REGISTER_LIMIT, AUTH_TOKEN_LIMIT
 
 router = APIRouter(
     prefix="/auth",
     tags=["Authentication (Kilitsiz)"]
 )
+logger = logging.getLogger(__name__)
 
-supabase = get_supabase_client()
-
-@router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/register",
+    response_model=UserResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(rate_limit_by_ip(AUTH_REGISTER_LIMIT))],
+)
 async def user_register(user_in: UserCreate):
     """
     Yeni bir kullanıcı oluşturur (Supabase Auth).
     """
+    from gotrue.errors import AuthApiError  # Ağır import: worker açılışında değil ilk istekte
     try:
-        response = supabase.auth.sign_up({
+        # Senkron Auth çağrısı: olay döngüsünü bloklamasın diye threadpool'da
+        response = await run_in_threadpool(get_supabase_client().auth.sign_up, {
             "email": user_in.email,
             "password": user_in.password,
         })
@@ -44,15 +53,20 @@ async def user_register(user_in: UserCreate):
             detail=f"Kayıt sırasında beklenmedik bir hata oluştu: {str(e)}"
         )
 
-@router.post("/token", response_model=Token)
+@router.post(
+    "/token",
+    response_model=Token,
+    dependencies=[Depends(rate_limit_by_ip(AUTH_TOKEN_LIMIT))],
+)
 async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends()
 ):
     """
     Kullanıcıya e-posta ve şifre karşılığında bir Bearer Token (JWT) verir.
     """
+    from gotrue.errors import AuthApiError
     try:
-        response = supabase.auth.sign_in_with_password({
+        response = await run_in_threadpool(get_supabase_client().auth.sign_in_with_password, {
             "email": form_data.username, # OAuth2 formu 'username' alanı gönderir
             "password": form_data.password
         })
@@ -72,7 +86,7 @@ async def login_for_access_token(
             headers={"WWW-Authenticate": "Bearer"},
         )
     except Exception as e:
-        print(f"Token hatası: {e}")
+        logger.info("Token alınamadı: %s", e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Giriş başarısız: E-posta veya şifre yanlış.",
@@ -2,21 +2,34 @@ from fastapi import (
     APIRouter, 
     UploadFile, 
     File, 
+    Form,
     HTTPException, 
     status,
-    Depends 
+    Depends,
+    BackgroundTasks
 )
-from app.services.parser_service import parse_document_to_text 
-from app.core.supabase_client import get_supabase_client
+from app.core.metrics import job_enqueued
+from app.core.profiler import profile_request
+from app.core.responses import FastJSONResponse
+from app.services.upload_service import ingest_cv
+from app.services import bulk_ingest_service
+from starlette.concurrency import run_in_threadpool
+from app.core.config import get_settings
+from app.repositories import cv_repository, storage_repository
 from pydantic import BaseModel
+import logging
 import uuid
 from app.core.security import get_current_user 
-from gotrue.types import User 
+from app.core.limiter import rate_limit, CV_UPLOAD_LIMIT, CV_BULK_UPLOAD_LIMIT, CV_DOWNLOAD_LINK_LIMIT
+from app.schemas.auth_schema import AuthenticatedUser
 from app.schemas.analysis_schema import CVListResponse, CVListItem 
-from typing import List
+from typing import List, Optional
 from app.schemas.analysis_schema import CVDetailResponse
 from app.schemas.analysis_schema import CVDownloadURLResponse
-from app.core.short_code_generator import generate_unique_short_code
+from app.schemas.analysis_schema import BulkCVUploadResponse
+from app.schemas.analysis_schema import CVRankRequest, CVRankResponse, CVRankItem, CVRankTerm
+from app.core.short_code_generator import insert_link_with_unique_short_code
+from app.services import cv_ranking_service, link_cache
 from datetime import datetime, timedelta, timezone # Zaman hesaplaması için
 from fastapi.responses import RedirectResponse
 
@@ -25,30 +38,47 @@ router = APIRouter(
     tags=["CV Management (Kilitli)"]
 )
 
-supabase = get_supabase_client()
+settings = get_settings()
+logger = logging.getLogger(__name__)
 
 class CVUploadResponse(BaseModel):
     """CV yüklendiğinde kullanıcıya dönen yanıt modeli."""
     cv_id: uuid.UUID
     file_name: str
     message: str
+    timings: Optional[dict[str, float]] = None # Sadece DEBUG modunda: aşama -> ms
 
-@router.post("/upload", response_model=CVUploadResponse, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/upload",
+    response_model=CVUploadResponse,
+    response_model_exclude_none=True,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[
+        Depends(rate_limit(CV_UPLOAD_LIMIT)),
+        # İsteğe bağlı profil (admin 'X-Profile: 1' veya PROFILE_SAMPLE_RATE)
+        Depends(profile_request, scope="function"),
+    ],
+)
 async def upload_cv(
     # FastAPI, bu endpoint'i çağırmadan önce get_current_user'ı çalıştırır.
     # Eğer token yoksa/geçersizse, bu fonksiyon 401 hatası verir ve
     # aşağıdaki kod HİÇ ÇALIŞMAZ.
     # Eğer token geçerliyse, 'user' değişkeni dolu gelir.
-    user: User = Depends(get_current_user), 
-    file: UploadFile = File(...)
+    user: AuthenticatedUser = Depends(get_current_user), 
+    file: UploadFile = File(...),
+    parent_cv_id: Optional[uuid.UUID] = Form(None), # Revizyonsa önceki sürümün ID'si
 ):
     """
-    KİMLİĞİ DOĞRULANMIŞ kullanıcı için yeni bir CV (.pdf veya .docx) yükler.
+    KİMLİĞİ DOĞRULANMIŞ kullanıcı için yeni bir CV (.pdf, .docx veya .jpg / .png fotoğraf) yükler.
+    'parent_cv_id' verilirse yeni CV o CV'nin revizyonu olarak bağlanır; aynı ilan için
+    tekrar analiz edildiğinde sadece değişen bölümler yeniden analiz edilir.
     
-    1. Dosyayı metne ayrıştırır (parse) (OCR dahil).
-    2. Orijinal dosyayı Supabase Storage'a yükler.
-    3. Dosya yolu, adı, ayrıştırılmış metin ve 'user_id'yi 'user_cvs' tablosuna kaydeder.
-    4. Kullanıcıya bu CV için kullanılacak olan 'cv_id'yi döndürür.
+    1. Dosyayı metne ayrıştırır (parse) (OCR dahil) ve AYNI ANDA orijinal
+       dosyayı Supabase Storage'a yükler.
+    2. Dosya yolu, adı, ayrıştırılmış metin ve 'user_id'yi 'user_cvs' tablosuna kaydeder.
+       Bu adım başarısız olursa Storage'daki dosya geri alınır (silinir).
+    3. Kullanıcıya bu CV için kullanılacak olan 'cv_id'yi döndürür.
+       DEBUG modunda aşama sürelerini ('timings', ms) da döndürür.
     """
     
     # Dosya içeriğini 'bytes' olarak oku
@@ -59,85 +89,98 @@ async def upload_cv(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Dosya okunurken hata oluştu: {str(e)}"
         )
-    
-    # 1. Dosyayı metne ayrıştır (Bu, OCR nedeniyle 1-15 saniye sürebilir)
-    try:
-        parsed_text = await parse_document_to_text(file_content, file.filename)
-    except HTTPException as he:
-        # parser_service'den gelen (415, 400, 500) hataları yansıt
-        raise he
-    except Exception as e:
+
+    if parent_cv_id is not None and await cv_repository.get_cv(str(parent_cv_id), str(user.id), "id") is None:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Dosya ayrıştırma sırasında beklenmedik hata: {str(e)}"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Önceki sürüm (parent_cv_id) bulunamadı veya bu kullanıcıya ait değil."
         )
-        
-    # 2. Dosya için benzersiz bir depolama yolu (path) oluştur
-    try:
-        file_extension = f".{file.filename.split('.')[-1]}"
-    except IndexError:
-        file_extension = ""
-        
-    unique_file_name = f"{uuid.uuid4()}{file_extension}"
-    
-    # Mimari Not: Dosyaları 'user.id'ye göre klasörlemek en iyi pratiktir.
-    storage_file_path = f"{user.id}/{unique_file_name}"
+
+    # Ayrıştırma (OCR nedeniyle 1-15 saniye sürebilir) + Storage + DB kaydı
+    result = await ingest_cv(
+        str(user.id), file.filename, file.content_type, file_content,
+        parent_cv_id=str(parent_cv_id) if parent_cv_id else None,
+    )
+
+    return CVUploadResponse(
+        cv_id=result.cv_id,
+        file_name=result.file_name,
+        message="CV başarıyla yüklendi, işlendi ve depolandı.",
+        timings=result.timings if settings.DEBUG else None,
+    )
     
-    # 3. Dosyanın orijinal 'bytes' içeriğini Supabase Storage'a yükle
-    try:
-        print(f"Bilgi: Orijinal dosya Supabase Storage'a yükleniyor: {storage_file_path}")
-        
-        supabase.storage.from_("user_uploads").upload(
-            path=storage_file_path,
-            file=file_content,
-            file_options={"content-type": file.content_type}
+@router.post(
+    "/upload/bulk",
+    response_model=BulkCVUploadResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(rate_limit(CV_BULK_UPLOAD_LIMIT))],
+)
+async def bulk_upload_cvs(
+    background_tasks: BackgroundTasks,
+    user: AuthenticatedUser = Depends(get_current_user),
+    files: List[UploadFile] = File(...)
+):
+    """
+    KİMLİĞİ DOĞRULANMIŞ kullanıcı için birden fazla CV'yi (çoklu .pdf/.docx veya .zip) yükler.
+
+    - Dosyalar sınırlı eşzamanlılıkla paralel ayrıştırılır ve Storage'a yüklenir,
+      ardından tüm 'user_cvs' satırları TEK bir toplu insert ile eklenir.
+    - En fazla BULK_SYNC_MAX_FILES dosya: dosya bazında sonuçlar hemen döner (201).
+    - Daha büyük arşivler: 202 + 'job_id' döner; ilerleme
+      GET /cv/upload/bulk/{job_id} ile sorgulanır.
+    """
+    # Gövde multipart ayrıştırmasında diske alınmıştır; boyut okumadan önce kontrol edilir
+    if sum(f.size or 0 for f in files) > settings.BULK_MAX_TOTAL_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Toplu yüklemenin toplam boyutu {settings.BULK_MAX_TOTAL_BYTES // (1024 * 1024)} MB'ı aşıyor."
         )
-        print("Bilgi: Orijinal dosya Storage'a yüklendi.")
+    try:
+        uploads = [(f.filename, f.content_type, await f.read()) for f in files]
     except Exception as e:
-        print(f"HATA: Supabase Storage'a yüklenemedi: {e}")
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Dosya depolama alanına (Storage) yüklenirken hata oluştu: {str(e)}"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Dosya okunurken hata oluştu: {str(e)}"
         )
-        
-    # 4. Veriyi 'user_cvs' tablosuna kaydet
-    try:
-        data_to_insert = {
-            "file_name": file.filename,          # Orijinal adı
-            "cv_text_content": parsed_text,      # OCR'dan gelen metin
-            "file_path": storage_file_path,      # Storage'daki yolu
-            "user_id": str(user.id)              # <-- FAZ 3 GÜNCELLEMESİ
-        }
-        
-        print(f"DEBUG: (Kullanıcı: {user.id}) Supabase'e gönderilen veri: {data_to_insert}")
-            
-        response = supabase.table("user_cvs").insert(data_to_insert).execute()
-        
-        if not response.data or len(response.data) == 0:
-             raise Exception("Veritabanına kayıt başarısız oldu, veri dönmedi.")
-                
-        new_cv = response.data[0]
-        new_cv_id = new_cv.get("id")
-
-        return CVUploadResponse(
-            cv_id=new_cv_id,
-            file_name=file.filename,
-            message="CV başarıyla yüklendi, işlendi ve depolandı."
+
+    # Zip açma (100 x 10 MB'a kadar) olay döngüsünü bloklamasın
+    items = await run_in_threadpool(bulk_ingest_service.expand_uploads, uploads)
+
+    if len(items) <= settings.BULK_SYNC_MAX_FILES:
+        results = await bulk_ingest_service.bulk_ingest(str(user.id), items)
+        return BulkCVUploadResponse(
+            status="completed",
+            total=len(items),
+            processed=len(items),
+            results=results,
         )
 
-    except Exception as e:
-        print(f"HATA: CV veritabanına kaydedilemedi: {e}")
-        # Mimari Not (Gelecek): Burada bir "rollback" (geri alma) mantığı
-        # olmalı ve Storage'a yüklenen 'storage_file_path' silinmelidir.
+    # Büyük arşiv: arka planda işle, ilerleme iş kaydından sorgulanır
+    job_id = await run_in_threadpool(bulk_ingest_service.job_store.create, str(user.id), len(items))
+    background_tasks.add_task(
+        bulk_ingest_service.run_bulk_ingest_job, job_id, str(user.id), items, job_enqueued("bulk_ingest")
+    )
+    response = BulkCVUploadResponse(job_id=job_id, status="processing", total=len(items), processed=0)
+    return FastJSONResponse(status_code=status.HTTP_202_ACCEPTED, content=response.model_dump(mode="json"))
+
+@router.get("/upload/bulk/{job_id}", response_model=BulkCVUploadResponse)
+async def get_bulk_upload_status(
+    job_id: uuid.UUID,
+    user: AuthenticatedUser = Depends(get_current_user)
+):
+    """Büyük bir toplu yükleme işinin ilerlemesini ve (bittiyse) dosya bazında sonuçlarını döndürür."""
+    job = await run_in_threadpool(bulk_ingest_service.job_store.get, str(job_id), str(user.id))
+    if job is None:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"CV veritabanına kaydedilirken bir hata oluştu: {str(e)}"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Toplu yükleme işi bulunamadı veya bu kullanıcıya ait değil."
         )
-    
+    return job
+
     # --- FAZ 4 YENİ ENDPOINT ---
 @router.get("", response_model=CVListResponse) # URL prefix'i zaten /cv olduğu için "" yeterli
 async def list_user_cvs(
-    user: User = Depends(get_current_user) # <-- GÜVENLİK: Sadece giriş yapmış kullanıcı
+    user: AuthenticatedUser = Depends(get_current_user) # <-- GÜVENLİK: Sadece giriş yapmış kullanıcı
 ):
     """
     Giriş yapmış kullanıcının yüklediği tüm CV'leri listeler.
@@ -146,34 +189,64 @@ async def list_user_cvs(
     try:
         # Supabase veritabanından SADECE gerekli sütunları seçiyoruz
         # RLS politikası sayesinde otomatik olarak SADECE bu kullanıcıya ait olanlar gelecek
-        response = supabase.table("user_cvs").select(
-            "id, file_name, created_at" # Metin içeriğini (cv_text_content) çekmiyoruz!
-        ).eq( 
-            "user_id", str(user.id) # RLS zaten filtreliyor ama burada belirtmek "defense in depth"
-        ).order(
-            "created_at", desc=True # En yeniden eskiye sırala (iyi UX)
-        ).execute()
-
-        if not response.data:
+        # Metin içeriğini (cv_text_content) çekmiyoruz! user_id filtresi "defense in depth"
+        rows = await cv_repository.list_cvs(str(user.id))
+
+        if not rows:
             # Kullanıcının hiç CV'si yoksa boş liste döndür, hata verme
             return CVListResponse(cvs=[])
             
         # Veritabanı yanıtını Pydantic modelimize uygun hale getir
-        cv_list = [CVListItem.model_validate(item) for item in response.data]
+        cv_list = [CVListItem.model_validate(item) for item in rows]
         
         return CVListResponse(cvs=cv_list)
 
-    except Exception as e:
-        print(f"HATA: CV listesi alınamadı: {e}")
+    except Exception:
+        logger.exception("CV listesi alınamadı.")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="CV listesi alınırken bir sunucu hatası oluştu."
         )
     
+@router.post("/rank", response_model=CVRankResponse)
+async def rank_user_cvs(
+    rank_request: CVRankRequest,
+    user: AuthenticatedUser = Depends(get_current_user)
+):
+    """
+    Kullanıcının TÜM CV'lerini verilen iş ilanına göre yerel olarak (BM25, Gemini'siz)
+    sıralar. En uygun 'top_k' CV, puanı belirleyen terimlerle birlikte döner.
+    Hiç ortak terim içermeyen CV'ler listelenmez.
+    """
+    try:
+        results, total_cvs, scoring_ms = await cv_ranking_service.rank_cvs(
+            str(user.id), rank_request.job_description_text, rank_request.top_k
+        )
+    except Exception:
+        logger.exception("CV sıralaması yapılamadı.")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="CV'ler sıralanırken bir sunucu hatası oluştu."
+        )
+
+    return CVRankResponse(
+        results=[
+            CVRankItem(
+                cv_id=ranked.cv_id,
+                file_name=ranked.file_name,
+                score=ranked.score,
+                matched_terms=[CVRankTerm(term=term, weight=weight) for term, weight in ranked.matched_terms],
+            )
+            for ranked in results
+        ],
+        total_cvs=total_cvs,
+        scoring_ms=scoring_ms,
+    )
+
 @router.get("/{cv_id}", response_model=CVDetailResponse)
 async def get_cv_details(
     cv_id: uuid.UUID, # URL'den gelen CV ID'sini alır (FastAPI otomatik doğrular)
-    user: User = Depends(get_current_user) # <-- GÜVENLİK: Sadece giriş yapmış kullanıcı
+    user: AuthenticatedUser = Depends(get_current_user) # <-- GÜVENLİK: Sadece giriş yapmış kullanıcı
 ):
     """
     Giriş yapmış kullanıcının BELİRLİ bir CV'sinin detaylarını getirir.
@@ -184,29 +257,26 @@ async def get_cv_details(
         # TEK BİR satırı seçiyoruz.
         # RLS politikası zaten filtreliyor, ancak 'eq("user_id", ...)' eklemek
         # hem daha güvenli (defense in depth) hem de kodun niyetini netleştirir.
-        response = supabase.table("user_cvs").select(
-            "id, file_name, created_at, file_path, cv_text_content" # Tüm detayları çekiyoruz
-        ).eq(
-            "id", str(cv_id)
-        ).eq(
-            "user_id", str(user.id)
-        ).maybe_single().execute() # '.single()' -> Tam 1 satır bekler, yoksa hata verir. '.maybe_single()' -> 0 veya 1 satır döner, hata vermez.
-
-        # Eğer .maybe_single() 'None' döndürdüyse (yani satır yoksa veya kullanıcıya ait değilse)
-        if response.data is None:
+        cv_data = await cv_repository.get_cv(
+            str(cv_id), str(user.id),
+            "id, file_name, created_at, file_path, cv_text_content, parent_cv_id, cv_sections" # Tüm detayları çekiyoruz
+        ) # 0 veya 1 satır döner, hata vermez.
+
+        # Eğer 'None' döndüyse (yani satır yoksa veya kullanıcıya ait değilse)
+        if cv_data is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="CV bulunamadı veya bu kullanıcıya ait değil."
             )
             
         # Veritabanı yanıtını Pydantic modelimize doğrula ve döndür
-        return CVDetailResponse.model_validate(response.data)
+        return CVDetailResponse.model_validate(cv_data)
 
     except HTTPException as he:
         # 404 hatasını doğrudan yansıt
         raise he
-    except Exception as e:
-        print(f"HATA: CV detayı alınamadı ({cv_id}): {e}")
+    except Exception:
+        logger.exception("CV detayı alınamadı.", extra={"cv_id": str(cv_id)})
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="CV detayı alınırken bir sunucu hatası oluştu."
@@ -215,7 +285,7 @@ async def get_cv_details(
 @router.delete("/{cv_id}", status_code=status.HTTP_204_NO_CONTENT) # Başarılı silmede 204 döndür
 async def delete_user_cv(
     cv_id: uuid.UUID,
-    user: User = Depends(get_current_user) # <-- GÜVENLİK: Sadece giriş yapmış kullanıcı
+    user: AuthenticatedUser = Depends(get_current_user) # <-- GÜVENLİK: Sadece giriş yapmış kullanıcı
 ):
     """
     Giriş yapmış kullanıcının BELİRLİ bir CV'sini siler.
@@ -225,95 +295,98 @@ async def delete_user_cv(
     try:
         # 1. CV'nin varlığını ve sahipliğini doğrula, AYNI ZAMANDA file_path'i al
         #    Tek bir DB sorgusu ile ikisini birden yapalım.
-        select_response = supabase.table("user_cvs").select(
-            "id, file_path" # Sadece dosya yoluna ihtiyacımız var
-        ).eq(
-            "id", str(cv_id)
-        ).eq(
-            "user_id", str(user.id)
-        ).maybe_single().execute()
+        cv_data = await cv_repository.get_cv(
+            str(cv_id), str(user.id), "id, file_path" # Sadece dosya yoluna ihtiyacımız var
+        )
 
         # Eğer CV yoksa veya kullanıcıya ait değilse
-        if select_response.data is None:
+        if cv_data is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Silinecek CV bulunamadı veya bu kullanıcıya ait değil."
             )
             
-        cv_data = select_response.data
         file_path_to_delete = cv_data.get("file_path")
 
+        # Bu CV için tekrar kullanılabilir indirme linkini unut
+        await link_cache.forget_issued_link(str(user.id), str(cv_id))
+
         # 2. Storage'daki dosyayı sil (EĞER file_path varsa)
         if file_path_to_delete:
             try:
-                print(f"Bilgi: Supabase Storage'dan dosya siliniyor: {file_path_to_delete}")
-                # Supabase V2 Storage silme syntax'ı: .remove() bir liste alır
-                supabase.storage.from_("user_uploads").remove([file_path_to_delete])
-                print("Bilgi: Storage dosyası silindi.")
+                # Storage silme API'si bir liste alır
+                await storage_repository.remove_files([file_path_to_delete])
+                logger.debug("Storage dosyası silindi.", extra={"storage_path": file_path_to_delete})
             except Exception as storage_exc:
                 # Mimari Karar: Storage silme başarısız olursa ne yapmalı?
                 # Şimdilik: Hatayı logla ama DB silmeye DEVAM ET (en azından DB temizlensin).
                 # Daha sağlam bir sistemde: Belki işlemi durdur veya tekrar dene.
-                print(f"UYARI: Storage dosyası ({file_path_to_delete}) silinemedi: {storage_exc}")
+                logger.warning("Storage dosyası silinemedi: %s", storage_exc, extra={"storage_path": file_path_to_delete})
         else:
-             print(f"UYARI: CV ({cv_id}) için 'file_path' bulunamadı, Storage silme atlandı.")
+            logger.warning("CV için 'file_path' bulunamadı, Storage silme atlandı.", extra={"cv_id": str(cv_id)})
 
 
         # 3. Veritabanındaki CV kaydını sil
         #    Doğrudan 'id' ve 'user_id' ile silmeyi deneyebiliriz.
-        print(f"Bilgi: Veritabanından CV kaydı siliniyor: {cv_id}")
-        delete_response = supabase.table("user_cvs").delete().eq(
-            "id", str(cv_id)
-        ).eq( 
-            "user_id", str(user.id) # İkinci güvenlik katmanı (RLS zaten koruyor)
-        ).execute()
+        # user_id filtresi ikinci güvenlik katmanı (RLS zaten koruyor)
+        await cv_repository.delete_cv(str(cv_id), str(user.id))
+        cv_ranking_service.on_cv_deleted(str(user.id), str(cv_id))
 
         # Silme işlemi genelde data döndürmez ama hata vermemeli
         # Belki 'count' kontrol edilebilir ama RLS varsa emin olamayız.
-        print(f"Bilgi: Veritabanı kaydı silindi (veya zaten yoktu/başkasına aitti).")
+        logger.info("CV kaydı silindi (veya zaten yoktu/başkasına aitti).", extra={"cv_id": str(cv_id)})
 
         # Başarılı silme durumunda 204 No Content otomatik dönecektir.
 
     except HTTPException as he:
         # 404 hatasını yansıt
         raise he
-    except Exception as e:
-        print(f"HATA: CV silinemedi ({cv_id}): {e}")
+    except Exception:
+        logger.exception("CV silinemedi.", extra={"cv_id": str(cv_id)})
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="CV silinirken bir sunucu hatası oluştu."
         )
     
-@router.get("/{cv_id}/download", response_model=CVDownloadURLResponse)
+@router.get(
+    "/{cv_id}/download",
+    response_model=CVDownloadURLResponse,
+    dependencies=[Depends(rate_limit(CV_DOWNLOAD_LINK_LIMIT))],
+)
 async def get_cv_download_url(
     cv_id: uuid.UUID,
-    user: User = Depends(get_current_user)
+    user: AuthenticatedUser = Depends(get_current_user)
 
 ):
     """
     Giriş yapmış kullanıcının BELİRLİ bir CV'sinin orijinal dosyasını indirmesi
     için KISA KOD ve geçerlilik süresi oluşturur.
     Sadece kullanıcının KENDİ CV'sine erişebilir.
+    Aynı CV için kısa süre önce üretilmiş ve hâlâ yeterince geçerli bir link varsa
+    Storage'a ve DB'ye gitmeden onu döndürür.
     """
-    URL_EXPIRATION_SECONDS = 60
+    URL_EXPIRATION_SECONDS = settings.DOWNLOAD_LINK_TTL_SECONDS
+
+    # 0. Yeniden kullanım: (user_id, cv_id) için geçerli link zaten var mı?
+    #    (Link bu kullanıcı için sahiplik doğrulandıktan sonra üretildi.)
+    reusable_link = await link_cache.get_reusable_link(str(user.id), str(cv_id))
+    if reusable_link is not None:
+        short_code, expires_at = reusable_link
+        return CVDownloadURLResponse(
+            short_code=short_code,
+            expires_in=int((expires_at - datetime.now(timezone.utc)).total_seconds())
+        )
 
     try:
         # 1. CV'nin varlığını, sahipliğini doğrula ve file_path'i al
-        select_response = supabase.table("user_cvs").select(
-            "id, file_path"
-        ).eq(
-            "id", str(cv_id)
-        ).eq(
-            "user_id", str(user.id)
-        ).maybe_single().execute()
-
-        if select_response.data is None:
+        cv_data = await cv_repository.get_cv(str(cv_id), str(user.id), "id, file_path")
+
+        if cv_data is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="İndirilecek CV bulunamadı veya bu kullanıcıya ait değil."
             )
 
-        cv_data = select_response.data
         file_path = cv_data.get("file_path")
 
         if not file_path:
@@ -324,58 +397,40 @@ async def get_cv_download_url(
 
         # 2. Supabase Storage'dan UZUN imzalı URL oluştur
         try:
-            print(f"Bilgi: Uzun imzalı URL oluşturuluyor: {file_path}")
-            signed_url_response = supabase.storage.from_("user_uploads").create_signed_url(
-                path=file_path,
-                expires_in=URL_EXPIRATION_SECONDS
+            original_signed_url = await storage_repository.create_signed_url(
+                file_path, URL_EXPIRATION_SECONDS
             )
-            original_signed_url = signed_url_response.get('signedURL')
-            if not original_signed_url:
-                 raise Exception("Supabase'den uzun imzalı URL alınamadı.")
-            print("Bilgi: Uzun imzalı URL oluşturuldu.")
 
         except Exception as storage_exc:
-            print(f"HATA: Uzun imzalı URL oluşturulamadı ({file_path}): {storage_exc}")
+            logger.error("İmzalı URL oluşturulamadı: %s", storage_exc, extra={"storage_path": file_path})
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Dosya indirme linki oluşturulurken bir depolama hatası oluştu."
             )
 
-        # 3. Benzersiz bir KISA KOD üret
-        try:
-            short_code = await generate_unique_short_code()
-            print(f"Bilgi: Benzersiz kısa kod üretildi: {short_code}")
-        except Exception as code_exc:
-             print(f"HATA: Benzersiz kısa kod üretilemedi: {code_exc}")
-             raise HTTPException(
-                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                 detail="Kısa indirme linki oluşturulamadı."
-             )
-
-        # 4. Son kullanma tarihini hesapla (UTC olarak)
+        # 3. Son kullanma tarihini hesapla (UTC olarak)
         expires_at = datetime.now(timezone.utc) + timedelta(seconds=URL_EXPIRATION_SECONDS)
 
-        # 5. Kısaltılmış URL bilgilerini DB'ye kaydet
+        # 4. Benzersiz bir KISA KOD üret ve kısaltılmış URL bilgilerini DB'ye TEK yazma ile kaydet
+        #    (benzersizlik 'short_code' UNIQUE kısıtı ile sağlanır, önceden sorgulanmaz)
         try:
-            insert_data = {
+            short_code = await insert_link_with_unique_short_code({
                 "user_id": str(user.id),
                 "cv_id": str(cv_id),
-                "short_code": short_code,
                 "original_signed_url": original_signed_url,
                 "expires_at": expires_at.isoformat() # ISO formatında string olarak kaydet
-            }
-            response = supabase.table("shortened_urls").insert(insert_data).execute()
-            if not response.data:
-                raise Exception("Kısaltılmış URL kaydı başarısız.")
-            print("Bilgi: Kısaltılmış URL DB'ye kaydedildi.")
+            })
+            # Bu worker'daki ilk /dl isteği DB'ye gitmesin (write-through)
+            await link_cache.remember_link(short_code, original_signed_url, expires_at)
+            await link_cache.remember_issued_link(str(user.id), str(cv_id), short_code, expires_at)
         except Exception as db_exc:
-            print(f"HATA: Kısaltılmış URL kaydedilemedi: {db_exc}")
+            logger.error("Kısaltılmış URL kaydedilemedi: %s", db_exc)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Kısa indirme linki kaydedilirken hata oluştu."
             )
 
-        # 6. Kullanıcıya SADECE KISA KODU ve geçerlilik süresini döndür
+        # 5. Kullanıcıya SADECE KISA KODU ve geçerlilik süresini döndür
         return CVDownloadURLResponse(
             short_code=short_code,      # <-- Doğru alan adı
             expires_in=URL_EXPIRATION_SECONDS
@@ -384,9 +439,9 @@ async def get_cv_download_url(
     except HTTPException as he:
         # 404 gibi bilerek fırlatılanları yansıt
         raise he
-    except Exception as e:
+    except Exception:
         # Diğer beklenmedik hatalar
-        print(f"HATA: CV indirme URL'si alınamadı ({cv_id}): {e}")
+        logger.exception("CV indirme URL'si alınamadı.", extra={"cv_id": str(cv_id)})
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="CV indirme linki alınırken bir sunucu hatası oluştu."
@@ -1,8 +1,12 @@
 # app/api/v1/download_router.py
 
+import logging
+
 from fastapi import APIRouter, HTTPException, status # Depends'i kaldırdık
 from fastapi.responses import RedirectResponse
-from app.core.supabase_client import get_supabase_client
+from app.core.short_code_generator import is_valid_short_code
+from app.repositories import link_repository
+from app.services import link_cache
 # User ve get_current_user importlarını kaldırdık
 from datetime import datetime, timezone
 from starlette.status import HTTP_302_FOUND # 302 kullanalım
@@ -10,8 +14,7 @@ from starlette.status import HTTP_302_FOUND # 302 kullanalım
 router = APIRouter(
     tags=["Download (Yönlendirme)"] # Prefix main.py'dan geliyor (/dl)
 )
-
-supabase = get_supabase_client()
+logger = logging.getLogger(__name__)
 
 @router.get("/{short_code}", status_code=HTTP_302_FOUND) # 302 kullanalım
 async def redirect_to_download( # Fonksiyon adını _secure olmadan değiştirebiliriz
@@ -22,43 +25,61 @@ async def redirect_to_download( # Fonksiyon adını _secure olmadan değiştireb
     Verilen kısa kodu kullanarak kullanıcıyı orijinal indirme linkine yönlendirir.
     Bu endpoint KİLİTSİZDİR. Güvenlik, kısa kodun tahmin edilemezliği
     ve linkin kısa süreli geçerliliğine dayanır.
+    Sık erişilen kodlar süreç içinde önbelleklenir; bilinmeyen kodlar kısa süre
+    negatif önbelleklenir (tarama denemeleri DB'ye ulaşmaz).
     """
+    # Üreticinin biçimine uymayan kodlar (uzunluk / alfabe) hiçbir önbelleğe ve DB'ye ulaşmaz
+    if not is_valid_short_code(short_code):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Geçersiz veya bulunamayan indirme linki.")
+
+    # 0. Sıcak yol: süreç içi önbellek (ağ I/O'su yok)
+    cached_link = await link_cache.get_link(short_code)
+    if cached_link is not None:
+        original_url, expires_at = cached_link
+        if datetime.now(timezone.utc) <= expires_at:
+            return RedirectResponse(url=original_url, status_code=HTTP_302_FOUND)
+
+    missing_status = await link_cache.get_missing_status(short_code)
+    if missing_status == status.HTTP_410_GONE:
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail="İndirme linkinin süresi dolmuş.")
+    if missing_status is not None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Geçersiz veya bulunamayan indirme linki.")
+
     try:
         # 1. Kısa kodu DB'de ara (user_id kontrolü olmadan)
-        response = supabase.table("shortened_urls").select(
-            "original_signed_url, expires_at" # user_id'yi çekmeye gerek yok
-        ).eq(
-            "short_code", short_code
-        ).maybe_single().execute()
+        # user_id'yi çekmeye gerek yok (sadece original_signed_url, expires_at)
+        link_data = await link_repository.get_link(short_code)
 
-        if response.data is None:
+        if link_data is None:
+            await link_cache.remember_missing(short_code, status.HTTP_404_NOT_FOUND)
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Geçersiz veya bulunamayan indirme linki.")
 
-        link_data = response.data
         original_url = link_data.get("original_signed_url")
         expires_at_str = link_data.get("expires_at")
 
         # 2. SAHİPLİK KONTROLÜ <-- KALDIRILDI
 
         # 3. Son kullanma tarihini kontrol et (Bu hala ÇOK ÖNEMLİ)
-        if expires_at_str:
-            expires_at = datetime.fromisoformat(expires_at_str)
-            if datetime.now(timezone.utc) > expires_at:
-                raise HTTPException(status_code=status.HTTP_410_GONE, detail="İndirme linkinin süresi dolmuş.")
-        else:
+        if not expires_at_str:
              raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Linkin geçerlilik süresi bilgisi bulunamadı.")
-
-        # 4. Kullanıcıyı orijinal URL'ye yönlendir
-        if original_url:
-            print(f"DEBUG: Yönlendirme yapılacak URL: {original_url}")
-            return RedirectResponse(url=original_url, status_code=HTTP_302_FOUND) # 302 kullanalım
-        else:
+        if not original_url:
              raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Orijinal indirme linki bulunamadı.")
 
+        expires_at = datetime.fromisoformat(expires_at_str)
+        if datetime.now(timezone.utc) > expires_at:
+            await link_cache.remember_missing(short_code, status.HTTP_410_GONE)
+            raise HTTPException(status_code=status.HTTP_410_GONE, detail="İndirme linkinin süresi dolmuş.")
+
+        # 4. Önbelleğe al (TTL linkin kendi süresini aşmaz) ve orijinal URL'ye yönlendir
+        await link_cache.remember_link(short_code, original_url, expires_at)
+        # İmzalı URL ve kısa kodun tamamı erişim yetkisi taşır: loglanmaz
+        logger.debug("Kısa link DB'den çözüldü ve önbelleğe alındı.", extra={"short_code": f"{short_code[:3]}…"})
+        return RedirectResponse(url=original_url, status_code=HTTP_302_FOUND) # 302 kullanalım
+
     except HTTPException as he:
         raise he
-    except Exception as e:
-        print(f"HATA: Yönlendirme başarısız ({short_code}): {e}")
+    except Exception:
+        logger.exception("Yönlendirme başarısız.", extra={"short_code": f"{short_code[:3]}…"})
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="İndirme linki işlenirken bir sunucu hatası oluştu."
@@ -0,0 +1,66 @@
+# app/api/v1/ops_router.py
+
+import uuid
+from datetime import datetime
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Query
+from app.core import admission, cache
+from app.core.loop_monitor import monitor as loop_monitor
+from app.core.responses import FastJSONResponse
+from app.core.security import require_admin
+from app.core.startup import startup_report
+from dataclasses import asdict
+from app.services import analysis_export, document_governor
+
+router = APIRouter(
+    prefix="/ops",
+    tags=["Operations (Admin)"],
+    dependencies=[Depends(require_admin)], # Tüm endpoint'ler 'X-Admin-Token' ister
+    include_in_schema=False,
+    default_response_class=FastJSONResponse,
+)
+
+@router.get("/cache-stats")
+async def get_cache_stats():
+    """Önbelleklerin (namespace başına) bu worker'daki L1 / L2 isabet / ıskalama sayıları."""
+    return cache.stats()
+
+
+@router.get("/event-loop")
+async def get_event_loop_stats():
+    """Bu worker'ın olay döngüsü: en yüksek gecikme ve son takılmalar (yığın, route, request_id)."""
+    return loop_monitor.stats()
+
+
+@router.get("/startup")
+async def get_startup_report():
+    """Bu worker'ın açılış (cold start) süreleri ve ön ısıtma adımları."""
+    return asdict(startup_report)
+
+
+@router.get("/admission")
+async def get_admission_stats():
+    """Bu worker'ın kabul kontrolü havuzları: kapasite, çalışan / bekleyen iş, tahmini bekleme."""
+    return {**admission.stats(), "document_governor": document_governor.stats()}
+
+
+@router.get("/analysis-export")
+async def export_all_analysis_jobs(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    job_status: Optional[Literal["pending", "completed", "failed"]] = Query(None, alias="status"),
+    user_id: Optional[uuid.UUID] = None,
+    cv_id: Optional[uuid.UUID] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    gzip: bool = False,
+):
+    """Tüm kullanıcıların analizleri ('user_id' sütunuyla); BI aktarımı için. Bkz. '/analysis/export'."""
+    filters = analysis_export.build_filters(
+        str(user_id) if user_id else None,
+        status=job_status,
+        cv_id=str(cv_id) if cv_id else None,
+        created_from=created_from,
+        created_to=created_to,
+    )
+    return await analysis_export.export_response(filters, format, gzip, include_user=True)
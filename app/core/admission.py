@@ -0,0 +1,239 @@
+# app/core/admission.py
+"""
+Kabul kontrolü (admission control) ve geri basınç (backpressure).
+
+Ani yük artışında sınırsız OCR / LLM işi kabul etmek herkesin gecikmesini çökertir.
+Bunun yerine pahalı işler sınırlı kapasiteli havuzlardan geçer:
+
+- 'parse_pool': CPU-yoğun ayrıştırma / OCR (varsayılan kapasite: CPU sayısı)
+- 'llm_pool'  : Gemini çağrıları
+
+Her havuzun kuyruğu sınırlıdır ve kullanıcılar arasında adil paylaşım (round-robin)
+uygulanır: bir kullanıcının 50 işi kuyruktayken yeni gelen başka bir kullanıcının işi,
+o 50 işin arkasına değil, bir sonraki boşalan yere yerleşir. Tahmini bekleme süresi
+havuzun süre sınırını aşacaksa (veya kuyruk doluysa) istek 503 + Retry-After ile reddedilir.
+
+Havuzlar worker (süreç) başınadır; kapasiteler worker başına kapasitedir.
+"""
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Optional
+
+from fastapi import HTTPException, status
+
+from app.core.config import get_settings
+from app.core.metrics import (
+    ADMISSION_IN_FLIGHT,
+    ADMISSION_QUEUE_DEPTH,
+    ADMISSION_REJECTIONS,
+    ADMISSION_WAIT,
+)
+
+settings = get_settings()
+
+
+class AdmissionTicket:
+    """
+    Havuzdaki bir yer ayırtması. 'reserve' ile kuyruğa alınır, 'async with' ile yer
+    verilene kadar beklenir ve blok bitince yer bırakılır. Hiç kullanılmayacaksa 'cancel'.
+    """
+
+    def __init__(self, pool: Optional["AdmissionPool"], user_id: str, max_wait: Optional[float]):
+        self.pool = pool
+        self.user_id = user_id
+        self.max_wait = max_wait
+        self.enqueued_at = time.monotonic()
+        self.granted = False
+        self._waiter: Optional[asyncio.Future] = None  # Sadece kuyrukta beklerken oluşturulur
+        self._started_at: Optional[float] = None
+        self._done = False
+
+    async def __aenter__(self) -> "AdmissionTicket":
+        if self.pool is not None:
+            await self.pool._wait_for_slot(self)
+            self._started_at = time.monotonic()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if self.pool is not None and not self._done:
+            self._done = True
+            self.pool._release(time.monotonic() - self._started_at)
+
+    def cancel(self) -> None:
+        """Yer hiç kullanılmadan vazgeçilir (örn. iş kaydı oluşturulamadı)."""
+        if self.pool is not None and not self._done and self._started_at is None:
+            self._done = True
+            self.pool._withdraw(self)
+
+
+class AdmissionPool:
+    def __init__(
+        self,
+        name: str,
+        capacity: int,
+        max_queue: int,
+        max_wait_seconds: float,
+        initial_service_seconds: float,
+        max_queued_per_user: int,
+    ):
+        self.name = name
+        self.capacity = max(1, capacity)
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+        self.max_queued_per_user = max_queued_per_user
+        # Bir işin havuzdaki ortalama süresi (EWMA); bekleme tahmini için
+        self.service_seconds = initial_service_seconds
+        self.in_flight = 0
+        self._waiters: "OrderedDict[str, deque[AdmissionTicket]]" = OrderedDict()
+        self._queued = 0
+
+    # --- Tahmin ve ret ---
+    def estimated_wait(self) -> float:
+        if self.in_flight < self.capacity and self._queued == 0:
+            return 0.0
+        return (self._queued + 1) / self.capacity * self.service_seconds
+
+    def _reject(self, reason: str, retry_after: float, detail: str) -> HTTPException:
+        ADMISSION_REJECTIONS.labels(self.name, reason).inc()
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail,
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+    def reserve(self, user_id: str, enforce_deadline: bool = True) -> AdmissionTicket:
+        """
+        Kabul edilen bir iş için kuyruğa yer ayırtır; iş kabul edildikten sonra sırası
+        gelene kadar süre sınırı olmadan bekler (örn. arka plan analiz görevi).
+        Kuyruk doluysa, kullanıcının kuyruktaki payı dolduysa veya tahmini bekleme süre
+        sınırını aşıyorsa 503 fırlatır. 'enforce_deadline=False' ile ret yapılmaz,
+        sadece adil sıraya girilir (örn. toplu yükleme işinin dosyaları).
+        """
+        if not settings.ADMISSION_ENABLED:
+            return AdmissionTicket(None, user_id, None)
+
+        if enforce_deadline:
+            estimate = self.estimated_wait()
+            if self._queued >= self.max_queue:
+                raise self._reject("queue_full", estimate, "Sunucu şu anda yoğun. Lütfen biraz sonra tekrar deneyin.")
+            if len(self._waiters.get(user_id, ())) >= self.max_queued_per_user:
+                raise self._reject(
+                    "user_share", estimate,
+                    "Aynı anda çok fazla işiniz sırada bekliyor. Lütfen mevcut işlerin bitmesini bekleyin.",
+                )
+            if estimate > self.max_wait_seconds:
+                raise self._reject("deadline", estimate, "Sunucu şu anda yoğun. Lütfen biraz sonra tekrar deneyin.")
+
+        ticket = AdmissionTicket(self, user_id, None)
+        if self.in_flight < self.capacity and self._queued == 0:
+            # Boş yer var: kuyruğa girmeden hemen verilir
+            self._grant(ticket)
+        else:
+            self._waiters.setdefault(user_id, deque()).append(ticket)
+            self._queued += 1
+            ADMISSION_QUEUE_DEPTH.labels(self.name).inc()
+        return ticket
+
+    def admit(self, user_id: str) -> AdmissionTicket:
+        """
+        İstemcinin yanıtı beklediği işler için: 'reserve' ile aynı kabul kontrolü, ancak
+        gerçek bekleme süre sınırını aşarsa yer bırakılır ve 503 fırlatılır.
+        """
+        ticket = self.reserve(user_id)
+        if ticket.pool is not None:
+            ticket.max_wait = self.max_wait_seconds
+        return ticket
+
+    # --- İç işleyiş ---
+    def _grant(self, ticket: AdmissionTicket) -> None:
+        self.in_flight += 1
+        ADMISSION_IN_FLIGHT.labels(self.name).inc()
+        ticket.granted = True
+        if ticket._waiter is not None and not ticket._waiter.done():
+            ticket._waiter.set_result(None)
+
+    async def _wait_for_slot(self, ticket: AdmissionTicket) -> None:
+        if not ticket.granted:
+            ticket._waiter = asyncio.get_running_loop().create_future()
+            try:
+                if ticket.max_wait is None:
+                    await asyncio.shield(ticket._waiter)
+                else:
+                    remaining = ticket.max_wait - (time.monotonic() - ticket.enqueued_at)
+                    await asyncio.wait_for(asyncio.shield(ticket._waiter), timeout=max(0.0, remaining))
+            except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+                # Kuyruktan çıkılır; yer tam bu sırada verildiyse kullanılmadan geri bırakılır
+                self._withdraw(ticket)
+                ticket._done = True
+                if isinstance(e, asyncio.TimeoutError):
+                    raise self._reject("timeout", self.estimated_wait(), "Sunucu şu anda yoğun. Lütfen biraz sonra tekrar deneyin.")
+                raise
+        ADMISSION_WAIT.labels(self.name).observe(time.monotonic() - ticket.enqueued_at)
+
+    def _withdraw(self, ticket: AdmissionTicket) -> None:
+        queue = self._waiters.get(ticket.user_id)
+        if queue is not None and ticket in queue:
+            queue.remove(ticket)
+            self._queued -= 1
+            ADMISSION_QUEUE_DEPTH.labels(self.name).dec()
+            if not queue:
+                del self._waiters[ticket.user_id]
+        elif ticket.granted:
+            self._release(None)
+
+    def _release(self, service_seconds: Optional[float]) -> None:
+        self.in_flight -= 1
+        ADMISSION_IN_FLIGHT.labels(self.name).dec()
+        if service_seconds is not None:
+            self.service_seconds = 0.8 * self.service_seconds + 0.2 * service_seconds
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Boş yerleri kullanıcılar arasında sırayla (round-robin) dağıtır."""
+        while self.in_flight < self.capacity and self._waiters:
+            user_id, queue = next(iter(self._waiters.items()))
+            ticket = queue.popleft()
+            self._queued -= 1
+            ADMISSION_QUEUE_DEPTH.labels(self.name).dec()
+            if queue:
+                self._waiters.move_to_end(user_id)  # Bu kullanıcı sıranın sonuna
+            else:
+                del self._waiters[user_id]
+            self._grant(ticket)
+
+    def stats(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "in_flight": self.in_flight,
+            "queued": self._queued,
+            "queued_users": len(self._waiters),
+            "service_seconds_ewma": round(self.service_seconds, 3),
+            "estimated_wait_seconds": round(self.estimated_wait(), 3),
+        }
+
+
+parse_pool = AdmissionPool(
+    "parse",
+    # Worker'lar birlikte CPU sayısı kadar ayrıştırma yapar (document_governor süreç havuzu da bu boyutta)
+    capacity=settings.ADMISSION_PARSE_CONCURRENCY or max(1, (os.cpu_count() or 2) // max(1, settings.WEB_CONCURRENCY)),
+    max_queue=settings.ADMISSION_PARSE_MAX_QUEUE,
+    max_wait_seconds=settings.ADMISSION_PARSE_MAX_WAIT_SECONDS,
+    initial_service_seconds=2.0,
+    max_queued_per_user=settings.ADMISSION_MAX_QUEUED_PER_USER,
+)
+
+llm_pool = AdmissionPool(
+    "llm",
+    capacity=settings.ADMISSION_LLM_CONCURRENCY,
+    max_queue=settings.ADMISSION_LLM_MAX_QUEUE,
+    max_wait_seconds=settings.ADMISSION_LLM_MAX_WAIT_SECONDS,
+    initial_service_seconds=10.0,
+    max_queued_per_user=settings.ADMISSION_MAX_QUEUED_PER_USER,
+)
+
+
+def stats() -> dict:
+    return {"parse": parse_pool.stats(), "llm": llm_pool.stats()}
@@ -0,0 +1,371 @@
+# app/core/cache.py
+"""
+İki katmanlı önbellek: süreç içi L1 (LRU + TTL) önünde, aynı makinedeki tüm gunicorn
+worker'larının paylaştığı L2 (varsayılan: SQLite dosyası).
+
+Neden: Dockerfile 4 worker başlatır; süreç içi bir önbellek her worker'da ayrı ve soğuk
+olur (isabet oranı ~1/4'e düşer) ve bir worker'da yapılan silme diğerlerinde görünmez.
+
+- Namespace + sürüm: her önbelleğin adı ve sürümü L2 anahtarına girer. Saklanan değerin
+  biçimi değişince sürüm artırılır; eski girdiler okunmaz ve süreleri dolunca temizlenir.
+- TTL + boyut: L1'de girdi sayısı (LRU), L2'de namespace başına girdi sayısı sınırlıdır.
+  L2'den okunan girdi L1'e kalan süresiyle yazılır.
+- Geçersiz kılma yayını: 'delete' / 'clear' L2'deki olay tablosuna yazılır; her worker
+  bu tabloyu 'CACHE_INVALIDATION_POLL_SECONDS'te bir okuyup kendi L1'inden düşer.
+- Metrikler: namespace ve katman (l1 / l2) başına isabet / ıskalama sayaçları.
+- L2 arızası isteği düşürmez (fail-open): ıskalama sayılır ve loglanır.
+- Serileştirme: L2'ye sadece JSON (orjson) yazılır, pickle kullanılmaz; dosyaya yazabilen
+  biri worker'larda kod çalıştıramaz. JSON'a doğrudan uymayan değerler (model, tuple,
+  datetime) için 'encode' / 'decode' ile açıkça dönüştürülür. Çözülemeyen girdi ıskalamadır.
+- Dosya, uygulama kullanıcısına özel bir dizinde (0700) ve 0600 izinle tutulur.
+
+Paylaşılmaması gereken (büyük veya kişisel veri: CV metni) değerler için 'shared=False':
+sadece L1, diske hiç yazılmaz.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Hashable, Optional
+
+import orjson
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import get_settings
+from app.core.metrics import CACHE_REQUESTS
+from app.core.sqlite_store import ThreadLocalSQLite, data_dir, private_file
+from app.core.ttl_cache import TTLCache
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class L2Store(ABC):
+    """Worker'lar arası paylaşılan depo. Değerler JSON kodlanmış 'bytes'tır, süreler time.time()."""
+
+    @abstractmethod
+    def get(self, namespace: str, key: str) -> Optional[tuple[float, bytes]]:
+        """(expires_at, değer) döndürür; yoksa veya süresi dolmuşsa None."""
+
+    @abstractmethod
+    def set(self, namespace: str, key: str, value: bytes, expires_at: float, max_entries: int) -> None: ...
+
+    @abstractmethod
+    def delete(self, namespace: str, key: Optional[str]) -> None:
+        """Girdiyi (key None ise tüm namespace'i) siler ve geçersiz kılma olayı yayınlar."""
+
+    @abstractmethod
+    def invalidations_since(self, last_id: int) -> list[tuple[int, str, Optional[str]]]:
+        """'last_id'den sonraki (id, namespace, key) olayları."""
+
+    @abstractmethod
+    def last_invalidation_id(self) -> int: ...
+
+
+class MemoryL2Store(L2Store):
+    """Tek süreçlik L2 (geliştirme / testler). Worker'lar arası paylaşılmaz."""
+
+    def __init__(self):
+        self._data: dict[tuple[str, str], tuple[float, bytes]] = {}
+        self._events: list[tuple[int, str, Optional[str]]] = []
+        self._lock = threading.Lock()
+
+    def get(self, namespace: str, key: str) -> Optional[tuple[float, bytes]]:
+        with self._lock:
+            entry = self._data.get((namespace, key))
+        if entry is None or entry[0] <= time.time():
+            return None
+        return entry
+
+    def set(self, namespace: str, key: str, value: bytes, expires_at: float, max_entries: int) -> None:
+        with self._lock:
+            self._data.pop((namespace, key), None)  # Ekleme sırası = en eski girdi önde
+            self._data[(namespace, key)] = (expires_at, value)
+            keys = [entry_key for entry_key in self._data if entry_key[0] == namespace]
+            for entry_key in keys[: max(0, len(keys) - max_entries)]:
+                del self._data[entry_key]
+
+    def delete(self, namespace: str, key: Optional[str]) -> None:
+        with self._lock:
+            if key is None:
+                for entry_key in [entry_key for entry_key in self._data if entry_key[0] == namespace]:
+                    del self._data[entry_key]
+            else:
+                self._data.pop((namespace, key), None)
+            self._events.append((len(self._events) + 1, namespace, key))
+
+    def invalidations_since(self, last_id: int) -> list[tuple[int, str, Optional[str]]]:
+        with self._lock:
+            return self._events[last_id:]
+
+    def last_invalidation_id(self) -> int:
+        with self._lock:
+            return len(self._events)
+
+
+class SQLiteL2Store(L2Store):
+    """Aynı makinedeki tüm worker'ların paylaştığı SQLite (WAL) tabanlı L2."""
+
+    PRUNE_EVERY = 500                  # Bu kadar yazmada bir süresi dolanlar / fazlalar silinir
+    INVALIDATION_RETENTION_SECONDS = 3600
+
+    def __init__(self, path: str):
+        self._store = ThreadLocalSQLite(private_file(path))
+        self._store.register_schema(
+            "CREATE TABLE IF NOT EXISTS cache_entries ("
+            " namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL,"
+            " expires_at REAL NOT NULL, created_at REAL NOT NULL, PRIMARY KEY (namespace, key))",
+            "CREATE INDEX IF NOT EXISTS cache_entries_age ON cache_entries (namespace, created_at)",
+            "CREATE INDEX IF NOT EXISTS cache_entries_expiry ON cache_entries (expires_at)",
+            "CREATE TABLE IF NOT EXISTS cache_invalidations ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, namespace TEXT NOT NULL, key TEXT, created_at REAL NOT NULL)",
+        )
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def get(self, namespace: str, key: str) -> Optional[tuple[float, bytes]]:
+        row = self._store.connection().execute(
+            "SELECT expires_at, value FROM cache_entries WHERE namespace = ? AND key = ? AND expires_at > ?",
+            (namespace, key, time.time()),
+        ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def set(self, namespace: str, key: str, value: bytes, expires_at: float, max_entries: int) -> None:
+        conn = self._store.connection()
+        now = time.time()
+        conn.execute(
+            "INSERT INTO cache_entries (namespace, key, value, expires_at, created_at) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(namespace, key) DO UPDATE SET value = excluded.value, "
+            "expires_at = excluded.expires_at, created_at = excluded.created_at",
+            (namespace, key, value, expires_at, now),
+        )
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % self.PRUNE_EVERY == 0
+        if prune:
+            self._prune(conn, namespace, max_entries, now)
+
+    def _prune(self, conn, namespace: str, max_entries: int, now: float) -> None:
+        conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (now,))
+        # Namespace sınırı aşıldıysa en eski girdiler atılır
+        conn.execute(
+            "DELETE FROM cache_entries WHERE namespace = ? AND key IN ("
+            " SELECT key FROM cache_entries WHERE namespace = ? ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (namespace, namespace, max_entries),
+        )
+        conn.execute(
+            "DELETE FROM cache_invalidations WHERE created_at < ?",
+            (now - self.INVALIDATION_RETENTION_SECONDS,),
+        )
+
+    def delete(self, namespace: str, key: Optional[str]) -> None:
+        conn = self._store.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if key is None:
+                conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (namespace,))
+            else:
+                conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (namespace, key))
+            conn.execute(
+                "INSERT INTO cache_invalidations (namespace, key, created_at) VALUES (?, ?, ?)",
+                (namespace, key, time.time()),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def invalidations_since(self, last_id: int) -> list[tuple[int, str, Optional[str]]]:
+        return self._store.connection().execute(
+            "SELECT id, namespace, key FROM cache_invalidations WHERE id > ? ORDER BY id", (last_id,)
+        ).fetchall()
+
+    def last_invalidation_id(self) -> int:
+        row = self._store.connection().execute("SELECT MAX(id) FROM cache_invalidations").fetchone()
+        return row[0] or 0
+
+
+def _create_l2() -> Optional[L2Store]:
+    if settings.CACHE_L2_BACKEND == "none":
+        return None
+    if settings.CACHE_L2_BACKEND == "memory":
+        return MemoryL2Store()
+    path = settings.CACHE_SQLITE_PATH or os.path.join(data_dir(), "cache.sqlite3")
+    return SQLiteL2Store(path)
+
+
+l2_store: Optional[L2Store] = _create_l2()
+_registry: dict[str, "Cache"] = {}
+
+
+def _l2_key(key: Hashable) -> str:
+    return "|".join(map(str, key)) if isinstance(key, tuple) else str(key)
+
+
+class Cache:
+    """
+    Bir namespace için L1 + L2 önbellek. Okuma / yazma 'async'tir: L1 isabeti olay
+    döngüsünde, L2 erişimi threadpool'da yapılır.
+
+    'encode': değer -> JSON'a uygun yapı (L2'ye yazmadan önce), 'decode': tersi (L2'den
+    okuduktan sonra). Verilmezse değer olduğu gibi JSON'a çevrilir (dict, list, str, int...).
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        max_entries: int,
+        default_ttl: float,
+        version: int = 1,
+        shared: bool = True,
+        l2_max_entries: Optional[int] = None,
+        encode: Optional[Callable[[Any], Any]] = None,
+        decode: Optional[Callable[[Any], Any]] = None,
+    ):
+        self.namespace = namespace
+        self.version = version
+        self.default_ttl = default_ttl
+        self.shared = shared
+        self.l2_max_entries = l2_max_entries or max_entries * 10
+        self._encode = encode
+        self._decode = decode
+        self._l1 = TTLCache(max_entries=max_entries, default_ttl=default_ttl)
+        self._l2_namespace = f"{namespace}:v{version}"
+        self.l2_hits = 0
+        self.l2_misses = 0
+        _registry[namespace] = self
+
+    @property
+    def _l2(self) -> Optional[L2Store]:
+        return l2_store if self.shared else None
+
+    # --- Sadece L1 (senkron) ---
+    def get_local(self, key: Hashable) -> Optional[Any]:
+        value = self._l1.get(key)
+        CACHE_REQUESTS.labels(self.namespace, "l1", "hit" if value is not None else "miss").inc()
+        return value
+
+    def set_local(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        self._l1.set(key, value, ttl=ttl)
+
+    # --- L1 + L2 ---
+    async def get(self, key: Hashable) -> Optional[Any]:
+        value = self.get_local(key)
+        if value is not None or self._l2 is None:
+            return value
+        try:
+            entry = await run_in_threadpool(self._l2.get, self._l2_namespace, _l2_key(key))
+        except Exception as e:
+            logger.warning("L2 önbellek okunamadı (%s): %s", self.namespace, e)
+            entry = None
+        if entry is None:
+            self.l2_misses += 1
+            CACHE_REQUESTS.labels(self.namespace, "l2", "miss").inc()
+            return None
+        expires_at, payload = entry
+        try:
+            value = orjson.loads(payload)
+            if self._decode is not None:
+                value = self._decode(value)
+        except Exception as e:
+            # Eski / bozuk biçim: ıskalama sayılır, girdi süresi dolunca temizlenir
+            logger.warning("L2 önbellek girdisi çözülemedi (%s): %s", self.namespace, e)
+            self.l2_misses += 1
+            CACHE_REQUESTS.labels(self.namespace, "l2", "miss").inc()
+            return None
+        self.l2_hits += 1
+        CACHE_REQUESTS.labels(self.namespace, "l2", "hit").inc()
+        self._l1.set(key, value, ttl=expires_at - time.time())
+        return value
+
+    async def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.default_ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        self._l1.set(key, value, ttl=ttl)
+        if self._l2 is None:
+            return
+        try:
+            payload = orjson.dumps(self._encode(value) if self._encode is not None else value)
+            await run_in_threadpool(
+                self._l2.set, self._l2_namespace, _l2_key(key), payload, time.time() + ttl, self.l2_max_entries,
+            )
+        except Exception as e:
+            logger.warning("L2 önbelleğe yazılamadı (%s): %s", self.namespace, e)
+
+    async def delete(self, key: Hashable) -> None:
+        """Girdiyi bu worker'dan, L2'den ve (yayın ile) diğer worker'ların L1'inden siler."""
+        self._l1.pop(key)
+        if self._l2 is None:
+            return
+        try:
+            await run_in_threadpool(self._l2.delete, self._l2_namespace, _l2_key(key))
+        except Exception as e:
+            logger.warning("L2 önbellekten silinemedi (%s): %s", self.namespace, e)
+
+    async def clear(self) -> None:
+        self._l1.clear()
+        if self._l2 is not None:
+            await run_in_threadpool(self._l2.delete, self._l2_namespace, None)
+
+    def _apply_invalidation(self, key: Optional[str]) -> None:
+        if key is None:
+            self._l1.clear()
+        else:
+            self._l1.pop_matching(lambda local_key: _l2_key(local_key) == key)
+
+    def stats(self) -> dict:
+        l1 = self._l1.stats()
+        hits = l1["hits"] + self.l2_hits
+        requests = l1["hits"] + l1["misses"]
+        return {
+            "version": self.version,
+            "shared": self.shared and l2_store is not None,
+            "l1": l1,
+            "l2_hits": self.l2_hits,
+            "l2_misses": self.l2_misses,
+            # L1 ıskalamasının L2'de bulunanları da isabet sayılır
+            "hit_ratio": (hits / requests) if requests else 0.0,
+        }
+
+
+# --- Geçersiz kılma yayını (worker başına tek dinleyici) ---
+_last_invalidation_id: Optional[int] = None
+
+
+def _poll_invalidations() -> list[tuple[int, str, Optional[str]]]:
+    global _last_invalidation_id
+    if _last_invalidation_id is None:
+        # Açılıştan önceki olaylar yok sayılır (L1 zaten boş)
+        _last_invalidation_id = l2_store.last_invalidation_id()
+        return []
+    events = l2_store.invalidations_since(_last_invalidation_id)
+    if events:
+        _last_invalidation_id = events[-1][0]
+    return events
+
+
+def apply_invalidations(events: list[tuple[int, str, Optional[str]]]) -> None:
+    by_l2_namespace = {cache._l2_namespace: cache for cache in _registry.values() if cache.shared}
+    for _, namespace, key in events:
+        cache = by_l2_namespace.get(namespace)
+        if cache is not None:
+            cache._apply_invalidation(key)
+
+
+async def invalidation_listener() -> None:
+    """Lifespan'de başlatılır: diğer worker'ların silmelerini bu worker'ın L1'ine uygular."""
+    if l2_store is None:
+        return
+    while True:
+        try:
+            apply_invalidations(await run_in_threadpool(_poll_invalidations))
+        except Exception as e:
+            logger.warning("Önbellek geçersiz kılma olayları okunamadı: %s", e)
+        await asyncio.sleep(settings.CACHE_INVALIDATION_POLL_SECONDS)
+
+
+def stats() -> dict:
+    return {namespace: cache.stats() for namespace, cache in _registry.items()}
@@ -0,0 +1,40 @@
+# app/core/compression.py
+import logging
+
+from fastapi import FastAPI
+from starlette.middleware.gzip import GZipMiddleware
+
+from app.core.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+def add_compression_middleware(app: FastAPI) -> None:
+    """
+    Eşik boyutunu (RESPONSE_COMPRESSION_MIN_SIZE) aşan yanıtları sıkıştırır.
+    'brotli-asgi' kuruluysa ve RESPONSE_BROTLI_ENABLED açıksa Brotli kullanılır
+    (Brotli desteklemeyen istemcilere gzip ile geri dönülür); değilse gzip.
+    """
+    if not settings.RESPONSE_COMPRESSION_ENABLED:
+        return
+
+    if settings.RESPONSE_BROTLI_ENABLED:
+        try:
+            from brotli_asgi import BrotliMiddleware
+        except ImportError:
+            logger.warning("RESPONSE_BROTLI_ENABLED açık ancak 'brotli-asgi' kurulu değil; gzip kullanılacak.")
+        else:
+            app.add_middleware(
+                BrotliMiddleware,
+                quality=settings.RESPONSE_BROTLI_QUALITY,
+                minimum_size=settings.RESPONSE_COMPRESSION_MIN_SIZE,
+                gzip_fallback=True,
+            )
+            return
+
+    app.add_middleware(
+        GZipMiddleware,
+        minimum_size=settings.RESPONSE_COMPRESSION_MIN_SIZE,
+        compresslevel=settings.RESPONSE_GZIP_LEVEL,
+    )
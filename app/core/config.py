@@ -1,31 +1,179 @@
 # app/core/config.py
+import logging
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Optional
 from dotenv import load_dotenv  # <--- 1. BU SATIRI EKLEYİN
 import os # <--- Proje yolunu bulmak için eklendi
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 DOTENV_PATH = os.path.join(BASE_DIR, '.env')
 
-if os.path.exists(DOTENV_PATH):
-    load_dotenv(dotenv_path=DOTENV_PATH)
-    print(f".env dosyası şu yoldan yüklendi: {DOTENV_PATH}") # <--- Yüklendiğini görmek için log
-else:
-    print(f"UYARI: .env dosyası şu yolda bulunamadı: {DOTENV_PATH}") # <--- Bulamazsa log
 
 class Settings(BaseSettings):
     GOOGLE_API_KEY: str
     SUPABASE_URL: str     
     SUPABASE_SERVICE_KEY: str
 
+    # True ise bazı yanıtlara teşhis bilgisi (örn: aşama süreleri) eklenir
+    DEBUG: bool = False
+
+    # Sadece yük testi / yerel geliştirme: Gemini yerine "modül:fonksiyon" ile üretilen model
+    AI_MODEL_FACTORY: Optional[str] = None
+
+    # --- Yerel JWT doğrulama ---
+    # HS256 (legacy) projelerde Supabase panelindeki 'JWT Secret'.
+    # Asimetrik anahtarlı (RS256/ES256) projelerde JWKS uç noktası kullanılır.
+    SUPABASE_JWT_SECRET: Optional[str] = None
+    SUPABASE_JWT_AUDIENCE: str = "authenticated"
+    # True ise, önbellekte olmayan token'lar ayrıca Supabase Auth'a sorulur
+    # (oturumu kapatılmış / iptal edilmiş token'ları yakalamak için).
+    AUTH_REVOCATION_CHECK: bool = False
+    AUTH_CACHE_TTL_SECONDS: int = 300
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+
+    # --- Rate limiting ---
+    RATE_LIMIT_ENABLED: bool = True
+    # "sqlite": aynı makinedeki tüm worker'lar tek dosyayı paylaşır. "memory": tek süreç.
+    RATE_LIMIT_BACKEND: str = "sqlite"
+    RATE_LIMIT_SQLITE_PATH: Optional[str] = None  # Boşsa APP_DATA_DIR/ratelimit.sqlite3
+    # Uygulamanın önündeki, X-Forwarded-For'a ekleme yapan güvenilir proxy sayısı (nginx: 1).
+    # İstemci IP'si başlığın sağından bu kadar hop içeridedir; 0: başlık yok sayılır.
+    TRUSTED_PROXY_HOPS: int = 1
+
+    # --- Supabase HTTP bağlantı havuzu ---
+    SUPABASE_TIMEOUT_SECONDS: float = 10.0        # PostgREST / Storage çağrı başına varsayılan
+    STORAGE_UPLOAD_TIMEOUT_SECONDS: float = 30.0  # Büyük dosya yüklemeleri için
+    HTTP_POOL_MAX_CONNECTIONS: int = 100
+    HTTP_POOL_MAX_KEEPALIVE: int = 20
+
+    # --- CV indirme linkleri ---
+    DOWNLOAD_LINK_TTL_SECONDS: int = 60
+    # Mevcut link en az bu kadar süre daha geçerliyse yeniden imzalanmaz, aynısı döndürülür
+    DOWNLOAD_LINK_REUSE_MIN_REMAINING_SECONDS: int = 20
+
+    # --- /dl/{short_code} yönlendirme önbelleği ---
+    REDIRECT_CACHE_MAX_ENTRIES: int = 10000
+    REDIRECT_CACHE_MAX_TTL_SECONDS: int = 300      # Linkin kendi süresi daha kısaysa o kullanılır
+    REDIRECT_NEGATIVE_CACHE_MAX_ENTRIES: int = 50000
+    REDIRECT_NEGATIVE_TTL_SECONDS: int = 30        # Bilinmeyen kodlar bu kadar süre DB'ye sorulmaz
+
+    # --- İki katmanlı önbellek (L1: süreç içi, L2: makinedeki worker'lar arası paylaşılan) ---
+    CACHE_L2_BACKEND: str = "sqlite"               # "sqlite", "memory" (tek süreç / test) veya "none"
+    CACHE_SQLITE_PATH: Optional[str] = None        # Boşsa APP_DATA_DIR/cache.sqlite3
+    APP_DATA_DIR: Optional[str] = None             # Boşsa ~/.cache/cvoptima (sadece uygulama kullanıcısı, 0700)
+    CACHE_INVALIDATION_POLL_SECONDS: float = 1.0   # Diğer worker'ların silmeleri en geç bu sürede görülür
+    ANALYSIS_RESULT_CACHE_MAX_ENTRIES: int = 2000  # Tamamlanmış analiz sonuçları
+    ANALYSIS_RESULT_CACHE_TTL_SECONDS: int = 3600
+    PARSED_TEXT_CACHE_MAX_ENTRIES: int = 500       # Dosya içeriği (SHA-256) -> ayrıştırılmış metin
+    PARSED_TEXT_CACHE_TTL_SECONDS: int = 3600
+
+    # --- CV sıralama (yerel BM25 indeksi, kullanıcı başına) ---
+    RANKING_INDEX_CACHE_MAX_USERS: int = 2000
+    RANKING_INDEX_TTL_SECONDS: int = 1800
+
+    # --- Revize CV'lerin artımlı analizi (parent_cv_id) ---
+    REVISION_INCREMENTAL_ENABLED: bool = True
+    # Değişen metin oranı bunu aşarsa kısmi analiz yerine tam analiz yapılır
+    REVISION_MAX_CHANGED_RATIO: float = 0.4
+
+    # --- OCR (taranmış PDF / fotoğraf) ---
+    RASTERIZER_BACKEND: str = "auto"  # "auto" (pdfium, yoksa poppler), "pdfium" veya "poppler"
+    OCR_DPI: int = 200                # Taranmış PDF sayfalarının çizim çözünürlüğü
+
+    # --- Belge kaynak sınırları (bkz. app/services/document_governor.py) ---
+    DOCUMENT_MAX_PAGES: int = 10
+    DOCUMENT_TRUNCATE_PAGES: bool = True           # True: fazla sayfalar atlanır, False: 413
+    DOCUMENT_MAX_PAGE_PIXELS: int = 40_000_000     # OCR_DPI'da çizilmiş sayfa / resim başına
+    DOCUMENT_MAX_ZIP_ENTRIES: int = 2000           # DOCX
+    DOCUMENT_MAX_UNCOMPRESSED_MB: int = 64         # DOCX girdilerinin açılmış toplam boyutu
+    DOCUMENT_MAX_COMPRESSION_RATIO: int = 100      # 1 MB'tan büyük girdilerde (zip bombası)
+    DOCUMENT_ISOLATION_ENABLED: bool = True        # Ayrıştırma sınırlı alt süreçte (sadece POSIX)
+    DOCUMENT_CPU_SECONDS: int = 60                 # Belge başına işlemci süresi
+    DOCUMENT_MEMORY_LIMIT_MB: int = 1536           # Alt süreç başına adres alanı
+    DOCUMENT_WALL_SECONDS: float = 120.0           # CPU sınırına takılmayan takılmalar için
+
+    # --- Analiz dışa aktarma (NDJSON / CSV akışı) ---
+    EXPORT_PAGE_SIZE: int = 200          # DB'den sayfa başına okunan (ve bellekte tutulan) satır
+    EXPORT_GZIP_LEVEL: int = 6
+
+    # --- Toplu CV yükleme (çoklu dosya / zip) ---
+    BULK_MAX_FILES: int = 100
+    BULK_MAX_FILE_BYTES: int = 10 * 1024 * 1024
+    # İstek başına toplam sınır: yüklenen baytlar ve zip'lerden çıkarılacak (açılmış) baytlar
+    BULK_MAX_TOTAL_BYTES: int = 100 * 1024 * 1024
+    BULK_PARSE_CONCURRENCY: int = 4      # Aynı anda ayrıştırılan (CPU/OCR) dosya sayısı
+    BULK_UPLOAD_CONCURRENCY: int = 8     # Aynı anda Storage'a yüklenen dosya sayısı
+    BULK_SYNC_MAX_FILES: int = 10        # Bundan fazlası arka plan işi (job_id) olarak işlenir
+    BULK_JOB_SQLITE_PATH: Optional[str] = None  # Boşsa APP_DATA_DIR/bulk_jobs.sqlite3
+
+    # --- Kabul kontrolü (OCR / LLM kapasite havuzları, worker başına) ---
+    ADMISSION_ENABLED: bool = True
+    # Havuzlar worker başınadır; makinedeki toplam = worker sayısı x kapasite. Worker sayısı gunicorn'un
+    # da okuduğu WEB_CONCURRENCY'den alınır (Dockerfile bunu ayarlar).
+    WEB_CONCURRENCY: int = 1
+    ADMISSION_PARSE_CONCURRENCY: Optional[int] = None  # Worker başına; boşsa max(1, CPU sayısı // WEB_CONCURRENCY)
+    ADMISSION_PARSE_MAX_QUEUE: int = 32
+    ADMISSION_PARSE_MAX_WAIT_SECONDS: float = 20.0     # Tahmini bekleme bunu aşarsa 503 + Retry-After
+    ADMISSION_LLM_CONCURRENCY: int = 8
+    ADMISSION_LLM_MAX_QUEUE: int = 100
+    ADMISSION_LLM_MAX_WAIT_SECONDS: float = 120.0
+    ADMISSION_MAX_QUEUED_PER_USER: int = 5             # Bir kullanıcının havuz başına kuyruktaki iş sayısı
+
+    # --- Yanıt sıkıştırma ---
+    RESPONSE_COMPRESSION_ENABLED: bool = True
+    RESPONSE_COMPRESSION_MIN_SIZE: int = 1024  # Bu boyutun altındaki yanıtlar sıkıştırılmaz
+    RESPONSE_GZIP_LEVEL: int = 5               # 9 yerine 5: CPU maliyeti çok daha düşük, oran yakın
+    RESPONSE_BROTLI_ENABLED: bool = False      # 'brotli-asgi' paketi kurulu olmalı
+    RESPONSE_BROTLI_QUALITY: int = 4
+
+    # --- İstek / iş profilleme (örnekleyici profiler) ---
+    # Admin, 'X-Profile: 1' + 'X-Admin-Token' ile tek bir isteği profilleyebilir.
+    PROFILE_SAMPLE_RATE: float = 0.0       # >0 -> kapsanan isteklerin bu oranı otomatik profillenir
+    PROFILE_SAMPLE_INTERVAL_MS: int = 5
+    PROFILE_MAX_SECONDS: int = 300         # Örnekleyici en fazla bu kadar çalışır
+    PROFILE_DIR: Optional[str] = None      # Boşsa APP_DATA_DIR/profiles (0700)
+
+    # --- Olay döngüsü takılma dedektörü (bkz. app/core/loop_monitor.py) ---
+    LOOP_MONITOR_ENABLED: bool = True
+    LOOP_MONITOR_INTERVAL_MS: int = 50        # Gecikme ölçümü aralığı
+    LOOP_STALL_THRESHOLD_MS: int = 100        # Bundan uzun bloklamalarda yığın alınır ve loglanır
+    # Sadece testlerde: bir istek olay döngüsünü bundan uzun bloklarsa 'LoopBlockedError' yükselir
+    LOOP_BLOCK_BUDGET_MS: Optional[int] = None
+
+    # --- Loglama (bkz. app/core/logger.py) ---
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"          # "json" (satır başına bir kayıt) veya "text" (yerel geliştirme)
+    LOG_QUEUE_SIZE: int = 10000       # Kuyruk doluysa yeni kayıtlar düşürülür (istek beklemez)
+    LOG_MAX_FIELD_CHARS: int = 2000   # Mesaj / alan başına; fazlası kesilir
+    LOG_DEBUG_SAMPLE_RATE: float = 0.1  # LOG_LEVEL=DEBUG iken DEBUG kayıtlarının yazılan oranı
+
+    # --- Açılış (lifespan) ---
+    # Worker "hazır" olmadan önce bağlantı havuzunu açar, Auth istemcisini, Gemini modelini
+    # ve ayrıştırma/OCR kütüphanelerini yükler. Hatalar açılışı durdurmaz, sadece loglanır.
+    PREWARM_ON_STARTUP: bool = True
+
+    # --- Janitor (süresi dolmuş linkler + sahipsiz Storage nesneleri) ---
+    JANITOR_INTERVAL_SECONDS: int = 3600       # 0 -> uygulama içinde çalışmaz (sadece komutla)
+    JANITOR_BATCH_SIZE: int = 500
+    JANITOR_BATCH_PAUSE_SECONDS: float = 0.5   # Toplu işlemler arası bekleme (DB/Storage'ı boğmamak için)
+    # Bu süreden yeni nesneler silinmez: yükleme hattında Storage, DB kaydından önce biter
+    STORAGE_ORPHAN_GRACE_SECONDS: int = 3600
+
+    # Operasyonel (admin) endpoint'ler için 'X-Admin-Token' değeri. Boşsa bu endpoint'ler kapalıdır.
+    ADMIN_API_TOKEN: Optional[str] = None
+
     class Config:
         pass 
 
 @lru_cache()
 def get_settings():
+    # .env (varsa) ilk çağrıda yüklenir; ortamda zaten tanımlı değişkenleri ezmez
+    if os.path.exists(DOTENV_PATH):
+        load_dotenv(dotenv_path=DOTENV_PATH)
     try:
         return Settings()
     except Exception as e:
         # Pydantic'in hata vermesi (örn: KEY hala bulunamadı) durumunda
-        print(f"HATA: Ayarlar yüklenemedi. .env dosyanızı veya değişken adını kontrol edin. Hata: {e}")
+        logging.getLogger(__name__).error("Ayarlar yüklenemedi. .env dosyanızı veya değişken adını kontrol edin. Hata: %s", e)
         raise e
\ No newline at end of file
@@ -0,0 +1,35 @@
+# app/core/http_client.py
+from typing import Optional
+
+import httpx
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+# Worker başına TEK paylaşılan istemci: keep-alive bağlantı havuzu + HTTP/2 çoklama.
+# Her istekte yeni TCP/TLS el sıkışması yapmamak için tüm repository'ler bunu kullanır.
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(settings.SUPABASE_TIMEOUT_SECONDS),
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_POOL_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_POOL_MAX_KEEPALIVE,
+                keepalive_expiry=30,
+            ),
+        )
+    return _client
+
+
+async def close_http_client() -> None:
+    """Uygulama kapanırken (lifespan) havuzdaki bağlantıları kapatır."""
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
@@ -1,32 +1,202 @@
 # app/core/limiter.py
-from slowapi import Limiter
-from slowapi.util import get_remote_address
-from starlette.requests import Request
+import logging
+import math
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Optional
 
-def get_request_identifier(request: Request) -> str:
+from fastapi import Depends, HTTPException, Request, status
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import get_settings
+from app.core.security import get_current_user
+from app.core.sqlite_store import ThreadLocalSQLite, data_dir, private_file
+from app.schemas.auth_schema import AuthenticatedUser
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RateLimitPolicy:
     """
-    Rate limiting için kullanıcıyı güvenli şekilde tanımlar.
-    Öncelik: Supabase user_id (JWT 'sub').
-    Fallback: IP (X-Forwarded-For destekli).
+    Route başına token-bucket politikası.
+    'rate' adet istek / 'per_seconds' saniye; 'burst' verilmezse kova kapasitesi 'rate' olur.
     """
-    # Reverse proxy desteği
-    forwarded_for = request.headers.get("x-forwarded-for")
-    real_ip = forwarded_for.split(",")[0].strip() if forwarded_for else get_remote_address(request)
+    name: str
+    rate: int
+    per_seconds: float
+    burst: Optional[int] = None
+
+    @property
+    def capacity(self) -> float:
+        return float(self.burst or self.rate)
+
+    @property
+    def refill_per_second(self) -> float:
+        return self.rate / self.per_seconds
+
+
+# --- Route politikaları ---
+ANALYSIS_START_LIMIT = RateLimitPolicy("analysis_start", rate=8, per_seconds=60)
+CV_UPLOAD_LIMIT = RateLimitPolicy("cv_upload", rate=20, per_seconds=60)
+CV_BULK_UPLOAD_LIMIT = RateLimitPolicy("cv_bulk_upload", rate=5, per_seconds=60)
+CV_DOWNLOAD_LINK_LIMIT = RateLimitPolicy("cv_download_link", rate=30, per_seconds=60)
+ANALYSIS_EXPORT_LIMIT = RateLimitPolicy("analysis_export", rate=5, per_seconds=60)
+AUTH_REGISTER_LIMIT = RateLimitPolicy("auth_register", rate=5, per_seconds=60)
+AUTH_TOKEN_LIMIT = RateLimitPolicy("auth_token", rate=10, per_seconds=60)
+
+
+class RateLimitBackend(ABC):
+    """Kova durumunu tutan depolama arayüzü (worker'lar arası paylaşım burada çözülür)."""
+
+    @abstractmethod
+    def acquire(self, key: str, capacity: float, refill_per_second: float, cost: float = 1.0) -> float:
+        """
+        Kovadan 'cost' kadar jeton almayı dener.
+        İzin verilirse 0 döner; verilmezse tekrar denemeden önce beklenecek saniyeyi döner.
+        """
+
+
+def _refill(tokens: float, updated_at: float, now: float, capacity: float, refill_per_second: float) -> float:
+    return min(capacity, tokens + max(0.0, now - updated_at) * refill_per_second)
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """Tek süreçlik backend (geliştirme / tek worker). Worker'lar arası paylaşılmaz."""
+
+    def __init__(self):
+        self._buckets: dict[str, tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str, capacity: float, refill_per_second: float, cost: float = 1.0) -> float:
+        now = time.time()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (capacity, now))
+            tokens = _refill(tokens, updated_at, now, capacity, refill_per_second)
+            if tokens >= cost:
+                self._buckets[key] = (tokens - cost, now)
+                return 0.0
+            self._buckets[key] = (tokens, now)
+            return (cost - tokens) / refill_per_second
+
+
+class SQLiteRateLimitBackend(RateLimitBackend):
+    """
+    Aynı makinedeki tüm worker'ların paylaştığı SQLite tabanlı backend.
+    Her 'acquire' tek bir 'BEGIN IMMEDIATE' transaction'ı içinde atomik çalışır.
+    """
+
+    PRUNE_EVERY = 1000          # Bu kadar çağrıda bir eski kovaları temizle
+    PRUNE_IDLE_SECONDS = 86400  # 1 gündür dokunulmayan kovalar silinir
+
+    def __init__(self, path: str):
+        self._store = ThreadLocalSQLite(path)
+        self._store.register_schema(
+            "CREATE TABLE IF NOT EXISTS rate_limit_buckets ("
+            " key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._calls = 0
 
-    auth_header = request.headers.get("authorization")
-    if auth_header:
+    def acquire(self, key: str, capacity: float, refill_per_second: float, cost: float = 1.0) -> float:
+        conn = self._store.connection()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
         try:
-            token = auth_header.split(" ")[1]
-            # Token içindeki sub alanını çıkarmak güvenli kimlik mekanizmasıdır
-            # Token decode etmiyoruz -> sadece hash key olarak kullanıyoruz
-            return token
+            row = conn.execute(
+                "SELECT tokens, updated_at FROM rate_limit_buckets WHERE key = ?", (key,)
+            ).fetchone()
+            tokens, updated_at = row if row else (capacity, now)
+            tokens = _refill(tokens, updated_at, now, capacity, refill_per_second)
+
+            retry_after = 0.0
+            if tokens >= cost:
+                tokens -= cost
+            else:
+                retry_after = (cost - tokens) / refill_per_second
+
+            conn.execute(
+                "INSERT INTO rate_limit_buckets (key, tokens, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated_at = excluded.updated_at",
+                (key, tokens, now),
+            )
+            self._calls += 1
+            if self._calls % self.PRUNE_EVERY == 0:
+                conn.execute(
+                    "DELETE FROM rate_limit_buckets WHERE updated_at < ?",
+                    (now - self.PRUNE_IDLE_SECONDS,),
+                )
+            conn.execute("COMMIT")
+            return retry_after
         except Exception:
-            return real_ip
+            conn.execute("ROLLBACK")
+            raise
+
+
+def _create_backend() -> RateLimitBackend:
+    if settings.RATE_LIMIT_BACKEND == "memory":
+        return MemoryRateLimitBackend()
+    # Dosyayı önceden oluşturabilen / bozabilen biri tüm kovaları sıfırlar veya sınırları kapatır
+    path = settings.RATE_LIMIT_SQLITE_PATH or os.path.join(data_dir(), "ratelimit.sqlite3")
+    return SQLiteRateLimitBackend(private_file(path))
+
+
+backend: RateLimitBackend = _create_backend()
+
+
+def get_client_ip(request: Request) -> str:
+    """
+    Reverse proxy (nginx) arkasında gerçek istemci IP'sini bulur. X-Forwarded-For'un soldaki
+    girdileri istemcinin kendi gönderdiği değerlerdir (her istekte değiştirilebilir); güvenilir
+    olan, TRUSTED_PROXY_HOPS kadar proxy'nin sağdan eklediği girdilerdir.
+    """
+    hops = settings.TRUSTED_PROXY_HOPS
+    forwarded_for = request.headers.get("x-forwarded-for")
+    if hops > 0 and forwarded_for:
+        entries = [entry.strip() for entry in forwarded_for.split(",") if entry.strip()]
+        if entries:
+            return entries[max(0, len(entries) - hops)]
+    return request.client.host if request.client else "unknown"
+
+
+async def _enforce(policy: RateLimitPolicy, identity: str) -> None:
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+    try:
+        retry_after = await run_in_threadpool(
+            backend.acquire, f"{policy.name}:{identity}", policy.capacity, policy.refill_per_second
+        )
+    except Exception as e:
+        # Mimari Karar: Limiter deposu arızalıysa isteği engellemek yerine geçir (fail-open)
+        logger.warning("Rate limit kontrolü yapılamadı (%s): %s", policy.name, e)
+        return
+
+    if retry_after > 0:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=(
+                f"Çok fazla istek. Bu işlem için limit: {policy.rate} istek / "
+                f"{int(policy.per_seconds)} saniye."
+            ),
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
+
+def rate_limit(policy: RateLimitPolicy):
+    """
+    Kimliği doğrulanmış kullanıcının id'sine ('sub') göre limit uygulayan bağımlılık.
+    Token yenilense de kullanıcı aynı kovayı kullanır.
+    """
+    async def dependency(user: AuthenticatedUser = Depends(get_current_user)) -> None:
+        await _enforce(policy, f"user:{user.id}")
+    return dependency
 
-    return real_ip
 
-# production safe limiter
-limiter = Limiter(
-    key_func=get_request_identifier,
-    default_limits=[]
-)
\ No newline at end of file
+def rate_limit_by_ip(policy: RateLimitPolicy):
+    """Kimlik doğrulaması olmayan endpoint'ler (kayıt, giriş) için IP tabanlı limit."""
+    async def dependency(request: Request) -> None:
+        await _enforce(policy, f"ip:{get_client_ip(request)}")
+    return dependency
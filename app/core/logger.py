@@ -0,0 +1,261 @@
+# app/core/logger.py
+"""
+Yapılandırılmış loglama (satır başına bir JSON kaydı, stderr).
+
+Kayıt, çağıran thread'de (olay döngüsü dahil) sadece hazırlanır: bağlam kimlikleri eklenir,
+mesaj biçimlendirilip kısaltılır ve sınırlı bir kuyruğa atılır. JSON'a çevirme, maskeleme ve
+stderr'e yazma ayrı bir dinleyici thread'inde yapılır; yazma G/Ç'si isteği bekletmez.
+Kuyruk doluysa kayıt beklenmeden düşürülür ve sayılır.
+
+Her kayıtta:
+- request_id : RequestContextMiddleware (gelen 'X-Request-ID' veya yeni kimlik; yanıtta döner)
+- job_id     : arka plan işlerinde 'log_context(job_id=...)' ile
+- 'extra' ile verilen alanlar (örn. logger.info("...", extra={"pages": 3}))
+
+Mesaj ve alanlar LOG_MAX_FIELD_CHARS karakterle sınırlıdır. JWT'ler, imzalı URL token'ları,
+e-posta adresleri ve telefon numaraları maskelenir; 'token', 'cv_text_content' gibi alanların
+değeri hiç yazılmaz. DEBUG kayıtları LOG_DEBUG_SAMPLE_RATE oranında örneklenir (kayıt başına
+extra={"sample_rate": ...} ile değiştirilebilir).
+
+Kullanım: modül başında 'logger = logging.getLogger(__name__)'.
+"""
+import atexit
+import copy
+import logging
+import queue
+import random
+import re
+import sys
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Iterator, Optional
+
+import orjson
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import get_settings
+from app.core.metrics import LOG_RECORDS_DROPPED
+
+settings = get_settings()
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+job_id_var: ContextVar[Optional[str]] = ContextVar("job_id", default=None)
+
+_SAFE_ID = re.compile(r"^[A-Za-z0-9_.-]{1,128}$")
+_MAX_EXCEPTION_CHARS = 8000
+
+# (desen, yerine) çiftleri; sırayla uygulanır
+_REDACTIONS = [
+    (re.compile(r"eyJ[A-Za-z0-9_-]{8,}\.[A-Za-z0-9_-]{8,}\.[A-Za-z0-9_-]*"), "[jwt]"),
+    (re.compile(r"([?&](?:token|sig|signature|x-amz-signature|apikey|key)=)[^&\s\"']+", re.IGNORECASE), r"\1[redacted]"),
+    (re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+"), "[email]"),
+    (re.compile(r"(?<![\w+])\+\d[\d ()-]{8,}\d"), "[phone]"),
+    (re.compile(r"\b0\d{3}[ -]?\d{3}[ -]?\d{2}[ -]?\d{2}\b"), "[phone]"),
+]
+# Bu adlardaki 'extra' alanlarının değeri hiç yazılmaz
+_SECRET_FIELDS = frozenset({
+    "token", "access_token", "refresh_token", "authorization", "password",
+    "signed_url", "signedURL", "cv_text_content", "job_description_text",
+})
+# LogRecord'un kendi öznitelikleri; geri kalanlar 'extra' alanıdır
+_RECORD_FIELDS = frozenset(vars(logging.makeLogRecord({}))) | {"message", "request_id", "job_id", "sample_rate"}
+
+# Her HTTP çağrısı için INFO kaydı yazan kütüphaneler (Supabase istemcisi): sadece uyarılar
+_NOISY_LOGGERS = ("httpx", "httpcore", "hpack")
+
+_configured = False
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+
+
+def current_request_id() -> Optional[str]:
+    return request_id_var.get()
+
+
+@contextmanager
+def log_context(request_id: Optional[str] = None, job_id: Optional[str] = None) -> Iterator[None]:
+    """Blok süresince yazılan kayıtlara (threadpool'dakiler dahil) kimlikleri ekler."""
+    tokens = []
+    if request_id is not None:
+        tokens.append((request_id_var, request_id_var.set(request_id)))
+    if job_id is not None:
+        tokens.append((job_id_var, job_id_var.set(job_id)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+def context_ids() -> dict[str, str]:
+    """Aktif kimlikler; alt süreçlere 'log_context(**ids)' ile aktarmak için."""
+    ids = {"request_id": request_id_var.get(), "job_id": job_id_var.get()}
+    return {name: value for name, value in ids.items() if value is not None}
+
+
+def truncate(text: str, limit: int) -> str:
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}…[+{len(text) - limit} karakter]"
+
+
+def redact(text: str) -> str:
+    for pattern, replacement in _REDACTIONS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def _field(name: str, value):
+    if name in _SECRET_FIELDS:
+        return "[redacted]"
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    return redact(truncate(str(value), settings.LOG_MAX_FIELD_CHARS))
+
+
+class _ContextFilter(logging.Filter):
+    """Çağıran thread'de: DEBUG örneklemesi ve bağlam kimlikleri."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno <= logging.DEBUG:
+            rate = getattr(record, "sample_rate", settings.LOG_DEBUG_SAMPLE_RATE)
+            if rate < 1 and random.random() >= rate:
+                LOG_RECORDS_DROPPED.labels("sampled").inc()
+                return False
+        if not hasattr(record, "request_id"):
+            record.request_id = request_id_var.get()
+            record.job_id = job_id_var.get()
+        return True
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Mesaj burada biçimlendirilir (argümanlar sonradan değişebilir) ama sadece kısaltılır;
+        # maskeleme ve JSON dinleyici thread'inde. İstisna (exc_info) olduğu gibi aktarılır.
+        record = copy.copy(record)
+        record.msg = truncate(record.getMessage(), settings.LOG_MAX_FIELD_CHARS)
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.labels("queue_full").inc()
+
+
+def _entry(record: logging.LogRecord, formatter: logging.Formatter) -> dict:
+    entry = {
+        "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+        "level": record.levelname,
+        "logger": record.name,
+        "msg": redact(truncate(record.getMessage(), settings.LOG_MAX_FIELD_CHARS)),
+    }
+    for name in ("request_id", "job_id"):
+        if getattr(record, name, None):
+            entry[name] = record.__dict__[name]
+    for name, value in record.__dict__.items():
+        if name not in _RECORD_FIELDS and not name.startswith("_"):
+            entry[name] = _field(name, value)
+    if record.exc_info:
+        entry["exc"] = redact(truncate(formatter.formatException(record.exc_info), _MAX_EXCEPTION_CHARS))
+    return entry
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        return orjson.dumps(_entry(record, self)).decode()
+
+
+class TextFormatter(logging.Formatter):
+    """Yerel geliştirme: 'zaman SEVİYE logger [request_id/job_id] mesaj alan=değer'."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = _entry(record, self)
+        parts = [entry.pop("ts"), f"{entry.pop('level'):<7}", entry.pop("logger")]
+        ids = "/".join(entry.pop(name) for name in ("request_id", "job_id") if name in entry)
+        if ids:
+            parts.append(f"[{ids}]")
+        parts.append(entry.pop("msg"))
+        exc = entry.pop("exc", None)
+        parts.extend(f"{name}={value}" for name, value in entry.items())
+        line = " ".join(parts)
+        return f"{line}\n{exc}" if exc else line
+
+
+def _install(handler: logging.Handler) -> None:
+    handler.addFilter(_ContextFilter())
+    logging.getLogger().addHandler(handler)
+
+
+def configure_logging(use_queue: bool = True) -> None:
+    """
+    Kök logger'ı yapılandırır (süreç başına bir kez). 'use_queue=False': doğrudan stderr'e
+    yazar; ayrıştırma alt süreçleri gibi olay döngüsü olmayan süreçler için.
+    """
+    global _configured, _listener, _queue_handler
+    if _configured:
+        return
+    _configured = True
+
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(TextFormatter() if settings.LOG_FORMAT == "text" else JSONFormatter())
+    if use_queue:
+        _queue_handler = _NonBlockingQueueHandler(queue.Queue(settings.LOG_QUEUE_SIZE))
+        _listener = QueueListener(_queue_handler.queue, stream_handler)
+        _listener.start()
+        _install(_queue_handler)
+        # Dinleyici thread'i daemon'dur: çıkışta kuyrukta kalanlar kaybolmasın
+        atexit.register(flush_logging)
+    else:
+        _install(stream_handler)
+    logging.getLogger().setLevel(settings.LOG_LEVEL.upper())
+    for name in _NOISY_LOGGERS:
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+
+def flush_logging() -> None:
+    """
+    Kuyruktaki kayıtları yazar ve dinleyici thread'ini durdurur (lifespan kapanışında).
+    Sonraki kayıtlar (kapanış sırasında yazılanlar) kuyruksuz, doğrudan stderr'e yazılır.
+    """
+    global _listener, _queue_handler
+    if _listener is None:
+        return
+    listener, _listener = _listener, None
+    logging.getLogger().removeHandler(_queue_handler)
+    _queue_handler = None
+    listener.stop()
+    for handler in listener.handlers:
+        _install(handler)
+
+
+class RequestContextMiddleware:
+    """
+    İsteğe bir kimlik verir: güvenli bir 'X-Request-ID' başlığı geldiyse o, yoksa yeni bir kimlik.
+    Kimlik istek süresince yazılan tüm kayıtlara eklenir ve yanıtta 'X-Request-ID' ile döner.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = next((value for name, value in scope["headers"] if name == b"x-request-id"), b"").decode("latin-1")
+        request_id = incoming if _SAFE_ID.match(incoming) else uuid.uuid4().hex
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-request-id", request_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        with log_context(request_id=request_id):
+            await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,243 @@
+# app/core/loop_monitor.py
+"""
+Olay döngüsü takılma (stall) dedektörü.
+
+İki parçadan oluşur:
+- Kalp atışı (olay döngüsünde bir görev): her LOOP_MONITOR_INTERVAL_MS'de uyanır. Planlanan
+  uyanma ile gerçek uyanma arasındaki fark döngü gecikmesidir (cvoptima_event_loop_lag_seconds).
+- Bekçi (ayrı thread): kalp atışı planlanandan LOOP_STALL_THRESHOLD_MS kadar geç kaldıysa döngü
+  bloklanmıştır. Bekçi o anda döngü thread'inin yığınını (bloklayan senkron çağrı ve onu çağıran
+  coroutine) ve çalışan görevin isteğini (route, request_id) yakalar. Döngü açılınca kalp atışı
+  takılmayı toplam süresiyle loglar, sayar ve '/ops/event-loop' için saklar.
+
+Test modu (LOOP_BLOCK_BUDGET_MS): bir istek sırasında döngü bütçeden uzun bloklanırsa istek
+'LoopBlockedError' ile sonlanır; TestClient hatayı teste yansıtır.
+
+İstekler görevlerine LoopMonitorMiddleware ile eşlenir. Starlette'in açtığı alt görevlerde
+(örn. StreamingResponse gövdesi) çalışan kod eşlenemez; o durumda sadece yığın raporlanır.
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+import weakref
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Optional
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import BASE_DIR, get_settings
+from app.core.logger import current_request_id
+from app.core.metrics import EVENT_LOOP_LAG, EVENT_LOOP_STALLS, route_template
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+_MAX_STACK_FRAMES = 20
+_RECENT_STALLS = 20
+
+
+class LoopBlockedError(AssertionError):
+    """Test modu: istek olay döngüsünü LOOP_BLOCK_BUDGET_MS'den uzun blokladı."""
+
+
+@dataclass
+class _RequestInfo:
+    scope: Scope
+    request_id: Optional[str]
+    blocked_ms: Optional[float] = None  # Test modu: bütçe aşıldıysa bekçinin ölçtüğü süre
+    stack: list[str] = field(default_factory=list)
+
+
+@dataclass
+class _Capture:
+    expected: float  # Takılmanın ait olduğu kalp atışı (planlanan uyanma zamanı)
+    task: str
+    request: Optional[_RequestInfo]
+    stack: list[str]
+
+
+@dataclass
+class Stall:
+    at: float  # Unix zamanı (takılmanın başlangıcı)
+    duration_ms: float
+    route: str
+    request_id: Optional[str]
+    task: str
+    stack: list[str]  # En içteki çerçeve önce
+
+
+def _short_path(path: str) -> str:
+    if path.startswith(BASE_DIR):
+        return os.path.relpath(path, BASE_DIR)
+    return "/".join(path.split(os.sep)[-2:])
+
+
+def _format_stack(frame) -> list[str]:
+    """'dosya:satır fonksiyon' listesi; en içteki (bloklayan) çerçeve önce."""
+    frames = traceback.extract_stack(frame, limit=_MAX_STACK_FRAMES)
+    return [f"{_short_path(f.filename)}:{f.lineno} {f.name}" for f in reversed(frames)]
+
+
+class LoopMonitor:
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._expected_wake: Optional[float] = None  # time.monotonic() cinsinden
+        self._capture: Optional[_Capture] = None
+        self._requests: "weakref.WeakKeyDictionary[asyncio.Task, _RequestInfo]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.recent: deque[Stall] = deque(maxlen=_RECENT_STALLS)
+        self.stalls = 0
+        self.max_lag_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._loop is not None
+
+    # --- İstek <-> görev eşlemesi (middleware) ---
+    def track(self, task: asyncio.Task, info: _RequestInfo) -> Optional[_RequestInfo]:
+        with self._lock:
+            previous = self._requests.get(task)
+            self._requests[task] = info
+        return previous
+
+    def untrack(self, task: asyncio.Task, previous: Optional[_RequestInfo]) -> None:
+        with self._lock:
+            if previous is None:
+                self._requests.pop(task, None)
+            else:
+                self._requests[task] = previous
+
+    # --- Bekçi thread'i ---
+    def _snapshot(self, expected: float) -> _Capture:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        # 'current_task(loop)' döngünün çalışan görev tablosundan okur; başka thread'den de güvenli
+        task = asyncio.current_task(self._loop)
+        with self._lock:
+            request = self._requests.get(task) if task is not None else None
+        return _Capture(
+            expected=expected,
+            task=task.get_name() if task is not None else "-",
+            request=request,
+            stack=_format_stack(frame) if frame is not None else [],
+        )
+
+    def _watch(self) -> None:
+        threshold = settings.LOOP_STALL_THRESHOLD_MS / 1000
+        budget = settings.LOOP_BLOCK_BUDGET_MS / 1000 if settings.LOOP_BLOCK_BUDGET_MS is not None else None
+        capture_after = min(threshold, budget) if budget is not None else threshold
+        poll = max(capture_after / 4, 0.005)
+
+        while not self._stop.wait(poll):
+            expected = self._expected_wake
+            if expected is None:
+                continue
+            late = time.monotonic() - expected
+            if late < capture_after:
+                continue
+            capture = self._capture
+            if capture is None or capture.expected != expected:
+                capture = self._capture = self._snapshot(expected)
+            request = capture.request
+            if budget is not None and late >= budget and request is not None and request.blocked_ms is None:
+                request.stack = capture.stack
+                request.blocked_ms = late * 1000
+
+    # --- Kalp atışı (olay döngüsünde) ---
+    async def run(self) -> None:
+        """Lifespan'de görev olarak başlatılır; iptal edilene kadar çalışır."""
+        loop = asyncio.get_running_loop()
+        self._loop, self._loop_thread_id = loop, threading.get_ident()
+        self._stop.clear()
+        watchdog = threading.Thread(target=self._watch, name="cvoptima-loop-watchdog", daemon=True)
+        watchdog.start()
+        interval = settings.LOOP_MONITOR_INTERVAL_MS / 1000
+        try:
+            while True:
+                expected = loop.time() + interval  # loop.time() == time.monotonic()
+                self._expected_wake = expected
+                await asyncio.sleep(interval)
+                lag = max(0.0, loop.time() - expected)
+                EVENT_LOOP_LAG.observe(lag)
+                self.max_lag_ms = max(self.max_lag_ms, lag * 1000)
+                capture = self._capture
+                if capture is not None and capture.expected == expected:
+                    self._capture = None
+                    if lag * 1000 >= settings.LOOP_STALL_THRESHOLD_MS:
+                        self._report(capture, lag)
+        finally:
+            self._expected_wake = None
+            self._stop.set()
+            watchdog.join()
+            self._loop = self._loop_thread_id = None
+
+    def _report(self, capture: _Capture, lag: float) -> None:
+        request = capture.request
+        route = route_template(request.scope) if request is not None else "background"
+        stall = Stall(
+            at=round(time.time() - lag, 3),
+            duration_ms=round(lag * 1000, 1),
+            route=route,
+            request_id=request.request_id if request is not None else None,
+            task=capture.task,
+            stack=capture.stack,
+        )
+        self.recent.append(stall)
+        self.stalls += 1
+        EVENT_LOOP_STALLS.labels(route).inc()
+        logger.warning(
+            "Olay döngüsü %.0f ms bloklandı (%s).",
+            stall.duration_ms,
+            route,
+            extra={"request_id": stall.request_id, "task": stall.task, "stack": " <- ".join(stall.stack)},
+        )
+
+    def stats(self) -> dict:
+        return {
+            "enabled": settings.LOOP_MONITOR_ENABLED,
+            "running": self.running,
+            "threshold_ms": settings.LOOP_STALL_THRESHOLD_MS,
+            "stalls": self.stalls,
+            "max_lag_ms": round(self.max_lag_ms, 1),
+            "recent": [asdict(stall) for stall in reversed(self.recent)],
+        }
+
+
+monitor = LoopMonitor()
+
+
+class LoopMonitorMiddleware:
+    """
+    İsteği çalıştığı göreve eşler (takılma raporunda route ve request_id için). Test modunda
+    istek sırasında döngü LOOP_BLOCK_BUDGET_MS'den uzun bloklandıysa 'LoopBlockedError' yükseltir.
+    RequestContextMiddleware'in içinde olmalıdır.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not monitor.running:
+            await self.app(scope, receive, send)
+            return
+
+        task = asyncio.current_task()
+        info = _RequestInfo(scope, current_request_id())
+        previous = monitor.track(task, info)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            monitor.untrack(task, previous)
+
+        if info.blocked_ms is not None and settings.LOOP_BLOCK_BUDGET_MS is not None:
+            stack = "\n  ".join(info.stack)
+            raise LoopBlockedError(
+                f"{scope['method']} {route_template(scope)} olay döngüsünü {info.blocked_ms:.0f} ms blokladı "
+                f"(bütçe {settings.LOOP_BLOCK_BUDGET_MS} ms):\n  {stack}"
+            )
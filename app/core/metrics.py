@@ -0,0 +1,249 @@
+# app/core/metrics.py
+"""
+Prometheus metrikleri ve 'Server-Timing' başlığı.
+
+- Histogram/counter'lar 'prometheus_client' ile tutulur. Gunicorn ile birden fazla
+  worker çalışırken PROMETHEUS_MULTIPROC_DIR ortam değişkeni tanımlanmalıdır; bu durumda
+  her worker kendi dosyasına yazar ve '/metrics' tüm worker'ları birleştirerek döner
+  (bkz. gunicorn.conf.py).
+- 'timed_stage' bir aşamanın süresini hem histograma yazar hem de (istek içindeysek)
+  o isteğin 'Server-Timing' başlığına ekler.
+"""
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# --- Metrikler ---
+HTTP_REQUEST_DURATION = Histogram(
+    "cvoptima_http_request_duration_seconds",
+    "HTTP istek süresi (route şablonu başına).",
+    ["method", "route", "status"],
+)
+PARSE_STAGE_DURATION = Histogram(
+    "cvoptima_parse_stage_duration_seconds",
+    "Ayrıştırma aşamalarının süresi (pdfplumber, rasterize, ocr_page, docx).",
+    ["stage"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+LLM_REQUEST_DURATION = Histogram(
+    "cvoptima_llm_request_duration_seconds",
+    "Gemini çağrı süresi.",
+    ["model", "outcome"],
+    buckets=(0.5, 1, 2.5, 5, 10, 20, 30, 60, 120),
+)
+LLM_TOKENS = Counter(
+    "cvoptima_llm_tokens_total",
+    "Gemini tarafından raporlanan token sayıları.",
+    ["model", "kind"],
+)
+SUPABASE_REQUEST_DURATION = Histogram(
+    "cvoptima_supabase_request_duration_seconds",
+    "Supabase (PostgREST / Storage) çağrı süresi.",
+    ["service", "target", "operation", "outcome"],
+)
+JOBS_IN_PROGRESS = Gauge(
+    "cvoptima_jobs_in_progress",
+    "Arka plan işleri (kuyrukta bekleyen / çalışan).",
+    ["kind", "state"],
+    multiprocess_mode="livesum",
+)
+JOB_QUEUE_WAIT = Histogram(
+    "cvoptima_job_queue_wait_seconds",
+    "Arka plan işinin kuyruğa alınmasından çalışmaya başlamasına kadar geçen süre (yaş).",
+    ["kind"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300),
+)
+ANALYSIS_RUNS = Counter(
+    "cvoptima_analysis_runs_total",
+    "Analiz görevleri, yürütme biçimine göre: full, incremental (revizyon) veya reused.",
+    ["mode"],
+)
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "cvoptima_admission_queue_depth",
+    "Kabul kontrolü havuzunda yer bekleyen iş sayısı.",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+ADMISSION_IN_FLIGHT = Gauge(
+    "cvoptima_admission_in_flight",
+    "Kabul kontrolü havuzunda çalışan iş sayısı.",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+ADMISSION_REJECTIONS = Counter(
+    "cvoptima_admission_rejections_total",
+    "Kabul kontrolünün 503 ile reddettiği istekler (neden: queue_full, user_share, deadline, timeout).",
+    ["pool", "reason"],
+)
+ADMISSION_WAIT = Histogram(
+    "cvoptima_admission_wait_seconds",
+    "Kabul kontrolü havuzunda yer için beklenen süre.",
+    ["pool"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 2, 5, 10, 30, 60, 120),
+)
+DOCUMENT_LIMIT_REJECTIONS = Counter(
+    "cvoptima_document_limit_rejections_total",
+    "Kaynak sınırı nedeniyle reddedilen belgeler (pages, page_size, zip_*, cpu, memory, wall_time, crashed).",
+    ["reason"],
+)
+CACHE_REQUESTS = Counter(
+    "cvoptima_cache_requests_total",
+    "Önbellek okumaları; namespace, katman (l1 / l2) ve sonuç (hit / miss) başına.",
+    ["namespace", "tier", "outcome"],
+)
+LOG_RECORDS_DROPPED = Counter(
+    "cvoptima_log_records_dropped_total",
+    "Yazılmadan düşürülen log kayıtları; 'sampled' (DEBUG örneklemesi) veya 'queue_full'.",
+    ["reason"],
+)
+EVENT_LOOP_LAG = Histogram(
+    "cvoptima_event_loop_lag_seconds",
+    "Olay döngüsü gecikmesi: zamanlanmış bir uyanmanın ne kadar geç çalıştığı.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+EVENT_LOOP_STALLS = Counter(
+    "cvoptima_event_loop_stalls_total",
+    "Olay döngüsünün LOOP_STALL_THRESHOLD_MS'den uzun bloklandığı durumlar (route başına).",
+    ["route"],
+)
+WORKER_COLD_START = Gauge(
+    "cvoptima_worker_cold_start_seconds",
+    "Worker açılış süresi: 'import' (app.main yüklenmesi) ve 'startup' (lifespan + ön ısıtma).",
+    ["phase"],
+    multiprocess_mode="liveall",
+)
+
+# --- İstek başına aşama süreleri (Server-Timing) ---
+# Değer, aşama adı -> toplam saniye sözlüğüdür. Sözlük paylaşıldığı için threadpool'daki
+# ve asyncio.gather ile açılan görevlerdeki kayıtlar da aynı isteğe yazılır.
+_request_stages: ContextVar[Optional[dict[str, float]]] = ContextVar("request_stages", default=None)
+
+
+def record_stage(stage: str, seconds: float) -> None:
+    """Aşama süresini aktif isteğin 'Server-Timing' özetine ekler (istek dışında no-op)."""
+    stages = _request_stages.get()
+    if stages is not None:
+        stages[stage] = stages.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def collect_stages() -> Iterator[dict[str, float]]:
+    """İstek dışında (örn. alt süreçte) kaydedilen aşama sürelerini bir sözlükte toplar."""
+    stages: dict[str, float] = {}
+    token = _request_stages.set(stages)
+    try:
+        yield stages
+    finally:
+        _request_stages.reset(token)
+
+
+@contextmanager
+def timed_stage(stage: str, histogram: Optional[Histogram] = None, /, **labels: str) -> Iterator[None]:
+    """Bloğun süresini ölçer; verilmişse histograma yazar ve 'Server-Timing'e ekler."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        if histogram is not None:
+            histogram.labels(**labels).observe(elapsed)
+        record_stage(stage, elapsed)
+
+
+def _server_timing_header(stages: dict[str, float], total: float) -> bytes:
+    parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in stages.items()]
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts).encode("latin-1")
+
+
+def route_template(scope: Scope) -> str:
+    """
+    İstek yolunun route şablonu: '/api/v1/cv/3f2c...' -> '/api/v1/cv/{cv_id}'.
+    Klasik 'include_router' route'ları prefix'leriyle kopyalar ('route.path' tam yoldur).
+    FastAPI'nin router'ları tembel dahil eden sürümlerinde 'scope["route"]' router'ın kendi
+    route'udur (prefix'siz); tam yol FastAPI'nin 'scope' içindeki etkin route bağlamındadır.
+    Eşleşmeyen yollar tek etikette toplanır ki etiket sayısı patlamasın.
+    """
+    route = scope.get("route")
+    if route is None:
+        return "unmatched"
+    effective = scope.get("fastapi", {}).get("effective_route_context")
+    return getattr(effective, "path", None) or getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    Her HTTP isteğinin süresini route şablonu ('/api/v1/cv/{cv_id}') ile etiketler ve
+    yanıta 'Server-Timing' başlığını ekler. Saf ASGI middleware'dir (yanıt gövdesini tamponlamaz).
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stages: dict[str, float] = {}
+        token = _request_stages.set(stages)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", _server_timing_header(stages, time.perf_counter() - started)))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_stages.reset(token)
+            HTTP_REQUEST_DURATION.labels(scope["method"], route_template(scope), str(status_code)).observe(
+                time.perf_counter() - started
+            )
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Prometheus metin formatı. Çoklu worker modunda tüm worker'ların değerleri birleştirilir."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+# --- Arka plan işleri (kuyruk derinliği ve yaşı) ---
+def job_enqueued(kind: str) -> float:
+    """İş kuyruğa alındığında çağrılır; 'job_running'e verilecek zaman damgasını döndürür."""
+    JOBS_IN_PROGRESS.labels(kind, "queued").inc()
+    return time.time()
+
+
+@contextmanager
+def job_running(kind: str, enqueued_at: float) -> Iterator[None]:
+    """İşin kuyrukta beklediği süreyi ölçer ve çalıştığı süre boyunca 'running' sayacını tutar."""
+    JOBS_IN_PROGRESS.labels(kind, "queued").dec()
+    JOB_QUEUE_WAIT.labels(kind).observe(max(0.0, time.time() - enqueued_at))
+    JOBS_IN_PROGRESS.labels(kind, "running").inc()
+    try:
+        yield
+    finally:
+        JOBS_IN_PROGRESS.labels(kind, "running").dec()
@@ -0,0 +1,156 @@
+# app/core/profiler.py
+"""
+İsteğe bağlı (on-demand) örnekleyici profiler.
+
+Profil açıkken ayrı bir thread, her PROFILE_SAMPLE_INTERVAL_MS'de bir sürecin tüm
+thread'lerinin yığınını (stack) örnekler: olay döngüsü, threadpool'daki ayrıştırma
+ve OCR işleri dahil. Sonuç, flamegraph.pl / speedscope / inferno ile açılabilen
+"folded stacks" formatında '<PROFILE_DIR>/<profil_id>.folded' dosyasına yazılır:
+
+    thread;modül:fonksiyon;modül:fonksiyon <örnek sayısı>
+
+Profil kapalıyken maliyeti yoktur: örnekleyici thread hiç başlatılmaz.
+Aynı anda yalnızca bir profil çalışır (örnekler tüm süreci kapsadığı için).
+"""
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from fastapi import Request, Response
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import get_settings
+from app.core.logger import current_request_id
+from app.core.security import is_admin_token
+from app.core.sqlite_store import data_dir, private_dir
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = settings.PROFILE_DIR or os.path.join(data_dir(), "profiles")
+
+# Yaprak çerçevesi bu dosyalardaysa thread boşta bekliyordur (select, kuyruk, kilit); örnek atlanır
+_IDLE_LEAF_FILES = ("threading.py", "selectors.py", "queue.py")
+_SAFE_ID = re.compile(r"^[A-Za-z0-9_.-]{1,128}$")
+
+_active = threading.Lock()
+
+
+class _StackSampler(threading.Thread):
+    def __init__(self, interval: float, max_seconds: float):
+        super().__init__(name="cvoptima-profiler", daemon=True)
+        self.interval = interval
+        self.deadline = time.monotonic() + max_seconds
+        self.samples: Counter[str] = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop_event.wait(self.interval) and time.monotonic() < self.deadline:
+            thread_names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or os.path.basename(frame.f_code.co_filename) in _IDLE_LEAF_FILES:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+                    stack.append(f"{module}:{code.co_name}")
+                    frame = frame.f_back
+                stack.append(thread_names.get(thread_id, str(thread_id)).replace(";", "_"))
+                self.samples[";".join(reversed(stack))] += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+def new_profile_id(request_id: Optional[str] = None) -> str:
+    """
+    '<request_id>-<sunucu eki>': istek kimliği güvenliyse (dosya adı olarak) önek olarak kullanılır.
+    İstek kimliği istemciden gelebildiği için ek her zaman sunucuda üretilir; aynı kimlikle
+    gelen iki istek birbirinin profilini ezemez.
+    """
+    suffix = uuid.uuid4().hex[:12]
+    if request_id and _SAFE_ID.match(request_id):
+        return f"{request_id}-{suffix}"
+    return f"{uuid.uuid4().hex[:20]}{suffix}"
+
+
+def requested_profile_id(request: Request) -> Optional[str]:
+    """
+    Bu istek profillenecek mi? Profillenecekse profil kimliğini döndürür:
+    - Admin: 'X-Profile: 1' ve geçerli 'X-Admin-Token' başlığı, veya
+    - PROFILE_SAMPLE_RATE > 0 ise rastgele örnekleme.
+    Profil kimliği istek kimliğiyle başlar (loglardaki 'request_id' ile eşleşir).
+    """
+    headers = request.headers
+    if headers.get("x-profile") == "1" and is_admin_token(headers.get("x-admin-token")):
+        return new_profile_id(current_request_id())
+    if settings.PROFILE_SAMPLE_RATE > 0 and random.random() < settings.PROFILE_SAMPLE_RATE:
+        return new_profile_id(current_request_id())
+    return None
+
+
+def _write_profile(profile_id: str, samples: Counter) -> str:
+    # Başka bir kullanıcının önceden oluşturduğu dizin kabul edilmez (chmod başarısız olur)
+    path = os.path.join(private_dir(PROFILE_DIR), f"{profile_id}.folded")
+    with open(path, "w", encoding="utf-8") as profile_file:
+        for stack, count in samples.most_common():
+            profile_file.write(f"{stack} {count}\n")
+    return path
+
+
+def _finish(profile_id: str, sampler: _StackSampler) -> None:
+    """Örnekleyiciyi durdurur (thread'i bekler) ve profili yazar; threadpool'da çağrılır."""
+    sampler.stop()
+    _active.release()
+    try:
+        path = _write_profile(profile_id, sampler.samples)
+        logger.info("Profil yazıldı (%d örnek): %s", sum(sampler.samples.values()), path)
+    except OSError as e:
+        logger.warning("Profil '%s' yazılamadı: %s", profile_id, e)
+
+
+@asynccontextmanager
+async def profiling(profile_id: Optional[str]) -> AsyncIterator[None]:
+    """
+    'profile_id' None ise hiçbir şey yapmaz; değilse blok süresince yığınları örnekler.
+    Kapanışta thread'in beklenmesi ve dosya yazımı olay döngüsünü bloklamaz.
+    """
+    if profile_id is None:
+        yield
+        return
+    if not _active.acquire(blocking=False):
+        logger.warning("Başka bir profil çalışıyor; '%s' profillenmeyecek.", profile_id)
+        yield
+        return
+
+    sampler = _StackSampler(settings.PROFILE_SAMPLE_INTERVAL_MS / 1000, settings.PROFILE_MAX_SECONDS)
+    sampler.start()
+    try:
+        yield
+    finally:
+        await run_in_threadpool(_finish, profile_id, sampler)
+
+
+async def profile_request(request: Request, response: Response):
+    """
+    Endpoint bağımlılığı: istek profillenecekse endpoint fonksiyonu süresince örnekler ve
+    profil kimliğini 'X-Profile-Id' başlığıyla döndürür. 'scope="function"' ile kullanılmalıdır.
+    """
+    profile_id = requested_profile_id(request)
+    if profile_id is None:
+        yield
+        return
+    response.headers["X-Profile-Id"] = profile_id
+    async with profiling(profile_id):
+        yield
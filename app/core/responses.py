@@ -0,0 +1,18 @@
+# app/core/responses.py
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    'response_model' tanımlı OLMAYAN (dict döndüren) endpoint'ler için orjson tabanlı yanıt.
+
+    Not: 'response_model'i olan endpoint'ler FastAPI (>=0.130) tarafından zaten doğrudan
+    Pydantic'in Rust serileştiricisiyle JSON'a çevrilir; onlara özel bir yanıt sınıfı
+    VERİLMEMELİDİR (verilirse bu hızlı yol devre dışı kalır).
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
@@ -1,36 +1,175 @@
 # app/core/security.py
 
-from fastapi import Depends, HTTPException, status
+import hashlib
+import logging
+import secrets
+import time
+
+import jwt
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import get_settings
 from app.core.supabase_client import get_supabase_client
-from gotrue.types import User
+from app.core.cache import Cache
+from app.schemas.auth_schema import AuthenticatedUser
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/token") # Henüz bu endpoint yok
 
-# Supabase istemcisini al
-supabase_client = get_supabase_client()
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Doğrulanmış token önbelleği: anahtar = token'ın SHA-256 özeti (ham token bellekte / L2'de tutulmaz).
+# L2'de sadece token'ın kendi claim'leri (id, e-posta, rol, aud) durur; dosya uygulama kullanıcısına
+# özeldir (bkz. app/core/cache.py) ve girdi token'ın süresinden uzun yaşamaz. Paylaşılmazsa her
+# worker her token'ı ayrıca doğrular (uzaktan doğrulamada her biri ağa gider).
+_verified_users = Cache(
+    "auth_tokens",
+    max_entries=settings.AUTH_CACHE_MAX_ENTRIES,
+    default_ttl=settings.AUTH_CACHE_TTL_SECONDS,
+    encode=lambda user: user.model_dump(mode="json"),
+    decode=AuthenticatedUser.model_validate,
+)
+
+# Asimetrik imzalı (RS256/ES256) projeler için JWKS istemcisi (anahtarları kendisi önbellekler)
+_jwks_client: jwt.PyJWKClient | None = None
+
+_ASYMMETRIC_ALGORITHMS = {"RS256", "ES256"}
+
+
+class TokenVerificationError(Exception):
+    """Token yerel olarak doğrulanamadığında fırlatılır."""
+
+
+def _get_jwks_client() -> jwt.PyJWKClient:
+    global _jwks_client
+    if _jwks_client is None:
+        jwks_url = f"{settings.SUPABASE_URL.rstrip('/')}/auth/v1/.well-known/jwks.json"
+        _jwks_client = jwt.PyJWKClient(jwks_url, cache_keys=True, lifespan=3600)
+    return _jwks_client
+
+
+async def _verify_token_locally(token: str) -> dict | None:
+    """
+    Token'ın imzasını, süresini (exp) ve hedef kitlesini (aud) yerel olarak doğrular.
+    HS256 için proje secret'ı yoksa None döner (uzaktan doğrulamaya düşülür).
+    """
+    try:
+        algorithm = jwt.get_unverified_header(token).get("alg")
+    except jwt.PyJWTError as e:
+        raise TokenVerificationError(f"Token başlığı okunamadı: {e}")
+
+    if algorithm == "HS256":
+        if not settings.SUPABASE_JWT_SECRET:
+            return None
+        key = settings.SUPABASE_JWT_SECRET
+    elif algorithm in _ASYMMETRIC_ALGORITHMS:
+        # JWKS ilk seferde (ve anahtar rotasyonunda) ağdan çekilir; olay döngüsünü bloklamasın
+        try:
+            signing_key = await run_in_threadpool(
+                _get_jwks_client().get_signing_key_from_jwt, token
+            )
+        except jwt.PyJWTError as e:
+            raise TokenVerificationError(f"İmza anahtarı bulunamadı: {e}")
+        key = signing_key.key
+    else:
+        raise TokenVerificationError(f"Desteklenmeyen JWT algoritması: {algorithm}")
+
+    try:
+        return jwt.decode(
+            token,
+            key,
+            algorithms=[algorithm],
+            audience=settings.SUPABASE_JWT_AUDIENCE,
+            options={"require": ["exp", "sub"]},
+        )
+    except jwt.PyJWTError as e:
+        raise TokenVerificationError(str(e))
+
+
+async def _fetch_remote_user(token: str) -> AuthenticatedUser:
+    """Supabase Auth'a (ağ üzerinden) sorar. Sadece iptal kontrolü veya secret yoksa kullanılır."""
+    user_response = await run_in_threadpool(get_supabase_client().auth.get_user, token)
+    if not user_response or not user_response.user:
+        raise TokenVerificationError("Supabase Auth kullanıcıyı döndürmedi.")
+    remote_user = user_response.user
+    return AuthenticatedUser(
+        id=remote_user.id,
+        email=remote_user.email,
+        role=remote_user.role,
+        aud=remote_user.aud,
+    )
+
 
-def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
+def _unverified_expiry(token: str) -> float:
+    """
+    Token'ın 'exp' değeri, imza doğrulanmadan okunur: sadece Supabase Auth token'ı zaten
+    doğruladıktan sonra, önbellek süresini token'ın ömrüyle sınırlamak için kullanılır.
+    'exp' okunamazsa 0 döner (önbelleğe alınmaz).
+    """
     try:
-        # Supabase-py V2'de 'get_user' bir 'AuthResponse' nesnesi döndürür
-        user_response = supabase_client.auth.get_user(token)
-        
-        if not user_response or not user_response.user:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Geçersiz kimlik doğrulama bilgileri (token)",
-                headers={"WWW-Authenticate": "Bearer"},
+        claims = jwt.decode(token, options={"verify_signature": False, "verify_exp": False, "verify_aud": False})
+        return float(claims["exp"])
+    except (jwt.PyJWTError, KeyError, TypeError, ValueError):
+        return 0.0
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> AuthenticatedUser:
+    cache_key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    # 1. Sıcak yol: daha önce doğrulanmış token (ağ yok, kriptografi yok)
+    cached_user = await _verified_users.get(cache_key)
+    if cached_user is not None:
+        return cached_user
+
+    try:
+        claims = await _verify_token_locally(token)
+
+        if claims is None:
+            # HS256 secret tanımlı değil -> eski davranış (Supabase Auth'a sor)
+            user = await _fetch_remote_user(token)
+            ttl = min(settings.AUTH_CACHE_TTL_SECONDS, _unverified_expiry(token) - time.time())
+        else:
+            user = AuthenticatedUser(
+                id=claims["sub"],
+                email=claims.get("email"),
+                role=claims.get("role"),
+                aud=claims.get("aud") if isinstance(claims.get("aud"), str) else None,
             )
-        
-        # Kullanıcıyı (AuthUser nesnesini) döndür
-        return user_response.user
+            if settings.AUTH_REVOCATION_CHECK:
+                # İptal edilmiş oturumları yakalamak için yalnızca önbellek ıskalamasında sorulur
+                remote_user = await _fetch_remote_user(token)
+                if remote_user.id != user.id:
+                    raise TokenVerificationError("Token sahibi Supabase Auth ile uyuşmuyor.")
+            # Önbellek süresi, token'ın kendi son kullanma zamanını asla aşmaz
+            ttl = min(settings.AUTH_CACHE_TTL_SECONDS, claims["exp"] - time.time())
 
     except Exception as e:
-        # Supabase'in 'GoTrueApiError'unu da yakalayabiliriz, 
-        # ancak şimdilik genel bir hata yakalama yeterli.
-        print(f"Yetkilendirme Hatası: {e}")
+        logger.info("Yetkilendirme hatası: %s", e)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Geçersiz veya süresi dolmuş token",
             headers={"WWW-Authenticate": "Bearer"},
-        )
\ No newline at end of file
+        )
+
+    await _verified_users.set(cache_key, user, ttl=ttl)
+    return user
+
+
+def is_admin_token(token: str | None) -> bool:
+    """Verilen değer ADMIN_API_TOKEN ile eşleşiyor mu (sabit zamanlı karşılaştırma)."""
+    if not settings.ADMIN_API_TOKEN or not token:
+        return False
+    return secrets.compare_digest(token, settings.ADMIN_API_TOKEN)
+
+
+def require_admin(x_admin_token: str | None = Header(default=None)) -> None:
+    """
+    Operasyonel endpoint'leri (önbellek istatistikleri vb.) 'X-Admin-Token' başlığı ile korur.
+    ADMIN_API_TOKEN tanımlı değilse bu endpoint'ler tamamen kapalıdır (404).
+    """
+    if not settings.ADMIN_API_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Yetkisiz erişim.")
@@ -1,38 +1,48 @@
-import random
+import logging
+import secrets
 import string
-from app.core.supabase_client import get_supabase_client
+from app.core.supabase_async import PostgrestError
+from app.repositories import link_repository
 
-supabase = get_supabase_client()
-DEFAULT_CODE_LENGTH = 7 # Kısa kodun uzunluğu (örn: 7 karakter)
+DEFAULT_CODE_LENGTH = 7 # Kısa kodun uzunluğu (örn: 7 karakter) -> 62^7 ≈ 3.5 trilyon olasılık
+SHORT_CODE_ALPHABET = string.ascii_letters + string.digits
+_ALPHABET_SET = frozenset(SHORT_CODE_ALPHABET)
+
+logger = logging.getLogger(__name__)
 
 def generate_short_code(length: int = DEFAULT_CODE_LENGTH) -> str:
-    """Rastgele harf ve rakamlardan oluşan belirli uzunlukta bir kod üretir."""
-    characters = string.ascii_letters + string.digits
-    return ''.join(random.choice(characters) for _ in range(length))
+    """
+    Kriptografik olarak güvenli rastgele harf ve rakamlardan oluşan bir kod üretir.
+    'random' modülü tahmin edilebilir olduğu için 'secrets' kullanılır
+    (/dl endpoint'i kilitsizdir, güvenlik kodun tahmin edilemezliğine dayanır).
+    """
+    return ''.join(secrets.choice(SHORT_CODE_ALPHABET) for _ in range(length))
 
-async def generate_unique_short_code(length: int = DEFAULT_CODE_LENGTH) -> str:
+def is_valid_short_code(code: str) -> bool:
+    """Üreticinin üretebileceği bir kod mu (uzunluk + alfabe)? Değilse DB'ye / önbelleğe sorulmaz."""
+    return len(code) == DEFAULT_CODE_LENGTH and all(char in _ALPHABET_SET for char in code)
+
+async def insert_link_with_unique_short_code(link_data: dict, length: int = DEFAULT_CODE_LENGTH) -> str:
     """
-    Veritabanında ('shortened_urls' tablosu) benzersiz olduğu garanti edilen
-    bir kısa kod üretir.
-    
-    Not: Çok düşük bir ihtimal olsa da, üretilen kod zaten varsa 
-    tekrar deneyerek çakışmayı önler (collision handling).
+    Yeni bir kısa kod üretip 'shortened_urls' satırını TEK bir yazma işlemiyle ekler
+    ve kodu döndürür.
+
+    Benzersizlik önceden 'select' ile yoklanmaz (hem ekstra bir DB turu hem de
+    yarış durumuna açık); doğrudan 'short_code' üzerindeki UNIQUE kısıt ile
+    sağlanır. Çok düşük bir ihtimal olsa da çakışma (23505) olursa yeni bir kodla
+    tekrar denenir.
     """
-    max_attempts = 10 # Sonsuz döngüyü önlemek için bir sınır koyalım
+    max_attempts = 5 # Sonsuz döngüyü önlemek için bir sınır koyalım
     for _ in range(max_attempts):
         short_code = generate_short_code(length)
         try:
-            # Bu kodun DB'de olup olmadığını kontrol et
-            response = supabase.table("shortened_urls").select("id").eq("short_code", short_code).limit(1).execute()
-            
-            # Eğer 'data' boşsa, kod benzersizdir, onu döndür
-            if not response.data:
-                return short_code
-                
-        except Exception as e:
-            # Veritabanı hatası durumunda işlemi durdur
-            print(f"HATA: Kısa kod benzersizliği kontrol edilemedi: {e}")
-            raise e # Veya None döndürerek hatayı yukarıya bildir
-            
+            await link_repository.insert_link({**link_data, "short_code": short_code})
+            return short_code
+        except PostgrestError as e:
+            if e.is_unique_violation:
+                continue # Çakışma: yeni bir kodla tekrar dene
+            logger.error("Kısa kodlu link kaydedilemedi: %s", e)
+            raise e
+
     # Eğer max_attempts denemede benzersiz kod bulunamazsa hata ver
-    raise Exception(f"Benzersiz kısa kod {max_attempts} denemede üretilemedi.")
\ No newline at end of file
+    raise Exception(f"Benzersiz kısa kod {max_attempts} denemede üretilemedi.")
@@ -0,0 +1,67 @@
+# app/core/sqlite_store.py
+import os
+import sqlite3
+import threading
+
+from app.core.config import get_settings
+
+
+def private_dir(path: str) -> str:
+    """Dizini sadece sahibinin okuyup yazabileceği şekilde (0700) oluşturur / daraltır."""
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    os.chmod(path, 0o700)
+    return path
+
+
+def data_dir() -> str:
+    """Uygulamaya özel veri dizini (APP_DATA_DIR, yoksa ~/.cache/cvoptima); paylaşılan /tmp değil."""
+    return private_dir(get_settings().APP_DATA_DIR or os.path.join(os.path.expanduser("~"), ".cache", "cvoptima"))
+
+
+def private_file(path: str) -> str:
+    """
+    Dosyayı (yoksa) 0600 ile oluşturur. SQLite '-wal' / '-shm' dosyalarını ana dosyanın
+    izinleriyle açtığı için onlar da sadece sahibine açık olur.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    os.close(os.open(path, os.O_CREAT | os.O_RDWR, 0o600))
+    os.chmod(path, 0o600)
+    return path
+
+
+class ThreadLocalSQLite:
+    """
+    Aynı makinedeki tüm gunicorn worker'larının paylaştığı SQLite dosyası için
+    thread başına bağlantı yöneticisi.
+
+    sqlite3 bağlantıları thread'ler arasında paylaşılamaz; bu yüzden her thread
+    kendi bağlantısını açar. WAL modu sayesinde okuyucular yazıcıları beklemez.
+    """
+
+    def __init__(self, path: str, busy_timeout_ms: int = 2000):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        self._schema_statements: list[str] = []
+
+    def register_schema(self, *statements: str) -> None:
+        """Bağlantı ilk açıldığında çalıştırılacak 'CREATE TABLE IF NOT EXISTS' ifadeleri."""
+        self._schema_statements.extend(statements)
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # isolation_level=None -> transaction'ları (BEGIN IMMEDIATE) kendimiz yönetiyoruz
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={self.busy_timeout_ms}")
+            for statement in self._schema_statements:
+                conn.execute(statement)
+            self._local.conn = conn
+        return conn
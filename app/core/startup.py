@@ -0,0 +1,103 @@
+# app/core/startup.py
+"""
+Worker açılışı (lifespan): isteğe bağlı ön ısıtma (prewarm) ve açılış süresinin ölçümü.
+
+Ağır işler (Supabase Auth istemcisi, Gemini modeli, ayrıştırma/OCR kütüphaneleri,
+bağlantı havuzu) modül yüklenirken değil ilk kullanımda yapılır. PREWARM_ON_STARTUP
+açıksa bu işler worker istek kabul etmeden ÖNCE, birbirine paralel olarak yapılır;
+böylece ilk kullanıcı isteği soğuk başlangıç maliyetini ödemez.
+"""
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import get_settings
+from app.core.http_client import get_http_client
+from app.core.metrics import WORKER_COLD_START
+from app.core.supabase_client import get_supabase_client
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StartupReport:
+    pid: int = field(default_factory=os.getpid)
+    import_ms: float = 0.0
+    startup_ms: float = 0.0
+    steps: dict[str, float] = field(default_factory=dict)  # Ön ısıtma adımı -> milisaniye
+    errors: dict[str, str] = field(default_factory=dict)
+
+
+startup_report = StartupReport()
+
+
+async def _warm_http_pool() -> None:
+    """Supabase'e ilk bağlantıyı (TCP + TLS + HTTP/2) açar; yanıtın kendisi önemsizdir."""
+    await get_http_client().get(
+        f"{settings.SUPABASE_URL.rstrip('/')}/auth/v1/health",
+        headers={"apikey": settings.SUPABASE_SERVICE_KEY},
+    )
+
+
+def _load_supabase_auth() -> None:
+    get_supabase_client()
+    import gotrue.errors  # noqa: F401  (auth_router ilk istekte bunu import eder)
+
+
+def _load_llm_model() -> None:
+    from app.services.ai_service import get_model
+    get_model()
+
+
+def _load_parsers() -> None:
+    from app.services.parser_service import preload_parsers
+    preload_parsers()
+
+
+async def _timed_step(name: str, step) -> None:
+    started = time.perf_counter()
+    try:
+        if asyncio.iscoroutinefunction(step):
+            await step()
+        else:
+            await run_in_threadpool(step)
+    except Exception as e:
+        # Ön ısıtma hatası worker'ı durdurmaz; ilgili iş ilk kullanımda tekrar denenir
+        startup_report.errors[name] = str(e)
+        logger.warning("Ön ısıtma adımı '%s' başarısız oldu: %s", name, e)
+    finally:
+        startup_report.steps[name] = round((time.perf_counter() - started) * 1000, 2)
+
+
+async def prewarm() -> None:
+    await asyncio.gather(
+        _timed_step("http_pool", _warm_http_pool),
+        _timed_step("supabase_auth_client", _load_supabase_auth),
+        _timed_step("llm_model", _load_llm_model),
+        _timed_step("parsers", _load_parsers),
+    )
+
+
+async def run_startup(import_seconds: float) -> StartupReport:
+    """Lifespan başında çağrılır; ön ısıtmayı yapar ve açılış sürelerini raporlar."""
+    started = time.perf_counter()
+    if settings.PREWARM_ON_STARTUP:
+        await prewarm()
+    startup_seconds = time.perf_counter() - started
+
+    startup_report.import_ms = round(import_seconds * 1000, 2)
+    startup_report.startup_ms = round(startup_seconds * 1000, 2)
+    WORKER_COLD_START.labels("import").set(import_seconds)
+    WORKER_COLD_START.labels("startup").set(startup_seconds)
+    logger.info(
+        "Worker hazır: import %s ms, açılış %s ms.",
+        startup_report.import_ms,
+        startup_report.startup_ms,
+        extra={"pid": startup_report.pid, "steps": startup_report.steps},
+    )
+    return startup_report
@@ -0,0 +1,334 @@
+# app/core/supabase_async.py
+"""
+Supabase PostgREST (/rest/v1) ve Storage (/storage/v1) için ince, asenkron istemciler.
+
+supabase-py'nin senkron '.execute()' çağrıları 'async def' endpoint'lerin içinde
+olay döngüsünü (event loop) bloklar. Bu modüldeki istemciler paylaşılan
+httpx.AsyncClient havuzunu kullanır; böylece bir worker aynı anda birçok isteğin
+I/O'sunu bekleyebilir.
+"""
+import time
+from typing import Any, Iterable, Iterator, Optional, Sequence
+from urllib.parse import quote
+
+import httpx
+
+from app.core.config import get_settings
+from app.core.http_client import get_http_client
+from app.core.metrics import SUPABASE_REQUEST_DURATION, record_stage
+
+settings = get_settings()
+
+# (sütun, operatör, değer) -> PostgREST sorgu parametresi: sütun=operatör.değer
+# Örnek: ("user_id", "eq", "...") , ("expires_at", "lt", "2025-01-01T00:00:00+00:00")
+# Mantıksal gruplar: ("or", "", "(a.lt.1,and(a.eq.1,b.lt.2))") -> or=(a.lt.1,and(a.eq.1,b.lt.2))
+Filter = tuple[str, str, Any]
+_LOGICAL_OPERATORS = ("or", "and")
+# 'in' filtresi başına en fazla değer: değerler URL'e yazılır; uzun listeler gateway'in URL
+# sınırını (414/400) aşar. Daha uzun listeler 'in_chunks' ile birden fazla sorguya bölünür.
+MAX_IN_VALUES = 100
+
+# HTTP metodu -> metriklerde kullanılan PostgREST işlem adı
+_POSTGREST_OPERATIONS = {"GET": "select", "POST": "insert", "PATCH": "update", "DELETE": "delete"}
+
+
+class PostgrestError(Exception):
+    """PostgREST 4xx/5xx yanıtı. 'code' Postgres hata kodudur (örn: 23505 = unique ihlali)."""
+
+    def __init__(self, status_code: int, code: Optional[str], message: str, details: Any = None):
+        super().__init__(f"[{status_code}/{code}] {message}")
+        self.status_code = status_code
+        self.code = code
+        self.message = message
+        self.details = details
+
+    @property
+    def is_unique_violation(self) -> bool:
+        return self.code == "23505"
+
+
+class StorageError(Exception):
+    """Supabase Storage 4xx/5xx yanıtı."""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"[{status_code}] {message}")
+        self.status_code = status_code
+        self.message = message
+
+
+def _auth_headers() -> dict[str, str]:
+    return {
+        "apikey": settings.SUPABASE_SERVICE_KEY,
+        "Authorization": f"Bearer {settings.SUPABASE_SERVICE_KEY}",
+    }
+
+
+def _format_value(value: Any) -> str:
+    if isinstance(value, (list, tuple, set)):
+        # 'in' operatörü: in.(a,b,c)
+        return "(" + ",".join(f'"{v}"' for v in value) + ")"
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+async def _observed_request(
+    service: str, target: str, operation: str, method: str, url: str, **kwargs
+) -> httpx.Response:
+    """HTTP isteğini gönderir; süreyi (servis, tablo/bucket, işlem) etiketleriyle ölçer."""
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        response = await get_http_client().request(method, url, **kwargs)
+        outcome = "ok" if response.status_code < 400 else str(response.status_code)
+        return response
+    finally:
+        elapsed = time.perf_counter() - started
+        SUPABASE_REQUEST_DURATION.labels(service, target, operation, outcome).observe(elapsed)
+        record_stage("db" if service == "postgrest" else "storage", elapsed)
+
+
+def in_chunks(values: Sequence[Any], size: int = MAX_IN_VALUES) -> Iterator[Sequence[Any]]:
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _filter_params(filters: Iterable[Filter]) -> list[tuple[str, str]]:
+    return [
+        (column, value if column in _LOGICAL_OPERATORS else f"{op}.{_format_value(value)}")
+        for column, op, value in filters
+    ]
+
+
+class PostgrestClient:
+    """PostgREST tablolarına asenkron CRUD erişimi."""
+
+    def __init__(self, base_url: str):
+        self.base_url = f"{base_url.rstrip('/')}/rest/v1"
+
+    async def _request(
+        self,
+        method: str,
+        table: str,
+        *,
+        params: Optional[list[tuple[str, str]]] = None,
+        json: Any = None,
+        prefer: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> list[dict]:
+        headers = _auth_headers()
+        if prefer:
+            headers["Prefer"] = prefer
+        response = await _observed_request(
+            "postgrest",
+            table,
+            _POSTGREST_OPERATIONS.get(method, method.lower()),
+            method,
+            f"{self.base_url}/{table}",
+            params=params,
+            json=json,
+            headers=headers,
+            timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT,
+        )
+        if response.status_code >= 400:
+            try:
+                body = response.json()
+            except ValueError:
+                body = {"message": response.text}
+            raise PostgrestError(
+                response.status_code,
+                body.get("code"),
+                body.get("message") or response.reason_phrase,
+                body.get("details"),
+            )
+        if not response.content:
+            return []
+        return response.json()
+
+    async def select(
+        self,
+        table: str,
+        columns: str,
+        filters: Sequence[Filter] = (),
+        *,
+        order: Optional[str] = None,
+        limit: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> list[dict]:
+        """'order' PostgREST sözdizimindedir: 'created_at.desc,id.desc'."""
+        # supabase-py gibi boşlukları temizle: "id, file_name" -> "id,file_name"
+        params = [("select", "".join(columns.split()))] + _filter_params(filters)
+        if order:
+            params.append(("order", order))
+        if limit is not None:
+            params.append(("limit", str(limit)))
+        return await self._request("GET", table, params=params, timeout=timeout)
+
+    async def select_one(
+        self,
+        table: str,
+        columns: str,
+        filters: Sequence[Filter] = (),
+        *,
+        timeout: Optional[float] = None,
+    ) -> Optional[dict]:
+        """supabase-py '.maybe_single()' karşılığı: 0 veya 1 satır."""
+        rows = await self.select(table, columns, filters, limit=1, timeout=timeout)
+        return rows[0] if rows else None
+
+    async def insert(
+        self,
+        table: str,
+        rows: dict | list[dict],
+        *,
+        returning: bool = True,
+        timeout: Optional[float] = None,
+    ) -> list[dict]:
+        """Tek satır (dict) veya toplu (list) ekleme. Toplu ekleme tek HTTP isteğidir."""
+        prefer = "return=representation" if returning else "return=minimal"
+        return await self._request("POST", table, json=rows, prefer=prefer, timeout=timeout)
+
+    async def update(
+        self,
+        table: str,
+        values: dict,
+        filters: Sequence[Filter],
+        *,
+        returning: bool = False,
+        timeout: Optional[float] = None,
+    ) -> list[dict]:
+        prefer = "return=representation" if returning else "return=minimal"
+        return await self._request(
+            "PATCH", table, params=_filter_params(filters), json=values, prefer=prefer, timeout=timeout
+        )
+
+    async def delete(
+        self,
+        table: str,
+        filters: Sequence[Filter],
+        *,
+        returning: bool = False,
+        timeout: Optional[float] = None,
+    ) -> list[dict]:
+        if not filters:
+            # Filtresiz DELETE tüm tabloyu siler; buna asla izin verme
+            raise ValueError("Filtresiz silme işlemine izin verilmez.")
+        prefer = "return=representation" if returning else "return=minimal"
+        return await self._request(
+            "DELETE", table, params=_filter_params(filters), prefer=prefer, timeout=timeout
+        )
+
+
+class StorageClient:
+    """Supabase Storage nesne işlemleri (yükleme, silme, imzalı URL, listeleme)."""
+
+    def __init__(self, base_url: str):
+        self.base_url = f"{base_url.rstrip('/')}/storage/v1"
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        *,
+        bucket: str,
+        operation: str,
+        timeout: Optional[float] = None,
+        **kwargs,
+    ) -> httpx.Response:
+        headers = {**_auth_headers(), **kwargs.pop("headers", {})}
+        response = await _observed_request(
+            "storage",
+            bucket,
+            operation,
+            method,
+            f"{self.base_url}{path}",
+            headers=headers,
+            timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT,
+            **kwargs,
+        )
+        if response.status_code >= 400:
+            try:
+                message = response.json().get("message") or response.text
+            except ValueError:
+                message = response.text
+            raise StorageError(response.status_code, message)
+        return response
+
+    async def upload(
+        self,
+        bucket: str,
+        path: str,
+        content: bytes,
+        content_type: Optional[str],
+        *,
+        upsert: bool = False,
+        timeout: Optional[float] = None,
+    ) -> None:
+        await self._request(
+            "POST",
+            f"/object/{bucket}/{quote(path)}",
+            bucket=bucket,
+            operation="upload",
+            content=content,
+            headers={
+                "Content-Type": content_type or "application/octet-stream",
+                "x-upsert": "true" if upsert else "false",
+            },
+            timeout=timeout if timeout is not None else settings.STORAGE_UPLOAD_TIMEOUT_SECONDS,
+        )
+
+    async def remove(self, bucket: str, paths: list[str], *, timeout: Optional[float] = None) -> list[dict]:
+        """Birden fazla nesneyi tek istekte siler."""
+        response = await self._request(
+            "DELETE", f"/object/{bucket}", bucket=bucket, operation="remove",
+            json={"prefixes": paths}, timeout=timeout,
+        )
+        return response.json() if response.content else []
+
+    async def create_signed_url(
+        self, bucket: str, path: str, expires_in: int, *, timeout: Optional[float] = None
+    ) -> str:
+        """Mutlak (tam) imzalı indirme URL'sini döndürür."""
+        response = await self._request(
+            "POST",
+            f"/object/sign/{bucket}/{quote(path)}",
+            bucket=bucket,
+            operation="sign",
+            json={"expiresIn": expires_in},
+            timeout=timeout,
+        )
+        signed_path = response.json().get("signedURL")
+        if not signed_path:
+            raise StorageError(response.status_code, "Yanıtta 'signedURL' alanı yok.")
+        return f"{self.base_url}{signed_path}"
+
+    async def list(
+        self,
+        bucket: str,
+        prefix: str = "",
+        *,
+        limit: int = 100,
+        offset: int = 0,
+        timeout: Optional[float] = None,
+    ) -> list[dict]:
+        """Bir 'klasör' (prefix) altındaki nesneleri sayfa sayfa listeler."""
+        response = await self._request(
+            "POST",
+            f"/object/list/{bucket}",
+            bucket=bucket,
+            operation="list",
+            json={
+                "prefix": prefix,
+                "limit": limit,
+                "offset": offset,
+                "sortBy": {"column": "name", "order": "asc"},
+            },
+            timeout=timeout,
+        )
+        return response.json()
+
+
+postgrest = PostgrestClient(settings.SUPABASE_URL)
+storage = StorageClient(settings.SUPABASE_URL)
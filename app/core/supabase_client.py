@@ -1,22 +1,26 @@
-from supabase import create_client, Client
+import threading
+from typing import TYPE_CHECKING, Optional
+
 from app.core.config import get_settings
 
+if TYPE_CHECKING:
+    from supabase import Client
+
 # Ayarları yükle
 settings = get_settings()
 
-# .env dosyasındaki değişkenleri al
-url: str = settings.SUPABASE_URL
-key: str = settings.SUPABASE_SERVICE_KEY
+# İstemci modül yüklenirken değil, ilk kullanımda (veya lifespan ön ısıtmasında) oluşturulur.
+# Yalnızca Supabase Auth işlemleri (kayıt, giriş, iptal kontrolü) için kullanılır;
+# tablo ve Storage erişimi app/core/supabase_async.py üzerindendir.
+_supabase: Optional["Client"] = None
+_lock = threading.Lock()
 
-# Supabase istemcisini başlat
-try:
-    supabase: Client = create_client(url, key)
-    print("Supabase istemcisi başarıyla başlatıldı.")
-except Exception as e:
-    print(f"HATA: Supabase istemcisi başlatılamadı: {e}")
-    supabase: Client = None
 
-def get_supabase_client() -> Client:
-    if supabase is None:
-        raise Exception("Supabase istemcisi başlatılmamış. Lütfen sunucu loglarını kontrol edin.")
-    return supabase
\ No newline at end of file
+def get_supabase_client() -> "Client":
+    global _supabase
+    if _supabase is None:
+        with _lock:
+            if _supabase is None:
+                from supabase import create_client  # Ağır import: sadece ilk kullanımda
+                _supabase = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_KEY)
+    return _supabase
@@ -1,14 +1,75 @@
-from fastapi import FastAPI
+import time
+
+_IMPORT_STARTED = time.perf_counter()  # Worker açılış süresi ölçümü (bkz. app/core/startup.py)
+
+import asyncio
+from contextlib import asynccontextmanager, suppress
+from fastapi import Depends, FastAPI, Response
+from starlette.concurrency import run_in_threadpool
 from app.api.v1 import analysis_router
 from app.api.v1 import cv_router
 from app.api.v1 import auth_router
 from app.api.v1 import download_router
+from app.api.v1 import ops_router
 from fastapi.middleware.cors import CORSMiddleware
+from app.core.cache import invalidation_listener
+from app.core.config import get_settings
+from app.core.logger import RequestContextMiddleware, configure_logging, flush_logging
+from app.core.loop_monitor import LoopMonitorMiddleware, monitor as loop_monitor
+from app.core.http_client import close_http_client
+from app.core.compression import add_compression_middleware
+from app.core.responses import FastJSONResponse
+from app.core.metrics import MetricsMiddleware, render_metrics
+from app.core.security import require_admin
+from app.core.startup import run_startup
+from app.services import document_governor
+from app.services.janitor import janitor_loop
+
+settings = get_settings()
+configure_logging()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Ön ısıtma: bağlantı havuzu, Auth istemcisi, Gemini modeli, ayrıştırma/OCR kütüphaneleri
+    await run_startup(_IMPORT_SECONDS)
+
+    # Periyodik temizlik (süresi dolmuş linkler, sahipsiz Storage nesneleri)
+    janitor_task = None
+    if settings.JANITOR_INTERVAL_SECONDS > 0:
+        janitor_task = asyncio.create_task(janitor_loop())
+
+    # Olay döngüsü gecikmesi ve takılmalar (bkz. app/core/loop_monitor.py)
+    loop_monitor_task = None
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor_task = asyncio.create_task(loop_monitor.run())
+
+    # Diğer worker'ların önbellek silmelerini bu worker'ın L1'ine uygula (bkz. app/core/cache.py)
+    invalidation_task = asyncio.create_task(invalidation_listener())
+
+    yield
+
+    invalidation_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await invalidation_task
+    for task in (janitor_task, loop_monitor_task):
+        if task is not None:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+    # Kapanış: Supabase'e açık keep-alive bağlantılarını düzgünce kapat
+    await close_http_client()
+    # Ayrıştırma alt süreçleri (bkz. app/services/document_governor.py)
+    document_governor.shutdown()
+    # Kuyruktaki log kayıtlarını yaz
+    flush_logging()
+
 
 app = FastAPI(
     title="CVOptima API (Gemini Edition)",
     description="Yapay zeka destekli akıllı CV ve Ön Yazı asistanı.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Tüm frontend domain'lerini ekleyin
@@ -31,6 +92,10 @@ app.include_router(auth_router.router, prefix="/api/v1")
 app.include_router(analysis_router.router, prefix="/api/v1")
 app.include_router(cv_router.router, prefix="/api/v1") 
 app.include_router(download_router.router, prefix="/dl")
+app.include_router(ops_router.router, prefix="/api/v1")
+
+# Büyük yanıtlar (CV metni, ön yazı, analiz sonucu) sıkıştırılarak gönderilir
+add_compression_middleware(app)
 
 app.add_middleware(
     CORSMiddleware,
@@ -40,6 +105,22 @@ app.add_middleware(
     allow_headers=["*"], 
 )
 
-@app.get("/", tags=["Root"], include_in_schema=False)
+# İstek süresini (CORS/sıkıştırma dahil) ölçer ve 'Server-Timing' başlığını ekler
+app.add_middleware(MetricsMiddleware)
+# Takılma raporlarında isteğin route'u ve kimliği (istek kimliğinin içinde olmalı)
+app.add_middleware(LoopMonitorMiddleware)
+# En dışta: istek kimliği (loglar, profil ve 'X-Request-ID' yanıt başlığı)
+app.add_middleware(RequestContextMiddleware)
+
+@app.get("/", tags=["Root"], include_in_schema=False, response_class=FastJSONResponse)
 async def read_root():
-    return {"message": "CVOptima API'ye hoş geldiniz."}
\ No newline at end of file
+    return {"message": "CVOptima API'ye hoş geldiniz."}
+
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(require_admin)])
+async def metrics():
+    """Prometheus metrikleri ('X-Admin-Token' başlığı gerekir)."""
+    body, content_type = await run_in_threadpool(render_metrics)
+    return Response(content=body, media_type=content_type)
+
+
+_IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED
@@ -0,0 +1,63 @@
+# app/repositories/analysis_repository.py
+from typing import Optional
+
+from app.core.supabase_async import Filter, postgrest
+
+TABLE = "analysis_jobs"
+
+
+async def insert_job(row: dict) -> dict:
+    rows = await postgrest.insert(TABLE, row)
+    if not rows:
+        raise Exception("Veritabanına 'job' kaydı başarısız oldu, veri dönmedi.")
+    return rows[0]
+
+
+async def update_job(task_id: str, user_id: str, values: dict) -> None:
+    await postgrest.update(TABLE, values, [("id", "eq", task_id), ("user_id", "eq", user_id)])
+
+
+async def list_jobs(user_id: str) -> list[dict]:
+    """İlişkili CV'nin adını da (PostgREST embed / JOIN) getirir."""
+    return await postgrest.select(
+        TABLE,
+        "id, job_description_text, status, created_at, user_cvs(file_name)",
+        [("user_id", "eq", user_id)],
+        order="created_at.desc",
+    )
+
+
+async def get_job(task_id: str, user_id: str, columns: str = "status, result") -> Optional[dict]:
+    return await postgrest.select_one(
+        TABLE, columns, [("id", "eq", task_id), ("user_id", "eq", user_id)]
+    )
+
+
+async def list_completed_jobs_for_cv(cv_id: str, user_id: str, limit: int = 5) -> list[dict]:
+    """Bir CV'nin en yeni tamamlanmış analizleri (revizyonlarda sonucu yeniden kullanmak için)."""
+    return await postgrest.select(
+        TABLE,
+        "id, job_description_text, result",
+        [("cv_id", "eq", cv_id), ("user_id", "eq", user_id), ("status", "eq", "completed")],
+        order="created_at.desc",
+        limit=limit,
+    )
+
+
+async def list_jobs_page(
+    columns: str, filters: list[Filter], after: Optional[tuple[str, str]], limit: int
+) -> list[dict]:
+    """
+    Keyset sayfalama: (created_at, id) azalan sırada, 'after' = önceki sayfanın son satırının
+    (created_at, id) değeri. OFFSET kullanılmadığı için her sayfa aynı maliyettedir.
+    """
+    if after is not None:
+        created_at, job_id = after
+        filters = filters + [(
+            "or", "", f'(created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{job_id}))'
+        )]
+    return await postgrest.select(TABLE, columns, filters, order="created_at.desc,id.desc", limit=limit)
+
+
+async def delete_job(task_id: str, user_id: str) -> None:
+    await postgrest.delete(TABLE, [("id", "eq", task_id), ("user_id", "eq", user_id)])
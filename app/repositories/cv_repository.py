@@ -0,0 +1,65 @@
+# app/repositories/cv_repository.py
+from typing import Optional
+
+from app.core.supabase_async import in_chunks, postgrest
+
+TABLE = "user_cvs"
+
+
+async def list_cvs(user_id: str) -> list[dict]:
+    """Kullanıcının CV'lerini (metin içeriği HARİÇ) en yeniden eskiye döndürür."""
+    return await postgrest.select(
+        TABLE,
+        "id, file_name, created_at, parent_cv_id",
+        [("user_id", "eq", user_id)],
+        order="created_at.desc",
+    )
+
+
+async def get_cv(cv_id: str, user_id: str, columns: str) -> Optional[dict]:
+    """Sahiplik kontrolü ile tek bir CV satırını döndürür (yoksa None)."""
+    return await postgrest.select_one(
+        TABLE,
+        columns,
+        [("id", "eq", cv_id), ("user_id", "eq", user_id)],
+    )
+
+
+async def get_cv_texts(user_id: str, cv_ids: list[str]) -> list[dict]:
+    """Verilen CV'lerin metin içeriklerini tek sorguda döndürür (sahiplik kontrolü ile)."""
+    if not cv_ids:
+        return []
+    return await postgrest.select(
+        TABLE,
+        "id, file_name, cv_text_content",
+        [("id", "in", cv_ids), ("user_id", "eq", user_id)],
+    )
+
+
+async def insert_cv(row: dict) -> dict:
+    rows = await postgrest.insert(TABLE, row)
+    if not rows:
+        raise Exception("Veritabanına kayıt başarısız oldu, veri dönmedi.")
+    return rows[0]
+
+
+async def insert_cvs(rows: list[dict]) -> list[dict]:
+    """Toplu ekleme: tüm satırlar TEK bir PostgREST isteğiyle (tek transaction) eklenir."""
+    if not rows:
+        return []
+    return await postgrest.insert(TABLE, rows)
+
+
+async def delete_cv(cv_id: str, user_id: str) -> None:
+    await postgrest.delete(TABLE, [("id", "eq", cv_id), ("user_id", "eq", user_id)])
+
+
+async def get_referenced_file_paths(paths: list[str]) -> set[str]:
+    """Verilen Storage yollarından hangilerinin bir 'user_cvs' satırınca kullanıldığını döndürür."""
+    if not paths:
+        return set()
+    referenced: set[str] = set()
+    for chunk in in_chunks(paths):
+        rows = await postgrest.select(TABLE, "file_path", [("file_path", "in", chunk)])
+        referenced.update(row["file_path"] for row in rows)
+    return referenced
@@ -0,0 +1,29 @@
+# app/repositories/link_repository.py
+from typing import Optional
+
+from app.core.supabase_async import in_chunks, postgrest
+
+TABLE = "shortened_urls"
+
+
+async def insert_link(row: dict) -> None:
+    """'short_code' çakışırsa PostgrestError (23505) fırlatır."""
+    await postgrest.insert(TABLE, row, returning=False)
+
+
+async def get_link(short_code: str) -> Optional[dict]:
+    return await postgrest.select_one(
+        TABLE, "original_signed_url, expires_at", [("short_code", "eq", short_code)]
+    )
+
+
+async def list_expired_link_ids(before_iso: str, limit: int) -> list:
+    rows = await postgrest.select(
+        TABLE, "id", [("expires_at", "lt", before_iso)], order="expires_at.asc", limit=limit
+    )
+    return [row["id"] for row in rows]
+
+
+async def delete_links(ids: list) -> None:
+    for chunk in in_chunks(ids):
+        await postgrest.delete(TABLE, [("id", "in", chunk)])
@@ -0,0 +1,23 @@
+# app/repositories/storage_repository.py
+from typing import Optional
+
+from app.core.supabase_async import storage
+
+BUCKET = "user_uploads"
+
+
+async def upload_file(path: str, content: bytes, content_type: Optional[str]) -> None:
+    await storage.upload(BUCKET, path, content, content_type)
+
+
+async def remove_files(paths: list[str]) -> None:
+    await storage.remove(BUCKET, paths)
+
+
+async def create_signed_url(path: str, expires_in: int) -> str:
+    return await storage.create_signed_url(BUCKET, path, expires_in)
+
+
+async def list_objects(prefix: str, limit: int, offset: int) -> list[dict]:
+    """Bir klasördeki girdiler. Alt klasörler 'id' alanı None olan girdiler olarak döner."""
+    return await storage.list(BUCKET, prefix, limit=limit, offset=offset)
@@ -27,6 +27,17 @@ class FullAnalysisResponse(BaseModel):
     suggestions: List[Suggestion] = Field(..., description="CV'yi iyileştirmek için 3-5 adet spesifik öneri")
     cover_letter_draft: str = Field(..., description="İlana ve CV'ye özel oluşturulmuş ön yazı taslağı")
 
+class RevisionAnalysisResponse(BaseModel):
+    """Revize CV için kısmi analiz: sadece değişen bölümlerden etkilenen alanlar yeniden üretilir."""
+    cv_keywords: KeywordAnalysis = Field(..., description="Güncel CV'nin anahtar kelimeleri")
+    gap_analysis: GapAnalysisResult = Field(..., description="İlan ile güncel CV arasındaki eksik ve eşleşen beceriler")
+    suggestions: List[Suggestion] = Field(..., description="Sadece değişen bölümlere dair yeni öneriler")
+
+# 'analysis_jobs.result' içine yazılan sonucun şema sürümü. FullAnalysisResponse'ta
+# uyumsuz bir değişiklik yapıldığında artırılmalıdır; aynı sürümle etiketlenmiş kayıtlar
+# yazılırken zaten doğrulandığı için okunurken tekrar doğrulanmaz.
+ANALYSIS_RESULT_SCHEMA_VERSION = 1
+
 # --- API İstek ve Yanıt Modelleri ---
 
 class AnalysisRequest(BaseModel):
@@ -49,6 +60,7 @@ class CVListItem(BaseModel):
     id: uuid.UUID
     file_name: str
     created_at: datetime # Yüklenme zamanını döndüreceğiz
+    parent_cv_id: uuid.UUID | None = None # Revizyonsa önceki sürümün ID'si
 
     # Pydantic'in veritabanı nesnelerini bu modele dönüştürmesini sağlar
     class Config:
@@ -58,6 +70,33 @@ class CVListResponse(BaseModel):
     """Kullanıcının CV listesini içeren yanıt modeli."""
     cvs: List[CVListItem]
 
+class CVContact(BaseModel):
+    name: str | None = None
+    emails: List[str] = []
+    phones: List[str] = []
+    links: List[str] = []
+
+class CVSectionEntry(BaseModel):
+    """Deneyim / eğitim / proje bölümündeki tek bir girdi."""
+    header: str # Şirket / okul ve tarih satırı
+    start: str | None = None # Metindeki haliyle başlangıç ("Mart 2021", "09/2018")
+    end: str | None = None # Bitiş ("2023", "Günümüz")
+    text: str
+
+class CVSection(BaseModel):
+    key: str
+    type: str = Field(..., description="contact, summary, experience, education, skills, languages, certifications, projects, other")
+    title: str
+    text: str
+    entries: Optional[List[CVSectionEntry]] = None # experience / education / projects
+    items: Optional[List[str]] = None # skills / languages / certifications
+
+class CVSections(BaseModel):
+    """Yüklemede bir kez hesaplanan tipli bölümler ('user_cvs.cv_sections')."""
+    version: int
+    contact: CVContact
+    sections: List[CVSection]
+
 class CVDetailResponse(BaseModel):
     """Belirli bir CV'nin tüm detaylarını temsil eder."""
     id: uuid.UUID
@@ -65,6 +104,8 @@ class CVDetailResponse(BaseModel):
     created_at: datetime
     file_path: str | None # Storage yolu NULL olabilir mi? Hayır, yükleme başarılıysa olmamalı. 'str' yapalım.
     cv_text_content: str # Tam metin içeriği
+    parent_cv_id: uuid.UUID | None = None # Revizyonsa önceki sürümün ID'si
+    cv_sections: CVSections | None = None # Segmentasyondan önce yüklenmiş CV'lerde None
 
     class Config:
         from_attributes = True
@@ -92,4 +133,40 @@ class CVDownloadURLResponse(BaseModel):
 class CVDownloadURLResponse(BaseModel):
     """CV indirme için kısa kodu içeren yanıt modeli."""
     short_code: str 
-    expires_in: int
\ No newline at end of file
+    expires_in: int
+
+class CVRankRequest(BaseModel):
+    """Kullanıcının CV'lerini bir iş ilanına göre sıralama isteği."""
+    job_description_text: str = Field(..., min_length=1)
+    top_k: int = Field(5, ge=1, le=50, description="Döndürülecek en iyi CV sayısı")
+
+class CVRankTerm(BaseModel):
+    term: str = Field(..., description="İlandaki biçimiyle eşleşen terim")
+    weight: float = Field(..., description="Terimin puana katkısı (BM25)")
+
+class CVRankItem(BaseModel):
+    cv_id: uuid.UUID
+    file_name: str
+    score: float
+    matched_terms: List[CVRankTerm]
+
+class CVRankResponse(BaseModel):
+    """İlana en uygun CV'ler (puana göre azalan) ve puanı belirleyen terimler."""
+    results: List[CVRankItem]
+    total_cvs: int
+    scoring_ms: float
+
+class BulkCVItemResult(BaseModel):
+    """Toplu yüklemede tek bir dosyanın sonucu."""
+    file_name: str
+    status: str = Field(..., description="created veya failed")
+    cv_id: uuid.UUID | None = None
+    error: str | None = None
+
+class BulkCVUploadResponse(BaseModel):
+    """Toplu CV yükleme yanıtı. Büyük arşivlerde 'job_id' ile ilerleme sorgulanır."""
+    job_id: uuid.UUID | None = None
+    status: str = Field(..., description="processing, completed veya failed")
+    total: int
+    processed: int
+    results: List[BulkCVItemResult] = []
@@ -19,4 +19,11 @@ class UserResponse(BaseModel):
 class Token(BaseModel):
     """Giriş (login) başarılı olduğunda dönen Access Token modeli"""
     access_token: str
-    token_type: str = "bearer"
\ No newline at end of file
+    token_type: str = "bearer"
+
+class AuthenticatedUser(BaseModel):
+    """Doğrulanmış JWT'den (claims) üretilen, endpoint'lere enjekte edilen kullanıcı"""
+    id: uuid.UUID            # JWT 'sub'
+    email: str | None = None
+    role: str | None = None  # Supabase: 'authenticated' / 'service_role'
+    aud: str | None = None
@@ -1,16 +1,22 @@
 
-import google.generativeai as genai
+import importlib
+import logging
+import threading
+import time
 import json # <--- DÜZELTME İÇİN GEREKLİ IMPORT
 from fastapi import HTTPException, status
-from app.schemas.analysis_schema import FullAnalysisResponse # Pydantic modelimiz
+from pydantic import ValidationError
+from typing import TypeVar
+from pydantic import BaseModel
+from app.schemas.analysis_schema import FullAnalysisResponse, RevisionAnalysisResponse # Pydantic modellerimiz
 from app.core.config import get_settings
+from app.core.metrics import LLM_REQUEST_DURATION, LLM_TOKENS, record_stage
 
 # --- 1. Yapılandırma ---
-try:
-    settings = get_settings()
-    genai.configure(api_key=settings.GOOGLE_API_KEY)
-except Exception as e:
-    print(f"HATA: Google Gemini API yapılandırılamadı. .env dosyasını kontrol edin. Hata: {e}")
+# Not: 'google.generativeai' (grpc/protobuf) ağır bir import'tur; modül yüklenirken değil,
+# model ilk kez gerektiğinde (veya lifespan'deki ön ısıtmada) yüklenir. Bkz. 'get_model'.
+settings = get_settings()
+logger = logging.getLogger(__name__)
 
 
 def get_system_prompt_for_json_schema() -> str:
@@ -48,74 +54,151 @@ Kesin Kurallar:
 """
     return SYSTEM_PROMPT
 
-# --- 2. Model Kurulumu (Modern Yöntem) ---
-try:
-    SYSTEM_INSTRUCTION = get_system_prompt_for_json_schema()
-    
-    GENERATION_CONFIG = {
-        "response_mime_type": "application/json",
-        "temperature": 0.1,
-    }
-    
-    model = genai.GenerativeModel(
-        model_name='gemini-2.5-flash', # Kullandığınız model
-        system_instruction=SYSTEM_INSTRUCTION,
+
+def get_revision_system_prompt() -> str:
+    """
+    Revize edilmiş bir CV için KISMİ analiz talimatı: önceki analiz ve sadece değişen
+    bölümler verilir; iş ilanı ve CV'nin tamamı tekrar gönderilmez.
+    """
+    schema_string = json.dumps(RevisionAnalysisResponse.model_json_schema(), indent=2, ensure_ascii=False)
+    return f"""
+Sen üst düzey bir İK direktörü ve stratejik konumlandırma uzmanısın. Aday, daha önce analiz ettiğin CV'sini revize etti. Sana iş ilanından çıkarılmış yetkinlikler, önceki CV analizinin anahtar kelimeleri ve CV'nin SADECE değişen bölümleri (eski ve yeni halleriyle) verilecek. Görevin, analizi bu değişikliklere göre güncellemektir. Nihai çıktı yalnızca aşağıdaki JSON şemasına tam uyumlu geçerli bir JSON olmalıdır.
+
+--- ZORUNLU JSON ŞEMASI ---
+{schema_string}
+--- ŞEMA SONU ---
+
+Kurallar:
+1. cv_keywords: Önceki anahtar kelimelerden, eski bölümlerden çıkarılıp yeni bölümlerde artık kanıtı olmayanları çıkar; yeni bölümlerdeki kanıtları ekle. Değişmeyen bölümlerden gelen anahtar kelimeleri koru.
+2. gap_analysis: İlan yetkinlikleri ile güncel cv_keywords arasındaki kesişim (matching_skills) ve eksikler (missing_skills), stratejik önem sırasına göre.
+3. suggestions: SADECE değişen bölümlere dair, istenen sayıda yeni öneri üret; korunan önerileri tekrar etme.
+4. JSON dışında tek karakter bile eklenmez. Ton: üst düzey kurumsal, net, ölçülü.
+"""
+
+# --- 2. Model Kurulumu (Tembel / lazy) ---
+MODEL_NAME = 'gemini-2.5-flash' # Kullandığınız model
+
+GENERATION_CONFIG = {
+    "response_mime_type": "application/json",
+    "temperature": 0.1,
+}
+
+_model = None
+_revision_model = None  # Aynı model, kısmi (revizyon) analiz sistem talimatıyla
+_model_lock = threading.Lock()
+
+
+def _build_model(system_instruction: str):
+    # AI_MODEL_FACTORY="paket.modül:fonksiyon" ise model bu fabrikadan üretilir (yük testi)
+    if settings.AI_MODEL_FACTORY:
+        factory_module, _, factory_name = settings.AI_MODEL_FACTORY.partition(":")
+        logger.warning("Gemini yerine '%s' modeli kullanılıyor.", settings.AI_MODEL_FACTORY)
+        return getattr(importlib.import_module(factory_module), factory_name)()
+
+    import google.generativeai as genai
+
+    genai.configure(api_key=settings.GOOGLE_API_KEY)
+    return genai.GenerativeModel(
+        model_name=MODEL_NAME,
+        system_instruction=system_instruction,
         generation_config=GENERATION_CONFIG
     )
-except Exception as e:
-    print(f"HATA: Gemini modeli yüklenemedi. Model adı veya yapılandırma hatalı olabilir. Hata: {e}")
-    model = None
 
-# --- 3. Servis Fonksiyonu (Senkron) ---
-def run_full_analysis(cv_text: str, job_description_text: str) -> FullAnalysisResponse:
+
+def get_model():
+    """Modeli ilk çağrıda (worker başına bir kez) oluşturur; hata olursa her çağrıda yeniden dener."""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                _model = _build_model(get_system_prompt_for_json_schema())
+    return _model
+
+
+def get_revision_model():
+    """Kısmi (revizyon) analiz modeli; 'get_model' ile aynı şekilde tembel oluşturulur."""
+    global _revision_model
+    if _revision_model is None:
+        with _model_lock:
+            if _revision_model is None:
+                _revision_model = _build_model(get_revision_system_prompt())
+    return _revision_model
+
+
+def use_model(custom_model) -> None:
     """
-    Verilen CV ve İş Tanımı metinleri için tam AI analizini Gemini ile SENKRON olarak çalıştırır.
+    Gemini modelini aynı arayüze ('generate_content(prompt)' -> '.text', '.usage_metadata')
+    sahip başka bir nesneyle değiştirir. Yük testi / yerel geliştirme içindir (bkz. loadtest/).
     """
-    
-    if model is None:
+    global _model, _revision_model
+    _model = _revision_model = custom_model
+
+
+def _record_token_usage(response) -> None:
+    """Gemini'nin raporladığı token sayılarını metriklere yazar (alan yoksa sessizce geçer)."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return
+    for kind, attribute in (("prompt", "prompt_token_count"), ("completion", "candidates_token_count")):
+        count = getattr(usage, attribute, None)
+        if count:
+            LLM_TOKENS.labels(MODEL_NAME, kind).inc(count)
+
+# --- 3. Servis Fonksiyonları (Senkron) ---
+ResponseT = TypeVar("ResponseT", bound=BaseModel)
+
+
+def _load(model_getter):
+    try:
+        return model_getter()
+    except Exception as e:
+        logger.exception("Gemini modeli yüklenemedi. Model adı veya yapılandırma hatalı olabilir.")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="AI modeli yüklenemedi. Lütfen sunucu loglarını kontrol edin."
         )
 
-    try:
-        user_prompt = f"""
-İşte analiz etmen gereken dokümanlar:
-
---- İŞ TANIMI (Job Description) ---
-{job_description_text}
---- İŞ TANIMI BİTTİ ---
 
---- CV (Özgeçmiş) ---
-{cv_text}
---- CV BİTTİ ---
+def _generate(model, user_prompt: str, response_model: type[ResponseT]) -> ResponseT:
+    """İsteği gönderir, süre / token metriklerini yazar ve yanıtı şemaya göre doğrular."""
+    try:
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            response = model.generate_content(user_prompt)
+            outcome = "ok"
+        finally:
+            elapsed = time.perf_counter() - started
+            LLM_REQUEST_DURATION.labels(MODEL_NAME, outcome).observe(elapsed)
+            record_stage("llm", elapsed)
+        _record_token_usage(response)
+        # Ham yanıt CV içeriği taşır: sadece boyutu loglanır
+        logger.debug(
+            "Gemini yanıtı alındı.",
+            extra={"schema": response_model.__name__, "elapsed_ms": round(elapsed * 1000), "response_chars": len(response.text)},
+        )
 
-Lütfen analizini sadece sağlanan JSON şemasına uygun olarak yap.
-"""
-        
-        print("Gemini API'ye (senkron) istek gönderiliyor...")
-        response = model.generate_content(user_prompt)
-        print("Gemini API'den yanıt alındı.")
-
-        # --- YENİ AJAN LOG 3 (HAM YANIT) ---
-        print("--- DEBUG: GEMINI'DEN GELEN HAM YANIT ---")
-        print(response.text)
-        print("---------------------------------------")
-        # --- BİTTİ ---
-        
-        response_json = json.loads(response.text)
-        validated_response = FullAnalysisResponse.model_validate(response_json)
-        
-        return validated_response
+        # Ham JSON metni tek adımda (ara dict oluşturmadan) modele çevrilir ve doğrulanır
+        return response_model.model_validate_json(response.text)
 
-    except json.JSONDecodeError:
-        print(f"HATA: Gemini API geçerli bir JSON dönmedi. Dönen metin: {response.text}")
+    except ValidationError as e:
+        if any(error["type"] == "json_invalid" for error in e.errors()):
+            logger.error("Gemini API geçerli bir JSON dönmedi.", extra={"response_chars": len(response.text)})
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Yapay zeka geçerli bir formatta yanıt vermedi. Lütfen tekrar deneyin."
+            )
+        # Hata metni yanıttan alıntı içerir: sadece hata türleri ve konumları loglanır
+        logger.error(
+            "Gemini yanıtı şemaya uymuyor.",
+            extra={"errors": [f"{'.'.join(map(str, error['loc']))}: {error['type']}" for error in e.errors()[:10]]},
+        )
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Yapay zeka geçerli bir formatta yanıt vermedi. Lütfen tekrar deneyin."
+            detail="Yapay zeka yanıtı beklenen şemaya uymuyor. Lütfen tekrar deneyin."
         )
     except Exception as e:
-        print(f"AI Servis Hatası (Gemini): {e}") 
+        logger.exception("AI servis hatası (Gemini).")
         
         if 'safety' in str(e).lower():
             raise HTTPException(
@@ -126,4 +209,58 @@ Lütfen analizini sadece sağlanan JSON şemasına uygun olarak yap.
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Yapay zeka analizi sırasında bir hata oluştu: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+def run_full_analysis(cv_text: str, job_description_text: str) -> FullAnalysisResponse:
+    """
+    Verilen CV ve İş Tanımı metinleri için tam AI analizini Gemini ile SENKRON olarak çalıştırır.
+    """
+    model = _load(get_model)
+    user_prompt = f"""
+İşte analiz etmen gereken dokümanlar:
+
+--- İŞ TANIMI (Job Description) ---
+{job_description_text}
+--- İŞ TANIMI BİTTİ ---
+
+--- CV (Özgeçmiş) ---
+{cv_text}
+--- CV BİTTİ ---
+
+Lütfen analizini sadece sağlanan JSON şemasına uygun olarak yap.
+"""
+    return _generate(model, user_prompt, FullAnalysisResponse)
+
+
+def run_revision_analysis(
+    previous: FullAnalysisResponse,
+    changed_sections: list[tuple[str, str, str]],
+    kept_suggestion_titles: list[str],
+    new_suggestion_count: int,
+) -> RevisionAnalysisResponse:
+    """
+    Revize CV için KISMİ analiz (SENKRON): sadece cv_keywords, gap_analysis ve değişen
+    bölümlere dair öneriler üretilir. 'changed_sections': (başlık, eski metin, yeni metin);
+    eklenen bölümde eski, silinen bölümde yeni metin boştur.
+    """
+    model = _load(get_revision_model)
+    sections = "\n\n".join(
+        f"### {title}\n--- ESKİ ---\n{old or '(yok)'}\n--- YENİ ---\n{new or '(silindi)'}"
+        for title, old, new in changed_sections
+    )
+    user_prompt = f"""
+--- İLAN YETKİNLİKLERİ ---
+{previous.job_keywords.model_dump_json()}
+
+--- ÖNCEKİ CV ANAHTAR KELİMELERİ ---
+{previous.cv_keywords.model_dump_json()}
+
+--- DEĞİŞEN CV BÖLÜMLERİ ---
+{sections}
+--- DEĞİŞİKLİKLER BİTTİ ---
+
+Korunan öneriler (tekrar etme): {json.dumps(kept_suggestion_titles, ensure_ascii=False)}
+Üretilecek yeni öneri sayısı: {new_suggestion_count}
+"""
+    return _generate(model, user_prompt, RevisionAnalysisResponse)
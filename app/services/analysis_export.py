@@ -0,0 +1,204 @@
+# app/services/analysis_export.py
+"""
+Analizlerin toplu dışa aktarımı (NDJSON veya CSV akışı).
+
+Satırlar DB'den EXPORT_PAGE_SIZE'lık keyset sayfalarla okunur, düzleştirilir, kodlanır ve
+sayfa sayfa gönderilir: bellekte hiçbir zaman bir sayfadan fazlası tutulmaz, dışa aktarılan
+analiz sayısından bağımsızdır. Kodlama ve (istenmişse) gzip sıkıştırması threadpool'da yapılır.
+
+Her analiz tek satırdır; FullAnalysisResponse alanları sütunlara açılır. Listeler NDJSON'da
+dizi, CSV'de '; ' ile birleştirilmiş metindir.
+"""
+import csv
+import io
+import logging
+import zlib
+from datetime import datetime, timezone
+from typing import AsyncIterator, Optional
+
+import orjson
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import get_settings
+from app.core.supabase_async import Filter
+from app.repositories import analysis_repository
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+SELECT_COLUMNS = (
+    "id, user_id, cv_id, status, created_at, job_description_text, result, user_cvs(file_name, parent_cv_id)"
+)
+COLUMNS = [
+    "task_id",
+    "created_at",
+    "status",
+    "cv_id",
+    "cv_file_name",
+    "parent_cv_id",
+    "job_description",
+    "job_hard_skills",
+    "job_soft_skills",
+    "cv_hard_skills",
+    "cv_soft_skills",
+    "matching_skills",
+    "missing_skills",
+    "match_ratio",
+    "suggestion_count",
+    "suggestion_titles",
+    "cover_letter_draft",
+    "error",
+]
+FORMATS = {"ndjson": ("application/x-ndjson", "ndjson"), "csv": ("text/csv; charset=utf-8", "csv")}
+# Excel / Sheets bu karakterlerle başlayan hücreyi formül olarak çalıştırır
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def build_filters(
+    user_id: Optional[str],
+    status: Optional[str] = None,
+    cv_id: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+) -> list[Filter]:
+    """'user_id' None ise (sadece admin) tüm kullanıcıların analizleri. Tarihler: [from, to)."""
+    filters: list[Filter] = []
+    if user_id is not None:
+        filters.append(("user_id", "eq", user_id))
+    if status is not None:
+        filters.append(("status", "eq", status))
+    if cv_id is not None:
+        filters.append(("cv_id", "eq", cv_id))
+    for column_op, moment in (("gte", created_from), ("lt", created_to)):
+        if moment is not None:
+            if moment.tzinfo is None:
+                moment = moment.replace(tzinfo=timezone.utc)
+            filters.append(("created_at", column_op, moment.isoformat()))
+    return filters
+
+
+def flatten(row: dict) -> dict:
+    """DB satırı -> dışa aktarma satırı (COLUMNS sırasıyla; admin aktarımında + 'user_id')."""
+    result = row.get("result") or {}
+    cv = row.get("user_cvs") or {}
+    job_keywords = result.get("job_keywords") or {}
+    cv_keywords = result.get("cv_keywords") or {}
+    gap = result.get("gap_analysis") or {}
+    matching, missing = gap.get("matching_skills") or [], gap.get("missing_skills") or []
+    suggestions = result.get("suggestions") or []
+    compared = len(matching) + len(missing)
+    return {
+        "task_id": row.get("id"),
+        "user_id": row.get("user_id"),
+        "created_at": row.get("created_at"),
+        "status": row.get("status"),
+        "cv_id": row.get("cv_id"),
+        "cv_file_name": cv.get("file_name"),
+        "parent_cv_id": cv.get("parent_cv_id"),
+        "job_description": row.get("job_description_text"),
+        "job_hard_skills": job_keywords.get("hard_skills") or [],
+        "job_soft_skills": job_keywords.get("soft_skills") or [],
+        "cv_hard_skills": cv_keywords.get("hard_skills") or [],
+        "cv_soft_skills": cv_keywords.get("soft_skills") or [],
+        "matching_skills": matching,
+        "missing_skills": missing,
+        # İlandaki becerilerden CV'de eşleşenlerin oranı (eşleşen / (eşleşen + eksik))
+        "match_ratio": round(len(matching) / compared, 3) if compared else None,
+        "suggestion_count": len(suggestions),
+        "suggestion_titles": [suggestion.get("suggestion_title") for suggestion in suggestions],
+        "cover_letter_draft": result.get("cover_letter_draft"),
+        "error": result.get("error"),
+    }
+
+
+def _csv_cell(value) -> object:
+    """
+    CSV hücresi: listeler '; ' ile birleştirilir. İlan metni, ön yazı ve beceriler kullanıcı / LLM
+    kaynaklıdır; formül gibi başlayan metinlerin önüne "'" eklenir (NDJSON ham kalır).
+    """
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        value = "; ".join(str(item) for item in value)
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return f"'{value}"
+    return value
+
+
+class _Encoder:
+    """Sayfaları NDJSON / CSV baytlarına çevirir; 'gzip' ise akış tek bir gzip dosyasıdır."""
+
+    def __init__(self, fmt: str, columns: list[str], gzip: bool):
+        self.fmt = fmt
+        self.columns = columns
+        self._header_written = False
+        self._compressor = zlib.compressobj(settings.EXPORT_GZIP_LEVEL, zlib.DEFLATED, 31) if gzip else None
+
+    def _csv(self, rows: list[dict]) -> bytes:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if not self._header_written:
+            writer.writerow(self.columns)
+            self._header_written = True
+        for row in rows:
+            writer.writerow(_csv_cell(row[column]) for column in self.columns)
+        return buffer.getvalue().encode("utf-8")
+
+    def encode(self, rows: list[dict]) -> bytes:
+        flat = [flatten(row) for row in rows]
+        if self.fmt == "csv":
+            data = self._csv(flat)
+        else:
+            data = b"".join(orjson.dumps({column: row[column] for column in self.columns}) + b"\n" for row in flat)
+        return self._compressor.compress(data) if self._compressor else data
+
+    def finish(self) -> bytes:
+        if self._compressor:
+            return self._compressor.flush()
+        # Hiç satır yoksa CSV yine de başlık satırıyla döner
+        return self._csv([]) if self.fmt == "csv" and not self._header_written else b""
+
+
+async def _stream(filters: list[Filter], first_page: list[dict], encoder: _Encoder) -> AsyncIterator[bytes]:
+    page, exported = first_page, 0
+    try:
+        while page:
+            chunk = await run_in_threadpool(encoder.encode, page)
+            exported += len(page)
+            if chunk:
+                yield chunk
+            if len(page) < settings.EXPORT_PAGE_SIZE:
+                break
+            last = page[-1]
+            page = await analysis_repository.list_jobs_page(
+                SELECT_COLUMNS, filters, (last["created_at"], last["id"]), settings.EXPORT_PAGE_SIZE
+            )
+        tail = await run_in_threadpool(encoder.finish)
+        if tail:
+            yield tail
+    except Exception:
+        # Başlıklar gönderildi: durum kodu değiştirilemez, bağlantı yarıda kesilir (istemci eksik
+        # akışı chunked kodlamanın bitmemesinden anlar)
+        logger.exception("Dışa aktarma yarıda kesildi.", extra={"rows": exported})
+        raise
+    logger.info("Dışa aktarma tamamlandı.", extra={"rows": exported, "format": encoder.fmt})
+
+
+async def export_response(filters: list[Filter], fmt: str, gzip: bool, include_user: bool = False) -> StreamingResponse:
+    """
+    İlk sayfa yanıt başlamadan okunur: DB / filtre hataları normal bir HTTP hatası olarak döner.
+    'include_user': admin aktarımında 'user_id' sütunu da eklenir.
+    """
+    first_page = await analysis_repository.list_jobs_page(SELECT_COLUMNS, filters, None, settings.EXPORT_PAGE_SIZE)
+    columns = ["user_id", *COLUMNS] if include_user else COLUMNS
+    media_type, extension = FORMATS[fmt]
+    file_name = f"cvoptima-analyses-{datetime.now(timezone.utc):%Y%m%d}.{extension}"
+    if gzip:
+        # 'application/gzip' sıkıştırma middleware'inde hariç tutulur (iki kez sıkıştırılmaz)
+        media_type, file_name = "application/gzip", f"{file_name}.gz"
+    return StreamingResponse(
+        _stream(filters, first_page, _Encoder(fmt, columns, gzip)),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{file_name}"'},
+    )
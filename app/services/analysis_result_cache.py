@@ -0,0 +1,33 @@
+# app/services/analysis_result_cache.py
+from typing import Optional
+
+from app.core.cache import Cache
+from app.core.config import get_settings
+from app.schemas.analysis_schema import ANALYSIS_RESULT_SCHEMA_VERSION
+
+settings = get_settings()
+
+# Tamamlanmış analiz sonuçları değişmez: (user_id, task_id) -> sonuç sözlüğü.
+# Durum sorgulayan (polling) istemciler iş bittikten sonra da birkaç kez sorar; bu istekler
+# DB'ye gitmez. Sürüm, sonuç şemasının sürümüdür: şema değişince eski girdiler okunmaz.
+# L2'de tutulur: ham CV metni içermez, iş silinince tüm worker'larda ve L2'de silinir; dosya
+# uygulama kullanıcısına özeldir (bkz. app/core/cache.py).
+_results = Cache(
+    "analysis_results",
+    max_entries=settings.ANALYSIS_RESULT_CACHE_MAX_ENTRIES,
+    default_ttl=settings.ANALYSIS_RESULT_CACHE_TTL_SECONDS,
+    version=ANALYSIS_RESULT_SCHEMA_VERSION,
+)
+
+
+async def get_result(user_id: str, task_id: str) -> Optional[dict]:
+    return await _results.get((user_id, task_id))
+
+
+async def remember_result(user_id: str, task_id: str, result: dict) -> None:
+    await _results.set((user_id, task_id), result)
+
+
+async def forget_result(user_id: str, task_id: str) -> None:
+    """İş silindiğinde (tüm worker'larda) unutulur."""
+    await _results.delete((user_id, task_id))
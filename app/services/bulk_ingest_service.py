@@ -0,0 +1,295 @@
+# app/services/bulk_ingest_service.py
+import asyncio
+import io
+import json
+import logging
+import os
+import time
+import uuid
+import zipfile
+import zlib
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+
+from fastapi import HTTPException, status
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import get_settings
+from app.core.logger import log_context
+from app.core.metrics import job_running
+from app.core.sqlite_store import ThreadLocalSQLite, data_dir, private_file
+from app.repositories import cv_repository, storage_repository
+from app.schemas.analysis_schema import BulkCVItemResult, BulkCVUploadResponse
+from app.services import cv_ranking_service
+from app.services.parser_service import SUPPORTED_EXTENSIONS
+from app.services.upload_service import PreparedCV, build_cv_row, prepare_cv
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPES = {
+    ".pdf": "application/pdf",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+}
+
+
+@dataclass
+class BulkItem:
+    """Toplu yüklemedeki tek bir dosya (doğrudan yüklenmiş veya zip'ten çıkarılmış)."""
+    file_name: str
+    content_type: Optional[str]
+    content: bytes
+    error: Optional[str] = None  # Zip girdisi okunamadıysa: bu dosya "failed" olur, toplu iş sürer
+
+
+def _too_many_files() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Tek seferde en fazla {settings.BULK_MAX_FILES} CV yüklenebilir."
+    )
+
+
+def _too_large_total() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Toplu yüklemenin toplam boyutu {settings.BULK_MAX_TOTAL_BYTES // (1024 * 1024)} MB'ı aşıyor."
+    )
+
+
+def _extract_zip(archive_name: str, archive_bytes: bytes, items: list[BulkItem]) -> None:
+    """
+    Zip içindeki desteklenen dosyaları 'items'a ekler. Dosya sayısı ve (tek tek ve toplam)
+    açılmış boyutlar hiçbir girdi okunmadan, merkezi dizindeki değerlerle kontrol edilir;
+    okuma sırasında zipfile girdiyi bu boyutla sınırlar.
+    """
+    try:
+        archive = zipfile.ZipFile(io.BytesIO(archive_bytes))
+    except zipfile.BadZipFile:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"'{archive_name}' geçerli bir zip arşivi değil."
+        )
+
+    with archive:
+        selected: list[tuple[str, zipfile.ZipInfo]] = []
+        for info in archive.infolist():
+            name = os.path.basename(info.filename)
+            # Klasörler, macOS meta verileri ve gizli dosyalar atlanır
+            if info.is_dir() or not name or name.startswith(".") or "__MACOSX" in info.filename:
+                continue
+            if not name.lower().endswith(SUPPORTED_EXTENSIONS):
+                continue
+            if len(items) + len(selected) >= settings.BULK_MAX_FILES:
+                raise _too_many_files()
+            if info.file_size > settings.BULK_MAX_FILE_BYTES:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"Arşivdeki '{name}' dosyası izin verilen boyutu aşıyor."
+                )
+            selected.append((name, info))
+
+        extracted = sum(len(item.content) for item in items) + sum(info.file_size for _, info in selected)
+        if extracted > settings.BULK_MAX_TOTAL_BYTES:
+            raise _too_large_total()
+
+        for name, info in selected:
+            extension = os.path.splitext(name)[1].lower()
+            try:
+                content, error = archive.read(info), None
+            except (zipfile.BadZipFile, zlib.error, EOFError) as e:
+                # Merkezi dizin sağlam ama girdi verisi bozuk: sadece bu dosya başarısız sayılır
+                logger.info("Zip girdisi okunamadı.", extra={"archive": archive_name, "entry": name, "error": str(e)})
+                content, error = b"", "Dosya zip arşivinden açılamadı (bozuk girdi)."
+            items.append(BulkItem(name, CONTENT_TYPES.get(extension), content, error))
+
+
+def expand_uploads(files: list[tuple[str, Optional[str], bytes]]) -> list[BulkItem]:
+    """
+    Yüklenen dosyaları (ad, content-type, içerik) tekil CV listesine açar.
+    '.zip' dosyaları açılır; diğer dosyalar olduğu gibi alınır (format kontrolü hat içinde yapılır).
+    Zip açma CPU işidir: threadpool'da çağrılmalıdır.
+    """
+    items: list[BulkItem] = []
+    for file_name, content_type, content in files:
+        if file_name.lower().endswith(".zip"):
+            _extract_zip(file_name, content, items)
+            continue
+        if len(items) >= settings.BULK_MAX_FILES:
+            raise _too_many_files()
+        if len(content) > settings.BULK_MAX_FILE_BYTES:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"'{file_name}' dosyası izin verilen boyutu aşıyor."
+            )
+        if sum(len(item.content) for item in items) + len(content) > settings.BULK_MAX_TOTAL_BYTES:
+            raise _too_large_total()
+        items.append(BulkItem(file_name, content_type, content))
+
+    if not items:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Yüklenecek .pdf, .docx veya resim (.jpg, .png) dosyası bulunamadı."
+        )
+    return items
+
+
+async def bulk_ingest(
+    user_id: str,
+    items: list[BulkItem],
+    on_progress: Optional[Callable[[int], Awaitable[None]]] = None,
+) -> list[BulkCVItemResult]:
+    """
+    Çok sayıda CV'yi işler:
+
+    1. Her dosya için ayrıştırma + Storage yüklemesi eşzamanlı başlatılır
+       (bkz. 'prepare_cv'); ayrıştırma ve yükleme ayrı sınırlarla (semaphore) kısıtlanır.
+    2. Başarılı olanların 'user_cvs' satırları TEK bir toplu insert ile eklenir.
+    3. Toplu insert başarısız olursa yüklenen tüm nesneler tek istekte silinir.
+    """
+    parse_limiter = asyncio.Semaphore(settings.BULK_PARSE_CONCURRENCY)
+    upload_limiter = asyncio.Semaphore(settings.BULK_UPLOAD_CONCURRENCY)
+    processed = 0
+
+    async def process(item: BulkItem) -> PreparedCV | Exception:
+        nonlocal processed
+        try:
+            if item.error is not None:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=item.error)
+            return await prepare_cv(
+                user_id, item.file_name, item.content_type, item.content, {},
+                parse_limiter=parse_limiter, upload_limiter=upload_limiter,
+                # Tek tek dosyalar reddedilmez; ayrıştırma havuzunda adil sıraya girer
+                interactive=False,
+            )
+        except Exception as e:
+            return e
+        finally:
+            processed += 1
+            if on_progress is not None:
+                await on_progress(processed)
+
+    outcomes = await asyncio.gather(*(process(item) for item in items))
+
+    results: list[Optional[BulkCVItemResult]] = [None] * len(items)
+    prepared: list[tuple[int, PreparedCV]] = []
+    for index, outcome in enumerate(outcomes):
+        if isinstance(outcome, PreparedCV):
+            prepared.append((index, outcome))
+        else:
+            detail = outcome.detail if isinstance(outcome, HTTPException) else str(outcome)
+            results[index] = BulkCVItemResult(file_name=items[index].file_name, status="failed", error=detail)
+
+    if prepared:
+        try:
+            rows = await cv_repository.insert_cvs([build_cv_row(user_id, cv) for _, cv in prepared])
+            ids_by_path = {row["file_path"]: row["id"] for row in rows}
+            for index, cv in prepared:
+                results[index] = BulkCVItemResult(
+                    file_name=cv.file_name, status="created", cv_id=ids_by_path.get(cv.storage_path)
+                )
+                if cv.storage_path in ids_by_path:
+                    cv_ranking_service.on_cv_created(user_id, ids_by_path[cv.storage_path], cv.file_name, cv.text)
+        except Exception as e:
+            logger.error("Toplu CV kaydı başarısız oldu, yüklenen dosyalar geri alınıyor: %s", e)
+            try:
+                await storage_repository.remove_files([cv.storage_path for _, cv in prepared])
+            except Exception as storage_exc:
+                logger.warning("Toplu rollback başarısız, nesneler sahipsiz kaldı: %s", storage_exc)
+            for index, cv in prepared:
+                results[index] = BulkCVItemResult(
+                    file_name=cv.file_name, status="failed", error="CV veritabanına kaydedilemedi."
+                )
+
+    return results
+
+
+class BulkJobStore:
+    """
+    Büyük arşivler için iş (job) ilerlemesi. Aynı makinedeki tüm worker'ların paylaştığı
+    SQLite dosyasında tutulur; böylece ilerleme sorgusu hangi worker'a düşerse düşsün yanıtlanır.
+    """
+
+    RETENTION_SECONDS = 24 * 3600
+
+    def __init__(self, path: str):
+        self._store = ThreadLocalSQLite(path)
+        self._store.register_schema(
+            "CREATE TABLE IF NOT EXISTS bulk_jobs ("
+            " id TEXT PRIMARY KEY, user_id TEXT NOT NULL, status TEXT NOT NULL,"
+            " total INTEGER NOT NULL, processed INTEGER NOT NULL, results TEXT,"
+            " updated_at REAL NOT NULL)"
+        )
+
+    def create(self, user_id: str, total: int) -> str:
+        job_id = str(uuid.uuid4())
+        conn = self._store.connection()
+        conn.execute(
+            "DELETE FROM bulk_jobs WHERE updated_at < ?", (time.time() - self.RETENTION_SECONDS,)
+        )
+        conn.execute(
+            "INSERT INTO bulk_jobs (id, user_id, status, total, processed, updated_at) VALUES (?, ?, ?, ?, 0, ?)",
+            (job_id, user_id, "processing", total, time.time()),
+        )
+        return job_id
+
+    def set_progress(self, job_id: str, processed: int) -> None:
+        self._store.connection().execute(
+            "UPDATE bulk_jobs SET processed = ?, updated_at = ? WHERE id = ?",
+            (processed, time.time(), job_id),
+        )
+
+    def finish(self, job_id: str, job_status: str, results: list[BulkCVItemResult]) -> None:
+        self._store.connection().execute(
+            "UPDATE bulk_jobs SET status = ?, processed = total, results = ?, updated_at = ? WHERE id = ?",
+            (job_status, json.dumps([r.model_dump(mode="json") for r in results]), time.time(), job_id),
+        )
+
+    def get(self, job_id: str, user_id: str) -> Optional[BulkCVUploadResponse]:
+        row = self._store.connection().execute(
+            "SELECT status, total, processed, results FROM bulk_jobs WHERE id = ? AND user_id = ?",
+            (job_id, user_id),
+        ).fetchone()
+        if row is None:
+            return None
+        job_status, total, processed, results = row
+        return BulkCVUploadResponse(
+            job_id=job_id,
+            status=job_status,
+            total=total,
+            processed=processed,
+            results=json.loads(results) if results else [],
+        )
+
+
+# Sonuçlar (kullanıcı id'leri, dosya adları) sadece uygulama kullanıcısının okuyabileceği dosyada
+job_store = BulkJobStore(private_file(settings.BULK_JOB_SQLITE_PATH or os.path.join(data_dir(), "bulk_jobs.sqlite3")))
+
+
+async def run_bulk_ingest_job(job_id: str, user_id: str, items: list[BulkItem], enqueued_at: float) -> None:
+    """Arka plan görevi: büyük arşivi işler ve ilerlemeyi iş kaydına yazar."""
+    with log_context(job_id=job_id), job_running("bulk_ingest", enqueued_at):
+        await _run_bulk_ingest_job(job_id, user_id, items)
+
+
+async def _run_bulk_ingest_job(job_id: str, user_id: str, items: list[BulkItem]) -> None:
+    # İlerleme güncellemeleri çok sık olmasın: en fazla ~20 yazma
+    step = max(1, len(items) // 20)
+
+    async def on_progress(processed: int) -> None:
+        if processed % step == 0:
+            try:
+                await run_in_threadpool(job_store.set_progress, job_id, processed)
+            except Exception as e:
+                logger.warning("Toplu iş ilerlemesi yazılamadı: %s", e)
+
+    try:
+        results = await bulk_ingest(user_id, items, on_progress)
+        await run_in_threadpool(job_store.finish, job_id, "completed", results)
+        logger.info("Toplu yükleme işi tamamlandı (%d dosya).", len(items))
+    except Exception as e:
+        logger.exception("Toplu yükleme işi başarısız oldu.")
+        failed = [BulkCVItemResult(file_name=i.file_name, status="failed", error=str(e)) for i in items]
+        await run_in_threadpool(job_store.finish, job_id, "failed", failed)
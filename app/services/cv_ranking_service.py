@@ -0,0 +1,261 @@
+# app/services/cv_ranking_service.py
+"""
+"Bu ilana hangi CV'm daha uygun?" sorusu için yerel BM25 sıralaması.
+
+Gemini'ye her CV varyantı için ayrı analiz göndermek yerine, kullanıcının CV'leri
+(user_cvs.cv_text_content) üzerinde kullanıcı başına bir BM25 indeksi tutulur ve
+ilan metni milisaniyeler içinde tüm CV'lere karşı puanlanır.
+
+- İndeks süreç içi önbellektedir (kullanıcı başına, TTL + LRU). CV yüklenince /
+  silinince bu worker'daki indeks yerinde güncellenir.
+- Diğer worker'lardaki değişiklikler için her sıralamada sadece CV 'id' listesi
+  okunur; eksik CV'lerin metni çekilir, silinenler indeksten düşülür (artımlı).
+- Metin işleme (parçalama + kök bulma) CV başına bir kez yapılır; sorgu anında
+  sadece seyrek (CSC benzeri) terim -> belge matrisi üzerinde NumPy işlemleri yapılır.
+"""
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import get_settings
+from app.core.metrics import timed_stage
+from app.core.cache import Cache
+from app.repositories import cv_repository
+from app.services.text_processing import analyze, analyze_with_surface
+
+settings = get_settings()
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_MATCHED_TERMS = 8
+
+
+@dataclass
+class _Document:
+    cv_id: str
+    file_name: str
+    text: Optional[str]                    # Henüz işlenmemişse ham metin
+    terms: Optional[Counter] = None        # Terim -> frekans (işlendikten sonra)
+
+
+@dataclass
+class _Matrix:
+    """Terim-başı (CSC benzeri) seyrek matris: terim t'nin belgeleri doc_index[ptr[t]:ptr[t+1]]."""
+    cv_ids: list[str]
+    file_names: list[str]
+    vocabulary: dict[str, int]
+    ptr: np.ndarray           # int64, len(vocabulary) + 1
+    doc_index: np.ndarray     # int32
+    term_freq: np.ndarray     # float32
+    doc_length: np.ndarray    # float32, belge başına terim sayısı
+    idf: np.ndarray           # float32, terim başına
+
+
+@dataclass
+class UserCVIndex:
+    documents: dict[str, _Document] = field(default_factory=dict)
+    _matrix: Optional[_Matrix] = None
+    _version: int = 0  # Her ekleme / silmede artar; eski belge kümesiyle kurulan matris saklanmaz
+    # Aynı kullanıcının eşzamanlı sıralamaları matrisi aynı anda iki thread'de kurmaz
+    _build_lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def add(self, cv_id: str, file_name: str, text: str) -> None:
+        self.documents[cv_id] = _Document(cv_id, file_name, text)
+        self._matrix = None
+        self._version += 1
+
+    def remove(self, cv_id: str) -> None:
+        if self.documents.pop(cv_id, None) is not None:
+            self._matrix = None
+            self._version += 1
+
+    @property
+    def cached_matrix(self) -> Optional[_Matrix]:
+        """Güncel matris (bekleyen belge yokken); yoksa None -> 'build_matrix' threadpool'da."""
+        return self._matrix
+
+    def build_matrix(self) -> _Matrix:
+        """
+        CPU işi (threadpool'da çağrılır): bekleyen belgeleri işler ve matrisi kurar. Bu sırada
+        olay döngüsünde CV eklenir / silinirse matris bu istek için kullanılır ama saklanmaz.
+        Eşzamanlı ikinci çağrı kilitte bekler ve ilkinin kurduğu matrisi kullanır.
+        """
+        with self._build_lock:
+            if self._matrix is not None:
+                return self._matrix
+            version = self._version
+            documents = list(self.documents.values())
+            _analyze_documents([doc for doc in documents if doc.terms is None])
+            matrix = _build_matrix([doc for doc in documents if doc.terms is not None])
+            if version == self._version:
+                self._matrix = matrix
+            return matrix
+
+
+def _analyze_documents(documents: list[_Document]) -> None:
+    """CPU işi (threadpool'da çağrılır): ham metinleri terim sayımlarına çevirir."""
+    for doc in documents:
+        text = doc.text
+        if text is None:
+            continue  # Başka bir çağrı zaten işledi ('terms' ondan önce atanmıştır)
+        doc.terms = analyze(text)
+        doc.text = None  # Ham metin bellekte tutulmaz; 'terms' atandıktan sonra bırakılır
+
+
+def _build_matrix(documents: list[_Document]) -> _Matrix:
+    vocabulary: dict[str, int] = {}
+    postings: list[list[tuple[int, int]]] = []
+    for doc_position, doc in enumerate(documents):
+        for term, count in doc.terms.items():
+            term_id = vocabulary.setdefault(term, len(vocabulary))
+            if term_id == len(postings):
+                postings.append([])
+            postings[term_id].append((doc_position, count))
+
+    lengths = np.fromiter((len(p) for p in postings), dtype=np.int64, count=len(postings))
+    ptr = np.zeros(len(postings) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=ptr[1:])
+    flat = [entry for term_postings in postings for entry in term_postings]
+    doc_index = np.fromiter((entry[0] for entry in flat), dtype=np.int32, count=len(flat))
+    term_freq = np.fromiter((entry[1] for entry in flat), dtype=np.float32, count=len(flat))
+
+    n_docs = len(documents)
+    doc_length = np.fromiter((sum(doc.terms.values()) for doc in documents), dtype=np.float32, count=n_docs)
+    # BM25 idf (Lucene varyantı): her zaman pozitif, az belgeli derlemde de anlamlı
+    idf = np.log1p((n_docs - lengths + 0.5) / (lengths + 0.5)).astype(np.float32)
+
+    return _Matrix(
+        cv_ids=[doc.cv_id for doc in documents],
+        file_names=[doc.file_name for doc in documents],
+        vocabulary=vocabulary,
+        ptr=ptr,
+        doc_index=doc_index,
+        term_freq=term_freq,
+        doc_length=doc_length,
+        idf=idf,
+    )
+
+
+@dataclass
+class RankedCV:
+    cv_id: str
+    file_name: str
+    score: float
+    matched_terms: list[tuple[str, float]]  # (ilandaki yüzey biçimi, katkı)
+
+
+def score(matrix: _Matrix, query_text: str, top_k: int) -> list[RankedCV]:
+    """İlan metnini tüm belgelere karşı BM25 ile puanlar, en iyi 'top_k' CV'yi döndürür."""
+    n_docs = len(matrix.cv_ids)
+    query_terms, surfaces = analyze_with_surface(query_text)
+    term_ids = [(matrix.vocabulary[term], term, count) for term, count in query_terms.items() if term in matrix.vocabulary]
+    if n_docs == 0 or not term_ids:
+        return []
+
+    ids = np.fromiter((term_id for term_id, _, _ in term_ids), dtype=np.int64, count=len(term_ids))
+    starts, ends = matrix.ptr[ids], matrix.ptr[ids + 1]
+    spans = ends - starts
+    # Sorgu terimlerinin posting'lerini tek bir düz diziye topla
+    positions = np.repeat(starts - np.cumsum(np.concatenate(([0], spans[:-1]))), spans) + np.arange(spans.sum())
+    query_slot = np.repeat(np.arange(len(term_ids)), spans)  # Her posting hangi sorgu terimine ait
+    docs = matrix.doc_index[positions]
+    tf = matrix.term_freq[positions]
+
+    # Sorgu tarafında terim tekrarı doygunlaşır (k3 = BM25_K1)
+    query_tf = np.fromiter((count for _, _, count in term_ids), dtype=np.float32, count=len(term_ids))
+    query_weight = (query_tf * (BM25_K1 + 1)) / (query_tf + BM25_K1)
+
+    average_length = float(matrix.doc_length.mean()) or 1.0
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * matrix.doc_length[docs] / average_length)
+    contributions = matrix.idf[ids][query_slot] * query_weight[query_slot] * tf * (BM25_K1 + 1) / (tf + norm)
+
+    scores = np.bincount(docs, weights=contributions, minlength=n_docs)
+    top_k = min(top_k, n_docs)
+    best = np.argpartition(-scores, top_k - 1)[:top_k]
+    best = best[np.argsort(-scores[best], kind="stable")]
+
+    results = []
+    for doc in best:
+        if scores[doc] <= 0:
+            break
+        mask = docs == doc
+        doc_contributions, doc_slots = contributions[mask], query_slot[mask]
+        order = np.argsort(-doc_contributions)[:MAX_MATCHED_TERMS]
+        results.append(RankedCV(
+            cv_id=matrix.cv_ids[doc],
+            file_name=matrix.file_names[doc],
+            score=round(float(scores[doc]), 4),
+            matched_terms=[
+                (surfaces[term_ids[doc_slots[i]][1]], round(float(doc_contributions[i]), 4)) for i in order
+            ],
+        ))
+    return results
+
+
+# --- Kullanıcı başına indeks önbelleği ---
+# NumPy matrisleri büyük ve worker'lar arası taşınmaya değmez: sadece L1 ('shared=False').
+# Diğer worker'lardaki değişiklikler zaten her sıralamada DB ile eşitlenir.
+_indexes = Cache(
+    "ranking_index",
+    max_entries=settings.RANKING_INDEX_CACHE_MAX_USERS,
+    default_ttl=settings.RANKING_INDEX_TTL_SECONDS,
+    shared=False,
+)
+
+
+def on_cv_created(user_id: str, cv_id: str, file_name: str, text: str) -> None:
+    """Yükleme hattından çağrılır; indeks bu worker'da önbellekteyse CV eklenir (işleme tembel)."""
+    index: Optional[UserCVIndex] = _indexes.get_local(user_id)
+    if index is not None:
+        index.add(cv_id, file_name, text)
+
+
+def on_cv_deleted(user_id: str, cv_id: str) -> None:
+    index: Optional[UserCVIndex] = _indexes.get_local(user_id)
+    if index is not None:
+        index.remove(cv_id)
+
+
+async def _synced_index(user_id: str) -> UserCVIndex:
+    """
+    Önbellekteki indeksi DB'deki CV listesiyle eşitler: silinenler düşülür, eksikler
+    (başka worker'da yüklenmiş olanlar) tek sorguyla çekilir.
+    """
+    index: Optional[UserCVIndex] = _indexes.get_local(user_id)
+    if index is None:
+        index = UserCVIndex()
+        _indexes.set_local(user_id, index)
+
+    current = {row["id"]: row["file_name"] for row in await cv_repository.list_cvs(user_id)}
+    for cv_id in [cv_id for cv_id in index.documents if cv_id not in current]:
+        index.remove(cv_id)
+
+    missing = [cv_id for cv_id in current if cv_id not in index.documents]
+    if missing:
+        for row in await cv_repository.get_cv_texts(user_id, missing):
+            index.add(row["id"], row["file_name"], row.get("cv_text_content") or "")
+
+    return index
+
+
+async def rank_cvs(user_id: str, job_description_text: str, top_k: int) -> tuple[list[RankedCV], int, float]:
+    """
+    Kullanıcının tüm CV'lerini ilan metnine göre sıralar.
+    Dönüş: (en iyi CV'ler, indeksteki CV sayısı, puanlama süresi ms).
+    """
+    index = await _synced_index(user_id)
+    matrix = index.cached_matrix
+    if matrix is None:
+        # Metin işleme ve postings matrisi saf Python'dur: olay döngüsünü bloklamasın
+        with timed_stage("rank_index"):
+            matrix = await run_in_threadpool(index.build_matrix)
+    started = time.perf_counter()
+    with timed_stage("rank_score"):
+        results = score(matrix, job_description_text, top_k)
+    return results, len(matrix.cv_ids), round((time.perf_counter() - started) * 1000, 3)
+
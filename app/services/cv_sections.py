@@ -0,0 +1,340 @@
+# app/services/cv_sections.py
+"""
+CV metnini tipli bölümlere ayırır (segmentasyon) ve iki sürüm arasındaki bölüm farkını
+(diff) hesaplar.
+
+Başlık tespiti sezgiseldir: bilinen Türkçe / İngilizce bölüm adları, tamamı büyük harf
+kısa satırlar veya ':' ile biten kısa satırlar başlık sayılır. Bölümler tiplendirilir
+(contact, summary, experience, education, skills, languages, certifications, projects,
+other); deneyim / eğitim bölümleri tarih aralığı içeren satırlardan girdilere,
+beceri / dil bölümleri maddelere bölünür. Segmentasyon yüklemede bir kez yapılır ve
+'user_cvs.cv_sections' sütununa yazılır (bkz. 'segment_cv').
+"""
+import difflib
+import re
+from dataclasses import dataclass, field
+from typing import Optional
+
+from app.services.text_processing import turkish_lower
+
+PREAMBLE_KEY = "_preamble"  # İlk başlıktan önceki kısım (genelde ad + iletişim)
+CV_SECTIONS_VERSION = 1     # 'cv_sections' JSON biçimi değişirse artırılır
+
+# Bilinen bölüm başlıkları (küçük harf, Türkçe küçük harf kurallarıyla) -> bölüm tipi
+_HEADINGS_BY_TYPE = {
+    "summary": """
+        özet, profil, hakkımda, kariyer hedefi, amaç, summary, profile, about me, objective,
+        professional summary, career objective""",
+    "contact": """
+        iletişim, iletişim bilgileri, kişisel bilgiler, contact, contact information,
+        personal information, personal details""",
+    "experience": """
+        deneyim, deneyimler, iş deneyimi, iş deneyimleri, profesyonel deneyim, çalışma deneyimi,
+        experience, work experience, professional experience, employment, employment history,
+        work history""",
+    "education": "eğitim, eğitim bilgileri, öğrenim, education, academic background",
+    "skills": """
+        yetenekler, beceriler, yetkinlikler, teknik beceriler, teknik yetenekler, skills,
+        technical skills, core competencies, competencies""",
+    "languages": "diller, yabancı diller, dil bilgisi, languages",
+    "certifications": """
+        sertifikalar, sertifikalar ve kurslar, kurslar, belgeler, certifications, certificates,
+        licenses, courses, training""",
+    "projects": "projeler, projects",
+    "other": """
+        ödüller, başarılar, yayınlar, referanslar, gönüllülük, hobiler, ilgi alanları, awards,
+        achievements, publications, references, volunteering, volunteer experience, interests,
+        hobbies""",
+}
+HEADING_TYPES = {
+    phrase.strip(): section_type
+    for section_type, phrases in _HEADINGS_BY_TYPE.items()
+    for phrase in phrases.split(",")
+}
+KNOWN_HEADINGS = frozenset(HEADING_TYPES)
+_MAX_HEADING_CHARS = 40
+_MAX_HEADING_WORDS = 5
+_WHITESPACE_RE = re.compile(r"\s+")
+_BULLET_CHARS = "-*•●▪◦·–"
+
+
+@dataclass
+class Section:
+    key: str     # Karşılaştırma anahtarı: normalize edilmiş başlık
+    title: str   # Metindeki haliyle başlık
+    text: str    # Başlık hariç gövde
+
+    @property
+    def normalized(self) -> str:
+        return _WHITESPACE_RE.sub(" ", self.text).strip()
+
+
+def _heading_key(line: str) -> str:
+    return _WHITESPACE_RE.sub(" ", turkish_lower(line).strip(" \t:•-–|")).strip()
+
+
+def is_heading(line: str) -> bool:
+    stripped = line.strip()
+    if not stripped or len(stripped) > _MAX_HEADING_CHARS or len(stripped.split()) > _MAX_HEADING_WORDS:
+        return False
+    if stripped[-1] in ".,;" or stripped[0] in _BULLET_CHARS or any(char.isdigit() for char in stripped):
+        return False
+    key = _heading_key(stripped)
+    if key in KNOWN_HEADINGS:
+        return True
+    letters = [char for char in stripped if char.isalpha()]
+    # Tamamı büyük harf kısa satırlar ("PROJELER") veya ':' ile biten kısa satırlar
+    return (len(letters) >= 3 and all(char.isupper() for char in letters)) or (
+        stripped.endswith(":") and len(stripped.split()) <= 3
+    )
+
+
+def split_sections(text: str) -> list[Section]:
+    """Metni sırasıyla bölümlere ayırır. Aynı başlık tekrar ederse anahtara sıra no eklenir."""
+    sections: list[Section] = []
+    seen: dict[str, int] = {}
+    current = Section(PREAMBLE_KEY, "", "")
+    lines: list[str] = []
+
+    def flush() -> None:
+        current.text = "\n".join(lines).strip()
+        if current.text or current.key != PREAMBLE_KEY:
+            sections.append(current)
+
+    all_lines = (text or "").splitlines()
+    for index, line in enumerate(all_lines):
+        # Belgenin ilk satırı bilinen bir başlık değilse başlık sayılmaz ("AYŞE YILMAZ" adı).
+        # Tarih aralığı satırından hemen önceki bilinmeyen satır da başlık değil, girdi başlığıdır
+        # ("ODTÜ" / "2012 - 2016").
+        unknown = _heading_key(line) not in KNOWN_HEADINGS
+        first_line = not sections and not any(previous.strip() for previous in lines)
+        entry_header = index + 1 < len(all_lines) and _date_range(all_lines[index + 1]) is not None
+        if is_heading(line) and not (unknown and (first_line or entry_header)):
+            flush()
+            key = _heading_key(line)
+            seen[key] = seen.get(key, 0) + 1
+            if seen[key] > 1:
+                key = f"{key}#{seen[key]}"
+            current, lines = Section(key, line.strip().rstrip(":"), ""), []
+        else:
+            lines.append(line)
+    flush()
+    return sections
+
+
+# --- Tipli segmentasyon (yüklemede bir kez; sonuç 'user_cvs.cv_sections' JSON'u) ---
+_MONTH = (
+    r"(?:oca|şub|mar|nis|may|haz|tem|ağu|eyl|eki|kas|ara|jan|feb|apr|jun|jul|aug|sep|oct|nov|dec)"
+    r"[a-zçğıöşü]*\.?"
+)
+_DATE = rf"(?:{_MONTH}\s+|\d{{1,2}}[./])?(?:19|20)\d{{2}}"
+_DATE_END = rf"(?:{_DATE}|günümüz|halen|hâlâ|devam ediyor|present|current|now|today)"
+# "2019 - 2022", "Mart 2020 – Günümüz", "09/2018 - 06/2021", "Jan 2021 - present"
+_DATE_RANGE_RE = re.compile(rf"(?P<start>{_DATE})\s*(?:-|–|—|to|ile)\s*(?P<end>{_DATE_END})", re.IGNORECASE)
+_EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+_PHONE_RE = re.compile(r"\+?\(?\d[\d\s().-]{8,}\d")
+_LINK_RE = re.compile(r"(?:https?://|www\.)\S+|\b(?:linkedin\.com|github\.com|gitlab\.com)/\S+", re.IGNORECASE)
+_ITEM_SPLIT_RE = re.compile(r"[,;•●▪|·]|\n")
+_MIN_PHONE_DIGITS = 10
+_MAX_ITEM_CHARS = 60
+_MAX_ENTRY_HEADER_CHARS = 100
+
+# Tip -> nasıl yapılandırılır
+_ENTRY_TYPES = frozenset({"experience", "education", "projects"})
+_ITEM_TYPES = frozenset({"skills", "languages"})
+_LINE_TYPES = frozenset({"certifications"})
+
+
+def section_type(section: Section) -> str:
+    """Bölüm tipi; ilk başlıktan önceki kısım (ad, iletişim) 'contact' sayılır."""
+    if section.key == PREAMBLE_KEY:
+        return "contact"
+    return HEADING_TYPES.get(section.key.split("#", 1)[0], "other")
+
+
+def _strip_bullet(line: str) -> str:
+    return line.strip().lstrip(_BULLET_CHARS).strip()
+
+
+def _is_bullet(line: str) -> bool:
+    stripped = line.strip()
+    return bool(stripped) and stripped[0] in _BULLET_CHARS
+
+
+def _date_range(line: str) -> Optional[re.Match]:
+    return _DATE_RANGE_RE.search(line) if len(line.strip()) <= _MAX_ENTRY_HEADER_CHARS else None
+
+
+def _split_entries(text: str) -> list[dict]:
+    """
+    Deneyim / eğitim girdileri: her girdi tarih aralığı içeren bir satırla belirlenir.
+    Tarih satırının hemen önündeki kısa, madde olmayan satır (şirket / okul adı) önünde boş satır
+    olsun olmasın girdinin başlığıdır. Hiç tarih yoksa boş satırla ayrılmış bloklar girdidir.
+    """
+    lines = text.splitlines()
+    starts: list[tuple[int, int, re.Match]] = []  # (girdi başlangıcı, tarih satırı, eşleşme)
+    for index, line in enumerate(lines):
+        match = _date_range(line)
+        if match is None or _is_bullet(line):
+            continue
+        start = index
+        previous_start = starts[-1][1] + 1 if starts else 0
+        if (
+            index - 1 >= previous_start
+            and lines[index - 1].strip()
+            and not _is_bullet(lines[index - 1])
+            and len(lines[index - 1].strip()) <= _MAX_ENTRY_HEADER_CHARS
+        ):
+            start = index - 1
+        starts.append((start, index, match))
+
+    if not starts:
+        blocks = [block.strip() for block in re.split(r"\n\s*\n", text) if block.strip()]
+        return [
+            {"header": block.splitlines()[0].strip(), "start": None, "end": None, "text": block}
+            for block in blocks
+        ]
+
+    entries = []
+    for position, (start, date_line, match) in enumerate(starts):
+        # İlk girdiden önceki satırlar (varsa) ilk girdiye eklenir
+        begin = 0 if position == 0 else start
+        end = starts[position + 1][0] if position + 1 < len(starts) else len(lines)
+        header = " | ".join(line.strip() for line in lines[start:date_line + 1] if line.strip())
+        entries.append({
+            "header": header,
+            "start": match.group("start").strip(),
+            "end": match.group("end").strip(),
+            "text": "\n".join(lines[begin:end]).strip(),
+        })
+    return entries
+
+
+def _split_items(text: str) -> list[str]:
+    """Beceri / dil maddeleri: virgül, noktalı virgül, madde işareti ve satır sonlarından bölünür."""
+    items: list[str] = []
+    for line in text.splitlines():
+        # "Programlama Dilleri: Python, Go" -> sadece değerler
+        label, sep, rest = line.partition(":")
+        if sep and len(label.split()) <= 3 and rest.strip():
+            line = rest
+        for part in _ITEM_SPLIT_RE.split(line):
+            item = _strip_bullet(part).rstrip(".")
+            if item and len(item) <= _MAX_ITEM_CHARS and item not in items:
+                items.append(item)
+    return items
+
+
+def _split_lines(text: str) -> list[str]:
+    return [_strip_bullet(line) for line in text.splitlines() if _strip_bullet(line)]
+
+
+def extract_contact(text: str) -> dict:
+    """Ad (ilk uygun satır), e-posta, telefon ve bağlantılar."""
+    links = list(dict.fromkeys(match.rstrip(".,;)") for match in _LINK_RE.findall(text)))
+    emails = list(dict.fromkeys(_EMAIL_RE.findall(text)))
+    without_links = _LINK_RE.sub(" ", _EMAIL_RE.sub(" ", text))
+    phones = list(dict.fromkeys(
+        phone.strip()
+        for phone in _PHONE_RE.findall(without_links)
+        if sum(char.isdigit() for char in phone) >= _MIN_PHONE_DIGITS and not _DATE_RANGE_RE.search(phone)
+    ))
+    name = None
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped:
+            continue
+        if (
+            len(stripped.split()) <= 5
+            and not any(char.isdigit() for char in stripped)
+            and not _EMAIL_RE.search(stripped)
+            and not _LINK_RE.search(stripped)
+        ):
+            name = stripped
+        break  # Ad, sadece ilk dolu satır olabilir
+    return {"name": name, "emails": emails, "phones": phones, "links": links}
+
+
+def segment_cv(text: str) -> dict:
+    """
+    Ayrıştırılmış CV metnini tipli bölümlere ayırır (CPU işi; saf fonksiyon).
+    Ayrıştırıcılar düz metin döndürdüğü için "yerleşim" sezgileri metin üzerindedir:
+    satır biçimi (kısa / büyük harf / ':' ile biten başlıklar), boş satırlar, madde
+    işaretleri ve tarih aralıkları.
+    """
+    sections = split_sections(text)
+    contact_text = "\n".join(section.text for section in sections if section_type(section) == "contact")
+    result = []
+    for section in sections:
+        kind = section_type(section)
+        item = {"key": section.key, "type": kind, "title": section.title, "text": section.text}
+        if kind in _ENTRY_TYPES:
+            item["entries"] = _split_entries(section.text)
+        elif kind in _ITEM_TYPES:
+            item["items"] = _split_items(section.text)
+        elif kind in _LINE_TYPES:
+            item["items"] = _split_lines(section.text)
+        result.append(item)
+    return {"version": CV_SECTIONS_VERSION, "contact": extract_contact(contact_text), "sections": result}
+
+
+def stored_sections(cv_sections: Optional[dict]) -> Optional[list[Section]]:
+    """
+    'user_cvs.cv_sections' JSON'undan bölüm listesi. Segmentasyonu olmayan (eski) veya
+    farklı sürümle segmente edilmiş CV'lerde None: çağıran metni 'split_sections' ile böler.
+    """
+    if not cv_sections or cv_sections.get("version") != CV_SECTIONS_VERSION:
+        return None
+    return [Section(item["key"], item["title"], item["text"]) for item in cv_sections.get("sections", [])]
+
+
+@dataclass
+class SectionDiff:
+    changed: list[tuple[Section, Section]] = field(default_factory=list)  # (eski, yeni)
+    added: list[Section] = field(default_factory=list)
+    removed: list[Section] = field(default_factory=list)
+    unchanged: list[Section] = field(default_factory=list)
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.changed or self.added or self.removed)
+
+    @property
+    def changed_ratio(self) -> float:
+        """
+        Değişen metnin iki sürümdeki toplam metne oranı (0-1). Değişen bölümlerde sadece
+        farklı satırlar sayılır: iki madde değişmişse bölümün tamamı değişmiş sayılmaz.
+        """
+        changed = total = 0.0
+        for old, new in self.changed:
+            size = len(old.normalized) + len(new.normalized)
+            similarity = difflib.SequenceMatcher(None, old.text.splitlines(), new.text.splitlines()).ratio()
+            changed += size * (1 - similarity)
+            total += size
+        for section in self.added + self.removed:
+            changed += len(section.normalized)
+            total += len(section.normalized)
+        total += 2 * sum(len(section.normalized) for section in self.unchanged)
+        return changed / total if total else 0.0
+
+    def titles(self) -> list[str]:
+        return [new.title or "(başlıksız)" for _, new in self.changed] + [
+            section.title or "(başlıksız)" for section in self.added + self.removed
+        ]
+
+
+def diff_sections(old: list[Section], new: list[Section]) -> SectionDiff:
+    """Bölümleri anahtarlarına göre eşleştirir; gövdeler boşluk farkları yok sayılarak karşılaştırılır."""
+    diff = SectionDiff()
+    old_by_key = {section.key: section for section in old}
+    new_keys = {section.key for section in new}
+    for section in new:
+        previous = old_by_key.get(section.key)
+        if previous is None:
+            diff.added.append(section)
+        elif previous.normalized == section.normalized:
+            diff.unchanged.append(section)
+        else:
+            diff.changed.append((previous, section))
+    diff.removed = [section for section in old if section.key not in new_keys]
+    return diff
@@ -0,0 +1,441 @@
+# app/services/document_governor.py
+"""
+Belge kaynak denetimi (governor): tek bir kötü niyetli veya sadece çok büyük yükleme,
+paylaşılan API worker'ında dakikalarca bir CPU'yu ve gigabaytlarca belleği tutmasın.
+
+1. Ucuz ön kontrol ('inspect_document'): pahalı işten ÖNCE sadece meta veriye bakılır.
+   - PDF  : sayfa sayısı ve sayfa boyutları (OCR_DPI'da çizilince kaç piksel eder)
+   - DOCX : zip girdilerinin sayısı, açılmış boyutları ve sıkıştırma oranları (zip bombası)
+   - Resim: başlıktaki genişlik x yükseklik (piksel bombası)
+   Sınırı aşan belgeler hemen 413 ile reddedilir. Sayfa sayısı sınırı aşan PDF'ler
+   (DOCUMENT_TRUNCATE_PAGES açıksa) reddedilmez, sadece ilk N sayfası işlenir.
+2. Sınırlı alt süreç ('run_limited'): ayrıştırma ayrı bir süreç havuzunda, süreç başına
+   bellek (RLIMIT_AS) ve belge başına CPU süresi bütçesiyle çalışır. Bütçe aşılırsa sadece
+   o belge 413 ile reddedilir; worker etkilenmez. CPU sınırının yakalayamadığı takılmalar
+   için ayrıca duvar saati (wall clock) sınırı vardır.
+
+CPU bütçesi: ayrıştırma sürecinin kendi CPU'su RLIMIT_CPU ile anında kesilir. Tesseract
+ayrı bir süreçtir; onun CPU'su (RUSAGE_CHILDREN) her OCR sayfasından sonra bütçeye eklenir
+('charge_subprocess_cpu'). Yani bütçe sayfa sınırlarında uygulanır; tek bir Tesseract
+çalışmasını sadece duvar saati sınırı keser.
+
+Havuz worker (API süreci) başınadır; alt süreçler ilk kullanımda açılır. Her alt sürecin
+kendi kanalı (pipe) vardır: süresi dolan veya çöken bir iş için sadece o alt süreç
+öldürülür ve yerine yenisi açılır, diğer belgelerin işleri etkilenmez.
+"""
+import io
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+import zipfile
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from fastapi import HTTPException, status
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import get_settings
+from app.core.logger import configure_logging, context_ids, log_context
+from app.core.metrics import DOCUMENT_LIMIT_REJECTIONS, collect_stages, record_stage
+from app.services.rasterizer import PDFIUM_LOCK
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+_MB = 1024 * 1024
+# Bu boyutun altındaki zip girdilerinde sıkıştırma oranına bakılmaz (küçük XML'ler çok iyi sıkışır)
+_RATIO_CHECK_MIN_BYTES = 1 * _MB
+
+
+@dataclass
+class DocumentPlan:
+    """Ön kontrolün sonucu: belge işlenebilir, gerekirse sadece ilk 'page_limit' sayfası."""
+    kind: str                           # "pdf", "docx" veya "image"
+    page_count: Optional[int] = None
+    page_limit: Optional[int] = None    # None -> tüm sayfalar
+
+    @property
+    def truncated(self) -> bool:
+        return self.page_limit is not None
+
+
+def _too_large(reason: str, detail: str) -> HTTPException:
+    DOCUMENT_LIMIT_REJECTIONS.labels(reason).inc()
+    return HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=detail)
+
+
+def _rendered_pixels(width_pt: float, height_pt: float) -> float:
+    """PDF sayfası (1/72 inç birim) OCR_DPI'da çizilince kaç piksel eder."""
+    scale = settings.OCR_DPI / 72
+    return width_pt * scale * height_pt * scale
+
+
+def _inspect_pdf(file_content: bytes) -> DocumentPlan:
+    import pypdfium2
+
+    with PDFIUM_LOCK:
+        try:
+            pdf = pypdfium2.PdfDocument(file_content)
+        except pypdfium2.PdfiumError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"PDF dosyası açılamadı (bozuk veya şifreli olabilir): {str(e)}"
+            )
+        try:
+            page_count = len(pdf)
+            page_limit = None
+            if page_count > settings.DOCUMENT_MAX_PAGES:
+                if not settings.DOCUMENT_TRUNCATE_PAGES:
+                    raise _too_large(
+                        "pages",
+                        f"Belge {page_count} sayfa; en fazla {settings.DOCUMENT_MAX_PAGES} sayfalık belgeler işlenebilir."
+                    )
+                page_limit = settings.DOCUMENT_MAX_PAGES
+            # Sayfa boyutları sayfa yüklenmeden okunur (sadece işlenecek sayfalar)
+            for index in range(page_limit or page_count):
+                width, height = pdf.get_page_size(index)
+                if _rendered_pixels(width, height) > settings.DOCUMENT_MAX_PAGE_PIXELS:
+                    raise _too_large(
+                        "page_size",
+                        f"Belgenin {index + 1}. sayfası çok büyük ({width / 72:.0f} x {height / 72:.0f} inç)."
+                    )
+        finally:
+            pdf.close()
+    return DocumentPlan("pdf", page_count, page_limit)
+
+
+def _inspect_docx(file_content: bytes) -> DocumentPlan:
+    try:
+        archive = zipfile.ZipFile(io.BytesIO(file_content))
+    except zipfile.BadZipFile:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="DOCX dosyası geçerli bir arşiv değil (bozuk olabilir)."
+        )
+    with archive:
+        entries = archive.infolist()
+        if len(entries) > settings.DOCUMENT_MAX_ZIP_ENTRIES:
+            raise _too_large("zip_entries", f"DOCX dosyası çok fazla parça içeriyor ({len(entries)}).")
+        total = 0
+        for info in entries:
+            total += info.file_size
+            ratio = info.file_size / max(info.compress_size, 1)
+            if info.file_size > _RATIO_CHECK_MIN_BYTES and ratio > settings.DOCUMENT_MAX_COMPRESSION_RATIO:
+                raise _too_large(
+                    "zip_ratio",
+                    f"DOCX içindeki '{info.filename}' olağan dışı yüksek oranda sıkıştırılmış ({ratio:.0f}:1)."
+                )
+        if total > settings.DOCUMENT_MAX_UNCOMPRESSED_MB * _MB:
+            raise _too_large(
+                "zip_size",
+                f"DOCX dosyası açıldığında {total / _MB:.0f} MB ediyor; sınır {settings.DOCUMENT_MAX_UNCOMPRESSED_MB} MB."
+            )
+    return DocumentPlan("docx")
+
+
+def _inspect_image(file_content: bytes) -> DocumentPlan:
+    from PIL import Image, UnidentifiedImageError
+
+    try:
+        # Sadece başlık okunur; pikseller 'load' edilmeden boyut bilinir
+        with Image.open(io.BytesIO(file_content)) as image:
+            width, height = image.size
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Resim dosyası okunamadı: {str(e)}"
+        )
+    if width * height > settings.DOCUMENT_MAX_PAGE_PIXELS:
+        raise _too_large("page_size", f"Resim çok büyük ({width} x {height} piksel).")
+    return DocumentPlan("image", page_count=1)
+
+
+def inspect_document(file_content: bytes, filename: str) -> DocumentPlan:
+    """Ucuz ön kontrol (SENKRON; threadpool'da çağrılır). Sınır aşımında 413 / 400 fırlatır."""
+    name = filename.lower()
+    if name.endswith(".pdf"):
+        return _inspect_pdf(file_content)
+    if name.endswith(".docx"):
+        return _inspect_docx(file_content)
+    return _inspect_image(file_content)
+
+
+# --- Sınırlı alt süreç ---
+class _CPUBudgetExceeded(BaseException):
+    """BaseException: ayrıştırıcıların genel 'except Exception' bloklarında yutulmaz."""
+
+
+class _ChildHTTPError(Exception):
+    """HTTPException süreçler arasında (pickle) taşınamadığı için alt süreçte buna çevrilir."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(status_code, detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _on_cpu_limit(signum, frame) -> None:
+    raise _CPUBudgetExceeded()
+
+
+def _init_child(memory_limit_bytes: int) -> None:
+    """Alt süreç açılışı: süreç başına bellek tavanı (Tesseract gibi alt süreçlere de geçer)."""
+    import resource
+
+    # Olay döngüsü yok: kayıtlar kuyruksuz, doğrudan stderr'e
+    configure_logging(use_queue=False)
+    if memory_limit_bytes > 0:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit_bytes, memory_limit_bytes))
+    signal.signal(signal.SIGXCPU, _on_cpu_limit)
+    # Worker'ın Ctrl+C / SIGINT'i alt süreçlere de gider; kapatmayı ana süreç yönetir
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+# Alt süreçte: çalışan işin CPU başlangıcı ve bütçesi (saniye); iş yokken None
+_cpu_budget: Optional[tuple[float, int]] = None
+
+
+def _cpu_used() -> float:
+    """Bu sürecin ve beklenmiş (bitmiş) alt süreçlerinin (Tesseract) toplam CPU süresi."""
+    import resource
+
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def charge_subprocess_cpu() -> None:
+    """
+    Alt süreç (Tesseract) çalıştıran adımlardan sonra çağrılır: o alt süreçlerin CPU'su
+    RLIMIT_CPU'ya dahil olmadığı için bütçe burada kontrol edilir. Sınırlı alt süreç
+    dışında (DOCUMENT_ISOLATION_ENABLED kapalı) bir şey yapmaz.
+    """
+    if _cpu_budget is None:
+        return
+    started, budget = _cpu_budget
+    if _cpu_used() - started > budget:
+        raise _CPUBudgetExceeded()
+
+
+def _run_in_child(fn: Callable, cpu_seconds: int, log_ids: dict[str, str], args: tuple) -> tuple[object, dict[str, float]]:
+    """
+    Alt süreçte çalışır: CPU bütçesi bu görev için ayarlanır (süreç şimdiye kadar ne kadar
+    CPU kullandıysa + bütçe), iş bitince kaldırılır. Aşama süreleri Server-Timing için döndürülür;
+    loglar çağıran isteğin / işin kimlikleriyle yazılır.
+    """
+    import resource
+
+    global _cpu_budget
+    soft, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if cpu_seconds > 0:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        limit = int(usage.ru_utime + usage.ru_stime) + cpu_seconds
+        resource.setrlimit(resource.RLIMIT_CPU, (limit if hard == resource.RLIM_INFINITY else min(limit, hard), hard))
+        _cpu_budget = (_cpu_used(), cpu_seconds)
+    try:
+        with log_context(**log_ids), collect_stages() as stages:
+            result = fn(*args)
+        return result, stages
+    except HTTPException as e:
+        raise _ChildHTTPError(e.status_code, str(e.detail))
+    except _CPUBudgetExceeded:
+        raise _ChildHTTPError(413, "cpu")
+    except MemoryError:
+        raise _ChildHTTPError(413, "memory")
+    finally:
+        _cpu_budget = None
+        resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _child_main(conn, memory_limit_bytes: int) -> None:
+    """Alt sürecin ana döngüsü: kanaldan işleri sırayla alır, sonucu veya hatayı geri yollar."""
+    _init_child(memory_limit_bytes)
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, OSError):
+            return
+        if job is None:  # Kapanış
+            return
+        try:
+            reply = ("ok", _run_in_child(*job))
+        except Exception as e:
+            reply = ("error", e)
+        try:
+            conn.send(reply)
+        except Exception as e:
+            # Sonuç / istisna pickle edilemedi (gönderimden önce olur, kanal bozulmaz)
+            conn.send(("error", RuntimeError(f"{type(e).__name__}: {e}")))
+
+
+class _WallTimeExceeded(Exception):
+    pass
+
+
+class _WorkerCrashed(Exception):
+    pass
+
+
+class _Worker:
+    def __init__(self, context, memory_limit_bytes: int):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_child_main, args=(child_conn, memory_limit_bytes), name="cvoptima-parse", daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def stop(self, timeout: float) -> None:
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class _WorkerPool:
+    """
+    En fazla 'size' alt süreç. 'call' bloklayıcıdır (threadpool'da çağrılır): boş bir alt
+    süreç alır (yoksa açar), işi gönderir ve sonucu en fazla 'timeout' saniye bekler.
+    """
+
+    def __init__(self, size: int, memory_limit_bytes: int):
+        # 'spawn': çok iş parçacıklı (threadpool, HTTP istemcisi) bir süreçten fork güvenli değildir
+        self._context = multiprocessing.get_context("spawn")
+        self._memory_limit_bytes = memory_limit_bytes
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._idle: list[_Worker] = []
+        self._workers: set[_Worker] = set()
+
+    def _take(self) -> _Worker:
+        with self._lock:
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.process.is_alive():
+                    return worker
+                self._workers.discard(worker)
+        worker = _Worker(self._context, self._memory_limit_bytes)
+        with self._lock:
+            self._workers.add(worker)
+        return worker
+
+    def _discard(self, worker: _Worker) -> None:
+        with self._lock:
+            self._workers.discard(worker)
+        worker.kill()
+
+    def call(self, job: tuple, timeout: float) -> tuple[str, object]:
+        self._slots.acquire()
+        worker: Optional[_Worker] = None
+        try:
+            worker = self._take()
+            try:
+                worker.conn.send(job)
+                if not worker.conn.poll(timeout):
+                    # CPU sınırına takılmayan bir bekleme / sonsuz döngü: sadece bu alt süreç öldürülür
+                    self._discard(worker)
+                    worker = None
+                    raise _WallTimeExceeded()
+                return worker.conn.recv()
+            except (EOFError, OSError):
+                # Alt süreç beklenmedik şekilde öldü (örn. bellek sınırında yerel kod çöktü)
+                self._discard(worker)
+                worker = None
+                raise _WorkerCrashed()
+        finally:
+            if worker is not None:
+                with self._lock:
+                    self._idle.append(worker)
+            self._slots.release()
+
+    def close(self) -> None:
+        """Boştaki alt süreçler düzgünce kapatılır; çalışanlar (kapanışta) öldürülür."""
+        with self._lock:
+            workers, self._workers, self._idle = list(self._workers), set(), []
+        for worker in workers:
+            worker.stop(timeout=5)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"processes": len(self._workers), "idle": len(self._idle)}
+
+
+_pool: Optional[_WorkerPool] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> _WorkerPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            from app.core.admission import parse_pool
+
+            _pool = _WorkerPool(parse_pool.capacity, settings.DOCUMENT_MEMORY_LIMIT_MB * _MB)
+        return _pool
+
+
+def shutdown() -> None:
+    """Lifespan kapanışında çağrılır."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
+
+
+async def run_limited(fn: Callable, *args):
+    """
+    'fn(*args)'i (modül seviyesinde, pickle edilebilir bir fonksiyon) sınırlı bir alt süreçte
+    çalıştırır. DOCUMENT_ISOLATION_ENABLED kapalıysa threadpool'da, sınırsız çalışır.
+    """
+    if not settings.DOCUMENT_ISOLATION_ENABLED:
+        return await run_in_threadpool(fn, *args)
+
+    job = (fn, settings.DOCUMENT_CPU_SECONDS, context_ids(), args)
+    try:
+        outcome, value = await run_in_threadpool(_get_pool().call, job, settings.DOCUMENT_WALL_SECONDS)
+    except _WallTimeExceeded:
+        logger.warning(
+            "Belge işleme %s sn'de bitmedi; ayrıştırma alt süreci yeniden başlatılıyor.", settings.DOCUMENT_WALL_SECONDS
+        )
+        raise _too_large("wall_time", "Belge işlenmesi izin verilen süreyi aştı.")
+    except _WorkerCrashed:
+        raise _too_large("crashed", "Belge işlenirken kaynak sınırı aşıldı.")
+
+    if outcome == "error":
+        if isinstance(value, _ChildHTTPError):
+            if value.status_code == 413 and value.detail in ("cpu", "memory"):
+                raise _too_large(
+                    value.detail,
+                    "Belge işlenmesi izin verilen işlemci süresini aştı." if value.detail == "cpu"
+                    else "Belge işlenmesi izin verilen bellek sınırını aştı.",
+                )
+            raise HTTPException(status_code=value.status_code, detail=value.detail)
+        raise value
+
+    result, stages = value
+    for stage, seconds in stages.items():
+        record_stage(stage, seconds)
+    return result
+
+
+def stats() -> dict:
+    pool_stats = _pool.stats() if _pool is not None else {"processes": 0, "idle": 0}
+    return {
+        "isolation_enabled": settings.DOCUMENT_ISOLATION_ENABLED,
+        "pool_started": _pool is not None,
+        **pool_stats,
+        "pid": os.getpid(),
+    }
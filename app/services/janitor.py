@@ -0,0 +1,193 @@
+# app/services/janitor.py
+"""
+Periyodik temizlik görevi:
+
+1. Süresi dolmuş 'shortened_urls' satırlarını toplu (batch) olarak siler.
+2. 'user_uploads' bucket'ındaki nesneleri sayfa sayfa tarar, 'user_cvs.file_path'
+   ile karşılaştırır ve hiçbir satırın referans vermediği (sahipsiz) nesneleri siler.
+
+Uygulamanın lifespan'i içinde (JANITOR_INTERVAL_SECONDS > 0 ise) veya ayrı bir
+komut olarak çalışır:
+
+    python -m app.services.janitor
+"""
+import asyncio
+import fcntl
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+
+from app.core.config import get_settings
+from app.core.http_client import close_http_client
+from app.core.sqlite_store import data_dir
+from app.repositories import cv_repository, link_repository, storage_repository
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Aynı makinedeki worker'lardan yalnızca biri temizlik yapsın diye kullanılan kilit dosyası. Özel
+# dizinde durur: /tmp'de önceden oluşturulup kilitli tutulan (veya symlink) bir dosya janitor'ı durdurur.
+LOCK_PATH = os.path.join(data_dir(), "janitor.lock")
+
+STORAGE_PAGE_SIZE = 100
+PLACEHOLDER_NAME = ".emptyFolderPlaceholder"
+
+
+@dataclass
+class JanitorReport:
+    expired_links_deleted: int = 0
+    storage_objects_scanned: int = 0
+    orphaned_objects_deleted: int = 0
+    errors: int = 0
+    timings: dict[str, float] = field(default_factory=dict)  # Aşama -> milisaniye
+
+
+def _parse_timestamp(value: str | None) -> datetime | None:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+async def purge_expired_links(report: JanitorReport) -> None:
+    """Süresi dolmuş kısa linkleri JANITOR_BATCH_SIZE'lık gruplar halinde siler."""
+    now_iso = datetime.now(timezone.utc).isoformat()
+    while True:
+        ids = await link_repository.list_expired_link_ids(now_iso, settings.JANITOR_BATCH_SIZE)
+        if not ids:
+            return
+        await link_repository.delete_links(ids)
+        report.expired_links_deleted += len(ids)
+        if len(ids) < settings.JANITOR_BATCH_SIZE:
+            return
+        await asyncio.sleep(settings.JANITOR_BATCH_PAUSE_SECONDS)
+
+
+async def _list_all(prefix: str) -> list[dict]:
+    """Bir klasördeki tüm girdileri sayfa sayfa toplar."""
+    entries: list[dict] = []
+    offset = 0
+    while True:
+        page = await storage_repository.list_objects(prefix, STORAGE_PAGE_SIZE, offset)
+        entries.extend(page)
+        if len(page) < STORAGE_PAGE_SIZE:
+            return entries
+        offset += STORAGE_PAGE_SIZE
+        await asyncio.sleep(settings.JANITOR_BATCH_PAUSE_SECONDS)
+
+
+async def remove_orphaned_objects(report: JanitorReport) -> None:
+    """
+    Storage nesnelerini 'user_cvs.file_path' ile uzlaştırır (reconcile).
+    Dosyalar '<user_id>/<uuid>.<uzantı>' düzeninde olduğu için önce kök dizindeki
+    kullanıcı klasörleri, sonra her klasörün içeriği taranır.
+    """
+    grace_cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.STORAGE_ORPHAN_GRACE_SECONDS)
+
+    folders = [entry["name"] for entry in await _list_all("") if entry.get("id") is None]
+
+    for folder in folders:
+        candidates: list[str] = []
+        for entry in await _list_all(folder):
+            if entry.get("id") is None or entry.get("name") == PLACEHOLDER_NAME:
+                continue
+            report.storage_objects_scanned += 1
+            created_at = _parse_timestamp(entry.get("created_at"))
+            # Yeni nesnelere dokunma: yükleme hattında DB kaydı henüz yazılmamış olabilir
+            if created_at is None or created_at > grace_cutoff:
+                continue
+            candidates.append(f"{folder}/{entry['name']}")
+
+        for start in range(0, len(candidates), settings.JANITOR_BATCH_SIZE):
+            batch = candidates[start:start + settings.JANITOR_BATCH_SIZE]
+            referenced = await cv_repository.get_referenced_file_paths(batch)
+            orphans = [path for path in batch if path not in referenced]
+            if orphans:
+                await storage_repository.remove_files(orphans)
+                report.orphaned_objects_deleted += len(orphans)
+                logger.info("Janitor %d sahipsiz Storage nesnesi sildi (%s/).", len(orphans), folder)
+            await asyncio.sleep(settings.JANITOR_BATCH_PAUSE_SECONDS)
+
+
+async def run_janitor_once() -> JanitorReport:
+    """Tüm temizlik adımlarını bir kez çalıştırır ve sayıları/süreleri raporlar."""
+    report = JanitorReport()
+    for stage, step in (("expired_links", purge_expired_links), ("orphaned_objects", remove_orphaned_objects)):
+        started = time.perf_counter()
+        try:
+            await step(report)
+        except Exception as e:
+            # Bir adımın hatası diğerini engellemesin
+            report.errors += 1
+            logger.error("Janitor adımı '%s' başarısız oldu: %s", stage, e)
+        report.timings[stage] = round((time.perf_counter() - started) * 1000, 2)
+    logger.info("Janitor tamamlandı.", extra=asdict(report))
+    return report
+
+
+def _try_acquire_lock():
+    """Kilidi alabilirse dosya nesnesini, alamazsa (başka worker çalışıyor) None döndürür."""
+    lock_file = open(LOCK_PATH, "a+")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return lock_file
+    except BlockingIOError:
+        lock_file.close()
+        return None
+
+
+def _ran_recently(lock_file) -> bool:
+    """Kilit dosyasında son çalışma zamanı tutulur; başka bir worker bu turu zaten yaptıysa True."""
+    lock_file.seek(0)
+    try:
+        last_run = float(lock_file.read().strip() or 0)
+    except ValueError:
+        last_run = 0.0
+    return time.time() - last_run < settings.JANITOR_INTERVAL_SECONDS / 2
+
+
+def _mark_ran(lock_file) -> None:
+    lock_file.seek(0)
+    lock_file.truncate()
+    lock_file.write(str(time.time()))
+    lock_file.flush()
+
+
+async def janitor_loop() -> None:
+    """
+    Lifespan içinde arka planda çalışan döngü. Tüm worker'lar bu döngüyü çalıştırır,
+    ancak her turda kilidi alan ve turu henüz kimsenin yapmadığını gören TEK worker temizlik yapar.
+    """
+    while True:
+        await asyncio.sleep(settings.JANITOR_INTERVAL_SECONDS)
+        lock_file = _try_acquire_lock()
+        if lock_file is None:
+            continue
+        try:
+            if not _ran_recently(lock_file):
+                await run_janitor_once()
+                _mark_ran(lock_file)
+        except Exception:
+            logger.exception("Janitor turu başarısız oldu.")
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+            lock_file.close()
+
+
+async def _main() -> int:
+    try:
+        report = await run_janitor_once()
+    finally:
+        await close_http_client()
+    return 1 if report.errors else 0
+
+
+if __name__ == "__main__":
+    from app.core.logger import configure_logging
+
+    configure_logging(use_queue=False)
+    raise SystemExit(asyncio.run(_main()))
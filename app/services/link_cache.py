@@ -0,0 +1,95 @@
+# app/services/link_cache.py
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.core.config import get_settings
+from app.core.cache import Cache
+
+settings = get_settings()
+
+
+def _decode_pair(value: list) -> tuple[str, datetime]:
+    """L2'den (JSON) okunan [metin, ISO zaman] -> (metin, datetime)."""
+    text, expires_at = value
+    return text, datetime.fromisoformat(expires_at)
+
+# Pozitif önbellek: short_code -> (imzalı URL, son kullanma zamanı)
+# Her girdinin TTL'i linkin kendi son kullanma zamanıyla sınırlıdır.
+# Önbellekler worker'lar arası paylaşılır (bkz. app/core/cache.py): link bir worker'da
+# üretilip başka bir worker'da açılsa da DB'ye gidilmez.
+_links = Cache(
+    "redirect_links",
+    max_entries=settings.REDIRECT_CACHE_MAX_ENTRIES,
+    default_ttl=settings.REDIRECT_CACHE_MAX_TTL_SECONDS,
+    decode=_decode_pair,
+)
+
+# Yeniden kullanım önbelleği: (user_id, cv_id) -> (short_code, son kullanma zamanı)
+# Aynı kullanıcı aynı CV'yi kısa süre içinde tekrar indirmek istediğinde yeni imzalı URL,
+# yeni kısa kod ve yeni 'shortened_urls' satırı üretilmez.
+_issued = Cache(
+    "download_link_reuse",
+    max_entries=settings.REDIRECT_CACHE_MAX_ENTRIES,
+    default_ttl=settings.DOWNLOAD_LINK_TTL_SECONDS,
+    decode=_decode_pair,
+)
+
+# Negatif önbellek: short_code -> HTTP durum kodu (404 bilinmeyen, 410 süresi dolmuş)
+# Tarama / numaralandırma (enumeration) denemelerinin DB'yi dövmesini engeller. Sadece L1: anahtarlar
+# istemciden gelir; paylaşılsaydı her tarama isteği L2 dosyasına bir satır yazardı.
+_missing = Cache(
+    "redirect_negative",
+    max_entries=settings.REDIRECT_NEGATIVE_CACHE_MAX_ENTRIES,
+    default_ttl=settings.REDIRECT_NEGATIVE_TTL_SECONDS,
+    shared=False,
+)
+
+
+async def get_link(short_code: str) -> Optional[tuple[str, datetime]]:
+    """Önbellekteki (URL, expires_at) ikilisini döndürür; yoksa None."""
+    return await _links.get(short_code)
+
+
+async def get_missing_status(short_code: str) -> Optional[int]:
+    """Kod yakın zamanda bulunamadıysa / süresi dolduysa ilgili HTTP durum kodunu döndürür."""
+    return await _missing.get(short_code)
+
+
+async def remember_link(short_code: str, url: str, expires_at: datetime) -> None:
+    remaining = (expires_at - datetime.now(timezone.utc)).total_seconds()
+    ttl = min(settings.REDIRECT_CACHE_MAX_TTL_SECONDS, remaining)
+    if ttl <= 0:
+        await remember_missing(short_code, 410)
+        return
+    await _links.set(short_code, (url, expires_at), ttl=ttl)
+
+
+async def remember_missing(short_code: str, status_code: int = 404) -> None:
+    await _missing.set(short_code, status_code)
+
+
+async def get_reusable_link(user_id: str, cv_id: str) -> Optional[tuple[str, datetime]]:
+    """
+    Bu kullanıcı + CV için daha önce üretilmiş ve hâlâ yeterince uzun geçerli
+    (DOWNLOAD_LINK_REUSE_MIN_REMAINING_SECONDS) bir kısa kod varsa döndürür.
+    """
+    issued = await _issued.get((user_id, cv_id))
+    if issued is None:
+        return None
+    short_code, expires_at = issued
+    remaining = (expires_at - datetime.now(timezone.utc)).total_seconds()
+    if remaining < settings.DOWNLOAD_LINK_REUSE_MIN_REMAINING_SECONDS:
+        return None
+    return issued
+
+
+async def remember_issued_link(user_id: str, cv_id: str, short_code: str, expires_at: datetime) -> None:
+    # Süre eşiğin altına indiğinde girdinin kendiliğinden düşmesi için TTL buna göre kısaltılır
+    ttl = (expires_at - datetime.now(timezone.utc)).total_seconds() - settings.DOWNLOAD_LINK_REUSE_MIN_REMAINING_SECONDS
+    await _issued.set((user_id, cv_id), (short_code, expires_at), ttl=ttl)
+
+
+async def forget_issued_link(user_id: str, cv_id: str) -> None:
+    """CV silindiğinde bu CV için tekrar kullanılabilir linki unut (tüm worker'larda)."""
+    await _issued.delete((user_id, cv_id))
+
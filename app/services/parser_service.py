@@ -1,62 +1,109 @@
 # app/services/parser_service.py
-import pdfplumber
-import docx
 import io
+import logging
+from typing import Optional
 from fastapi import HTTPException, status
+from starlette.concurrency import run_in_threadpool
+from app.core.metrics import PARSE_STAGE_DURATION, timed_stage
+from app.services.document_governor import charge_subprocess_cpu, inspect_document, run_limited
+from app.services.rasterizer import RasterizerError, load_image, rasterize
 
-# --- YENİ İMPORTLAR (OCR İÇİN) ---
-from pdf2image import convert_from_bytes
-import pytesseract
-from PIL import Image
-# --- BİTTİ ---
+logger = logging.getLogger(__name__)
+
+# Not: pdfplumber, python-docx, pypdfium2, pdf2image ve pytesseract ağır import'lardır; worker
+# açılışını yavaşlatmamak için ilk kullanıldıkları fonksiyonun içinde yüklenirler
+# (veya lifespan'deki ön ısıtmada, bkz. 'preload_parsers').
+
+
+def preload_parsers() -> None:
+    """Ayrıştırma/OCR kütüphanelerini önceden yükler ve Tesseract'ın varlığını kontrol eder."""
+    import docx  # noqa: F401
+    import pdfplumber  # noqa: F401
+    import pypdfium2  # noqa: F401
+    import pytesseract
+    from PIL import Image  # noqa: F401
+
+    pytesseract.get_tesseract_version()
+
+
+def parse_text_with_pdfplumber(file_content: bytes, max_pages: Optional[int] = None) -> str:
+    """Plan A (Hızlı Yol): Dijital PDF'ten metin çıkarmayı dener (en fazla 'max_pages' sayfa)."""
+    import pdfplumber
 
-async def parse_text_with_pdfplumber(file_content: bytes) -> str:
-    """Plan A (Hızlı Yol): Dijital PDF'ten metin çıkarmayı dener."""
     text_content = ""
     try:
         with io.BytesIO(file_content) as pdf_file:
             with pdfplumber.open(pdf_file) as pdf:
-                for page in pdf.pages:
+                for page in pdf.pages[:max_pages]:
                     page_text = page.extract_text()
                     if page_text:
                         text_content += page_text + "\n"
     except Exception as e:
-        print(f"Pdfplumber hatası: {e}") # Sadece logla, programı durdurma
+        logger.warning("Pdfplumber hatası: %s", e) # Sadece logla, programı durdurma
         return "" # Hata olursa boş döndür, OCR denesin
     return text_content.strip()
 
-async def parse_text_with_ocr(file_content: bytes) -> str:
-    """Plan B (Yavaş Yol): PDF'i resme dönüştürür ve OCR uygular."""
+def _ocr_image(img) -> str:
+    """Tek bir resim (sayfa) üzerinde OCR."""
+    import pytesseract
+
+    # Türkçe ('tur') ve İngilizce ('eng') dillerini tanımasını söyle
+    # Tesseract'ın bu dilleri bulabilmesi için 'brew install tesseract-lang' gerekir
+    try:
+        with timed_stage("ocr", PARSE_STAGE_DURATION, stage="ocr_page"):
+            text = pytesseract.image_to_string(img, lang='tur+eng')
+        # Tesseract ayrı bir süreçtir: CPU'su belge bütçesine burada eklenir
+        charge_subprocess_cpu()
+        return text
+    except pytesseract.TesseractNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Tesseract OCR motoru sistemde bulunamadı. 'brew install tesseract' yapıldı mı?"
+        )
+
+
+def parse_text_with_ocr(file_content: bytes, max_pages: Optional[int] = None) -> str:
+    """Plan B (Yavaş Yol): PDF sayfalarını gri tonlamalı resme çizer ve OCR uygular."""
     text_content = ""
     try:
-        # 1. PDF 'bytes'larını PIL Image (resim) listesine dönüştür
-        # poppler'ın sistemde kurulu olmasını gerektirir
-        images = convert_from_bytes(file_content)
-        
-        # 2. Her bir resim (sayfa) üzerinde OCR çalıştır
-        for img in images:
-            # Türkçe ('tur') ve İngilizce ('eng') dillerini tanımasını söyle
-            # Tesseract'ın bu dilleri bulabilmesi için 'brew install tesseract-lang' gerekir
-            try:
-                page_text = pytesseract.image_to_string(img, lang='tur+eng')
-                if page_text:
-                    text_content += page_text + "\n"
-            except pytesseract.TesseractNotFoundError:
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail="Tesseract OCR motoru sistemde bulunamadı. 'brew install tesseract' yapıldı mı?"
-                )
+        # Sayfalar tek tek çizilir (bkz. app/services/rasterizer.py): bir sayfa OCR'dayken
+        # diğer sayfalar bellekte beklemez
+        pages = rasterize(file_content, max_pages=max_pages)
+        while True:
+            with timed_stage("rasterize", PARSE_STAGE_DURATION, stage="rasterize"):
+                img = next(pages, None)
+            if img is None:
+                break
+            page_text = _ocr_image(img)
+            if page_text:
+                text_content += page_text + "\n"
+    except HTTPException:
+        raise
     except Exception as e:
-        # pdf2image hatası (örn: poppler kurulu değil) veya Tesseract hatası
-        print(f"OCR Hatası: {e}")
+        # Rasterizer hatası (bozuk PDF, arka uç yok) veya Tesseract hatası
+        logger.error("OCR hatası: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"OCR ayrıştırması sırasında beklenmedik hata: {str(e)}"
         )
     return text_content.strip()
 
-async def parse_docx(file_content: bytes) -> str:
+def parse_image(file_content: bytes) -> str:
+    """Fotoğraf / taranmış resim (JPG, PNG): rasterize adımı olmadan doğrudan OCR."""
+    try:
+        img = load_image(file_content)
+    except RasterizerError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Resim dosyası okunamadı: {str(e)}"
+        )
+    return _ocr_image(img).strip()
+
+
+def parse_docx(file_content: bytes) -> str:
     """DOCX dosyalarını ayrıştırır."""
+    import docx
+
     text_content = ""
     try:
         with io.BytesIO(file_content) as docx_file:
@@ -65,7 +112,7 @@ async def parse_docx(file_content: bytes) -> str:
                 if para.text:
                     text_content += para.text + "\n"
     except Exception as e:
-        print(f"DOCX Parser Hatası: {e}")
+        logger.error("DOCX parser hatası: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"DOCX dosyası işlenirken hata oluştu: {str(e)}"
@@ -73,32 +120,66 @@ async def parse_docx(file_content: bytes) -> str:
     return text_content.strip()
 
 
-async def parse_document_to_text(file_content: bytes, filename: str) -> str:
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx') + IMAGE_EXTENSIONS
+
+
+def ensure_supported_format(filename: str) -> None:
+    """Pahalı işlere (parse, Storage yüklemesi) başlamadan önce dosya uzantısını kontrol eder."""
+    if not filename or not filename.lower().endswith(SUPPORTED_EXTENSIONS):
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Desteklenmeyen dosya formatı. Lütfen .pdf, .docx, .jpg veya .png yükleyin."
+        )
+
+
+def _parse_document_sync(file_content: bytes, filename: str, page_limit: Optional[int] = None) -> str:
     """
-    Ana ayrıştırma fonksiyonu. Dosya tipine göre doğru yöntemi seçer.
-    PDF'ler için "Plan A / Plan B" fallback mantığını uygular.
+    CPU-yoğun ayrıştırma adımları (pdfplumber, OCR, python-docx). Sınırlı bir alt süreçte
+    (veya DOCUMENT_ISOLATION_ENABLED kapalıysa threadpool'da) çalışır; bkz. document_governor.
     """
     text_content = ""
-    
+    filename = filename.lower()
+
     if filename.endswith('.pdf'):
         # Plan A: Önce hızlı (dijital) yolu dene
-        text_content = await parse_text_with_pdfplumber(file_content)
+        with timed_stage("pdfplumber", PARSE_STAGE_DURATION, stage="pdfplumber"):
+            text_content = parse_text_with_pdfplumber(file_content, page_limit)
         
         # Plan B: Hızlı yol başarısız olursa (boş metin dönerse),
         # yavaş (OCR) yolu dene.
         if not text_content:
-            print(f"Bilgi: '{filename}' için dijital metin bulunamadı. OCR deneniyor...")
-            text_content = await parse_text_with_ocr(file_content)
+            logger.info("Dijital metin bulunamadı, OCR deneniyor.", extra={"file_name": filename})
+            text_content = parse_text_with_ocr(file_content, page_limit)
 
     elif filename.endswith('.docx'):
-        text_content = await parse_docx(file_content)
-        
-    else:
-        raise HTTPException(
-            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
-            detail="Desteklenmeyen dosya formatı. Lütfen .pdf veya .docx yükleyin."
+        with timed_stage("docx", PARSE_STAGE_DURATION, stage="docx"):
+            text_content = parse_docx(file_content)
+
+    elif filename.endswith(IMAGE_EXTENSIONS):
+        # CV fotoğrafı: rasterize adımı yok, resim doğrudan OCR'a verilir
+        text_content = parse_image(file_content)
+
+    return text_content
+
+
+async def parse_document_to_text(file_content: bytes, filename: str) -> str:
+    """
+    Ana ayrıştırma fonksiyonu. Dosya tipine göre doğru yöntemi seçer.
+    PDF'ler için "Plan A / Plan B" fallback mantığını uygular.
+    Önce ucuz ön kontrol (sayfa sayısı / boyutu, zip boyutları) yapılır; ayrıştırma (OCR
+    dahil) CPU ve bellek bütçeli bir alt süreçte çalışır (bkz. document_governor).
+    """
+    ensure_supported_format(filename)
+
+    plan = await run_in_threadpool(inspect_document, file_content, filename)
+    if plan.truncated:
+        logger.info(
+            "Belge %d sayfa; sadece ilk %d sayfa işlenecek.", plan.page_count, plan.page_limit, extra={"file_name": filename}
         )
 
+    text_content = await run_limited(_parse_document_sync, file_content, filename, plan.page_limit)
+
     # Her iki (veya üç) yöntem de başarısız olduysa
     if not text_content:
         raise HTTPException(
@@ -0,0 +1,158 @@
+# app/services/rasterizer.py
+"""
+Taranmış PDF sayfalarını OCR için resme dönüştürür (rasterize).
+
+İki arka uç vardır:
+
+- 'pdfium'  : pypdfium2 (pdfplumber'ın bağımlılığı, zaten kurulu). Sayfayı süreç içinde,
+              doğrudan hedef DPI'da gri tonlamalı bir bellek tamponuna çizer. Alt süreç,
+              pipe ve PPM kodlama / çözme maliyeti yoktur.
+- 'poppler' : pdf2image -> 'pdftoppm' alt süreci. Yedek: pdfium belgeyi açamazsa kullanılır.
+
+Sayfalar tek tek üretilir (generator); tüm belge aynı anda bellekte tutulmaz.
+PDFium iş parçacığı güvenli (thread-safe) değildir: çağrılar süreç genelinde bir kilitle
+sıralanır. Kilit sadece sayfa çizimi sürer; OCR (Tesseract) paralel çalışmaya devam eder.
+"""
+import io
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Iterator, Optional
+
+from app.core.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# PDFium çağrıları süreç genelinde bu kilitle sıralanır (belge ön kontrolü de kullanır)
+PDFIUM_LOCK = threading.Lock()
+
+
+class RasterizerError(Exception):
+    """Belge bu arka uçla açılamadı / çizilemedi."""
+
+
+class Rasterizer(ABC):
+    name = "base"
+
+    @abstractmethod
+    def available(self) -> bool: ...
+
+    @abstractmethod
+    def render(self, file_content: bytes, dpi: int, max_pages: Optional[int] = None) -> Iterator:
+        """Sayfaları (en fazla 'max_pages') sırayla gri tonlamalı ('L' kipinde) PIL Image olarak üretir."""
+
+
+class PdfiumRasterizer(Rasterizer):
+    name = "pdfium"
+
+    def available(self) -> bool:
+        try:
+            import pypdfium2  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def render(self, file_content: bytes, dpi: int, max_pages: Optional[int] = None) -> Iterator:
+        import pypdfium2
+
+        with PDFIUM_LOCK:
+            try:
+                pdf = pypdfium2.PdfDocument(file_content)
+                page_count = min(len(pdf), max_pages or len(pdf))
+            except pypdfium2.PdfiumError as e:
+                raise RasterizerError(str(e)) from e
+        try:
+            for index in range(page_count):
+                with PDFIUM_LOCK:
+                    page = pdf[index]
+                    try:
+                        # PDF birimi 1/72 inç: ölçek = DPI / 72. 'grayscale' ile tampon doğrudan 8-bit gri
+                        image = page.render(scale=dpi / 72, grayscale=True).to_pil()
+                    finally:
+                        page.close()
+                yield image if image.mode == "L" else image.convert("L")
+        finally:
+            with PDFIUM_LOCK:
+                pdf.close()
+
+
+class PopplerRasterizer(Rasterizer):
+    name = "poppler"
+
+    def available(self) -> bool:
+        try:
+            from pdf2image import pdfinfo_from_bytes  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def render(self, file_content: bytes, dpi: int, max_pages: Optional[int] = None) -> Iterator:
+        from pdf2image import convert_from_bytes, pdfinfo_from_bytes
+        from pdf2image.exceptions import PDFInfoNotInstalledError, PDFPageCountError
+
+        try:
+            page_count = pdfinfo_from_bytes(file_content)["Pages"]
+        except (PDFInfoNotInstalledError, PDFPageCountError) as e:
+            raise RasterizerError(str(e)) from e
+        page_count = min(page_count, max_pages or page_count)
+        # Sayfa sayfa çağrılır ki tüm sayfalar aynı anda bellekte olmasın
+        for page_number in range(1, page_count + 1):
+            images = convert_from_bytes(
+                file_content, dpi=dpi, grayscale=True, first_page=page_number, last_page=page_number
+            )
+            for image in images:
+                yield image
+
+
+BACKENDS: dict[str, Rasterizer] = {
+    backend.name: backend for backend in (PdfiumRasterizer(), PopplerRasterizer())
+}
+
+
+def _candidates() -> list[Rasterizer]:
+    """Ayardaki sıraya göre kullanılabilir arka uçlar ('auto': pdfium, sonra poppler)."""
+    names = ["pdfium", "poppler"] if settings.RASTERIZER_BACKEND == "auto" else [settings.RASTERIZER_BACKEND]
+    return [BACKENDS[name] for name in names if name in BACKENDS and BACKENDS[name].available()]
+
+
+def rasterize(file_content: bytes, dpi: int | None = None, max_pages: Optional[int] = None) -> Iterator:
+    """
+    PDF sayfalarını gri tonlamalı resimler olarak üretir. İlk arka uç belgeyi daha ilk
+    sayfada açamazsa bir sonrakine geçilir; sayfa üretildikten sonraki hatalar yansıtılır
+    (yarım kalmış OCR çıktısı iki kez üretilmesin).
+    """
+    dpi = dpi or settings.OCR_DPI
+    candidates = _candidates()
+    if not candidates:
+        raise RasterizerError("Kullanılabilir bir PDF rasterizer bulunamadı (pypdfium2 / pdf2image).")
+
+    last_error: Exception | None = None
+    for backend in candidates:
+        produced = False
+        try:
+            for image in backend.render(file_content, dpi, max_pages):
+                produced = True
+                yield image
+            return
+        except RasterizerError as e:
+            if produced:
+                raise
+            logger.warning("'%s' rasterizer belgeyi açamadı, sıradaki deneniyor: %s", backend.name, e)
+            last_error = e
+    raise RasterizerError(str(last_error))
+
+
+def load_image(file_content: bytes):
+    """
+    Fotoğraf / taranmış resim (JPG, PNG): rasterize adımı olmadan OCR'a hazır gri tonlamalı resim.
+    Telefon fotoğraflarındaki EXIF yönü uygulanır.
+    """
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    try:
+        image = Image.open(io.BytesIO(file_content))
+        image = ImageOps.exif_transpose(image)
+    except (UnidentifiedImageError, OSError) as e:
+        raise RasterizerError(str(e)) from e
+    return image if image.mode == "L" else image.convert("L")
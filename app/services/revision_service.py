@@ -0,0 +1,146 @@
+# app/services/revision_service.py
+"""
+Revize CV'ler için artımlı (incremental) analiz.
+
+Tipik döngü: analiz -> önerileri uygula -> v2'yi yükle (parent_cv_id ile) -> tekrar analiz.
+v2 analiz edilirken, üst sürümün (parent) AYNI ilan için tamamlanmış analizi varsa:
+
+- Bölüm farkı yoksa önceki sonuç aynen kullanılır (LLM çağrısı yok).
+- Değişiklik küçükse sadece etkilenen alanlar yeniden üretilir: cv_keywords,
+  gap_analysis ve değişen içeriğe atıf yapan öneriler. job_keywords, ön yazı ve
+  değişmeyen içerikle ilgili öneriler önceki sonuçtan alınır. İlan metni ve CV'nin
+  tamamı yerine sadece değişen bölümler gönderildiği için istek de yanıt da çok küçüktür.
+- Değişiklik büyükse (REVISION_MAX_CHANGED_RATIO) veya önceki sonuç yoksa tam analiz.
+"""
+import asyncio
+from dataclasses import dataclass, field
+from typing import Optional
+
+from pydantic import ValidationError
+
+from app.core.config import get_settings
+from app.core.metrics import ANALYSIS_RUNS
+from app.repositories import analysis_repository, cv_repository
+from app.schemas.analysis_schema import FullAnalysisResponse, Suggestion
+from app.services.ai_service import run_full_analysis, run_revision_analysis
+from app.services.cv_sections import Section, SectionDiff, diff_sections, split_sections, stored_sections
+from app.services.text_processing import analyze
+
+settings = get_settings()
+
+MAX_SUGGESTIONS = 5
+# Bir öneri, değişen içeriğe özgü en az bu kadar terimi paylaşıyorsa ondan etkilenmiş sayılır
+_SUGGESTION_OVERLAP_TERMS = 2
+
+
+@dataclass
+class AnalysisPlan:
+    mode: str  # "full", "incremental" veya "reused"
+    previous: Optional[FullAnalysisResponse] = None
+    base_task_id: Optional[str] = None
+    diff: Optional[SectionDiff] = None
+    kept_suggestions: list[Suggestion] = field(default_factory=list)
+    new_suggestion_count: int = 0
+
+    @property
+    def needs_llm(self) -> bool:
+        return self.mode != "reused"
+
+
+async def _previous_result(parent_cv_id: str, user_id: str, job_description_text: str) -> tuple[Optional[str], Optional[FullAnalysisResponse]]:
+    """Üst sürümün aynı ilan için en son tamamlanmış analizi (yoksa / okunamıyorsa None)."""
+    for job in await analysis_repository.list_completed_jobs_for_cv(parent_cv_id, user_id):
+        if job.get("job_description_text") != job_description_text:
+            continue
+        result = dict(job.get("result") or {})
+        result.pop("schema_version", None)
+        try:
+            return job["id"], FullAnalysisResponse.model_validate(result)
+        except ValidationError:
+            return None, None
+    return None, None
+
+
+def _affected_suggestions(previous: FullAnalysisResponse, diff: SectionDiff) -> tuple[list[Suggestion], int]:
+    """Önerileri değişen içeriğe atıf yapanlar (düşülür) ve diğerleri (korunur) olarak ayırır."""
+    changed_text = " ".join(
+        [old.text + " " + new.text for old, new in diff.changed]
+        + [section.text for section in diff.added + diff.removed]
+    )
+    unchanged_terms = set(analyze(" ".join(section.text for section in diff.unchanged)))
+    # Sadece değişen içeriğe özgü terimler (değişmeyen bölümlerde de geçen genel terimler hariç)
+    changed_terms = set(analyze(changed_text)) - unchanged_terms
+
+    kept, dropped = [], 0
+    for suggestion in previous.suggestions:
+        terms = set(analyze(f"{suggestion.suggestion_title} {suggestion.suggestion_detail} {suggestion.cv_example}"))
+        if len(terms & changed_terms) >= _SUGGESTION_OVERLAP_TERMS:
+            dropped += 1
+        else:
+            kept.append(suggestion)
+    return kept, dropped
+
+
+def _sections(cv_text: str, cv_sections: Optional[dict]) -> list[Section]:
+    """Yüklemede kaydedilmiş bölümler; yoksa (eski CV) metin yeniden bölünür."""
+    sections = stored_sections(cv_sections)
+    return sections if sections is not None else split_sections(cv_text)
+
+
+async def plan_analysis(
+    user_id: str,
+    cv_text: str,
+    parent_cv_id: Optional[str],
+    job_description_text: str,
+    cv_sections: Optional[dict] = None,
+) -> AnalysisPlan:
+    if not parent_cv_id or not settings.REVISION_INCREMENTAL_ENABLED:
+        return AnalysisPlan("full")
+
+    (base_task_id, previous), parent = await asyncio.gather(
+        _previous_result(parent_cv_id, user_id, job_description_text),
+        cv_repository.get_cv(parent_cv_id, user_id, "cv_text_content, cv_sections"),
+    )
+    if previous is None or not parent or not parent.get("cv_text_content"):
+        return AnalysisPlan("full")
+
+    diff = diff_sections(
+        _sections(parent["cv_text_content"], parent.get("cv_sections")),
+        _sections(cv_text, cv_sections),
+    )
+    if not diff.has_changes:
+        return AnalysisPlan("reused", previous, base_task_id, diff)
+    if diff.changed_ratio > settings.REVISION_MAX_CHANGED_RATIO:
+        return AnalysisPlan("full", previous, base_task_id, diff)
+
+    kept, dropped = _affected_suggestions(previous, diff)
+    new_count = min(MAX_SUGGESTIONS - len(kept), max(dropped, 1))
+    return AnalysisPlan("incremental", previous, base_task_id, diff, kept, max(new_count, 0))
+
+
+def execute(plan: AnalysisPlan, cv_text: str, job_description_text: str) -> FullAnalysisResponse:
+    """Planı çalıştırır (SENKRON; LLM çağrısı gerekiyorsa threadpool'da çağrılmalıdır)."""
+    ANALYSIS_RUNS.labels(plan.mode).inc()
+    if plan.mode == "reused":
+        return plan.previous
+    if plan.mode == "full":
+        return run_full_analysis(cv_text, job_description_text)
+
+    changed_sections = (
+        [(new.title or "(başlıksız)", old.text, new.text) for old, new in plan.diff.changed]
+        + [(section.title or "(başlıksız)", "", section.text) for section in plan.diff.added]
+        + [(section.title or "(başlıksız)", section.text, "") for section in plan.diff.removed]
+    )
+    revision = run_revision_analysis(
+        plan.previous,
+        changed_sections,
+        [suggestion.suggestion_title for suggestion in plan.kept_suggestions],
+        plan.new_suggestion_count,
+    )
+    return FullAnalysisResponse(
+        job_keywords=plan.previous.job_keywords,
+        cv_keywords=revision.cv_keywords,
+        gap_analysis=revision.gap_analysis,
+        suggestions=plan.kept_suggestions + revision.suggestions[: plan.new_suggestion_count],
+        cover_letter_draft=plan.previous.cover_letter_draft,
+    )
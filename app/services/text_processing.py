@@ -0,0 +1,168 @@
+# app/services/text_processing.py
+"""
+Türkçe'ye duyarlı metin işleme: küçük harfe çevirme, parçalama (tokenization),
+durak kelimeler ve hafif (kural tabanlı) kök bulma.
+
+CV'ler ve ilanlar çoğunlukla Türkçe + İngilizce karışıktır; teknik terimler
+("c++", "c#", "node.js") tek parça korunur. Kök bulma sözlüksüz ve agresif değildir:
+amaç "deneyimlerimde" / "deneyim" / "deneyimli" gibi biçimleri aynı terimde toplamaktır,
+dilbilimsel olarak doğru kök bulmak değil. Aynı fonksiyon hem belgelere hem sorgulara
+uygulandığı için tutarlılık doğruluktan önemlidir.
+"""
+import re
+import unicodedata
+from collections import Counter
+
+# "I" -> "ı" ve "İ" -> "i": str.lower() Türkçe'de yanlış sonuç verir ("İ".lower() == "i̇")
+_TURKISH_UPPER = str.maketrans({"I": "ı", "İ": "i"})
+# Ünsüz yumuşaması: "ekibi" -> "ekib" -> "ekip", "kitabı" -> "kitap"
+_HARDEN = {"b": "p", "c": "ç", "d": "t", "ğ": "k"}
+# Kök bulduktan SONRA uygulanır: "geliştirdim" ile "gelistirdim" aynı terime düşer
+_ASCII_FOLD = str.maketrans("çğıöşüâîû", "cgiosuaiu")
+
+_TOKEN_RE = re.compile(r"[^\W\d_][\w]*(?:[+#]+|(?:\.(?:js|net|py|io))\b)?", re.UNICODE)
+
+STOPWORDS = frozenset(
+    """
+    acaba ama ancak artık aslında az bana bazı belki ben beni benim beri bile bir biri birkaç
+    birçok biz bize bizi bizim bu buna bunda bundan bunu bunun burada çok çünkü da daha de
+    defa değil diğer diye dolayı edecek eden ederek edilen ediyor en gibi göre hem hep hepsi
+    her hiç için ile ilgili ise işte kadar karşı kendi kendine ki kim kimse mi mı mu mü nasıl
+    ne neden nerede niye o olan olarak oldu olduğu olduğunu olmak olması olup olur olursa
+    on ona onlar onu onun öyle pek sadece sanki siz şey şu şöyle tarafından tüm ve veya ya
+    yani yapılan yaptı yer yine yok zaten
+
+    a about above after all also an and any are as at be been being both but by can could
+    did do does doing each for from further had has have having he her here his how i if in
+    into is it its just more most my no nor not of on once only or other our out over own
+    same she should so some such than that the their them then there these they this those
+    through to too under until up very was we were what when where which while who whom why
+    will with would you your
+    """.split()
+)
+
+# Türkçe çekim / yapım ekleri; uzundan kısaya denenir (ilk eşleşen atılır). Yalın geçmiş
+# zaman ekleri ("-dı", "-ti") yoktur: isimlerin sonunu yer ("analisti", "mühendisi").
+_SUFFIXES = tuple(sorted(
+    """
+    lerinden larından lerinde larında lerimiz larımız lerini larını lerine larına
+    lerim larım ler lar leri ları lerin ların lere lara lerde larda
+    imiz ımız umuz ümüz iniz ınız unuz ünüz
+    ndan nden dan den tan ten nda nde da de ta te
+    nın nin nun nün ın in un ün
+    yla yle la le
+    sı si su sü yı yi yu yü ya ye
+    lık lik luk lük lı li lu lü sız siz suz süz
+    cı ci cu cü çı çi çu çü
+    dım dim dum düm tım tim tum tüm
+    mış miş muş müş yor ıyor iyor uyor üyor
+    """.split(),
+    key=len,
+    reverse=True,
+))
+# İyelik ekinin içinde sadece yapım ekleri kalabilir ("yönetici-si"); çekim / fiil eki aranmaz
+# ("mühendi-si" -> "mühen" olmasın)
+_POSSESSIVES = frozenset("sı si su sü leri ları lerini larını".split())
+_DERIVATIONAL_SUFFIXES = tuple(
+    suffix for suffix in _SUFFIXES if suffix in "lık lik luk lük lı li lu lü sız siz suz süz cı ci cu cü çı çi çu çü".split()
+)
+_VOWELS = frozenset("aeıioöuü")
+_VOICELESS = frozenset("çfhkpsşt")
+# Dar ünlü uyumu: son ünlü -> iyelik / belirtme eki ünlüsü ("model-i", "okul-u"; "fastap-i" değil)
+_HIGH_VOWEL_FOR = {"a": "ı", "ı": "ı", "o": "u", "u": "u", "e": "i", "i": "i", "ö": "ü", "ü": "ü"}
+# Kökün son ünsüzü mü, ekin kaynaştırma ünsüzü mü sözlüksüz ayırt edilemeyenler ("servis-i" /
+# "proje-si", "model-i" / "kalite-li", "deney-i" / "proje-yi"): ünlüden sonra gelince düşülür
+_AMBIGUOUS_FINALS = frozenset("lsy")
+_MIN_STEM = 3
+_MAX_PASSES = 3
+
+
+def turkish_lower(word: str) -> str:
+    """
+    Türkçe küçük harf. İki veya daha fazla büyük harf içeren kelimeler ("FastAPI",
+    "SQL") kısaltma / marka sayılır ve 'I' -> 'i' olarak çevrilir ("fastapı" olmasın).
+    """
+    word = word.replace("İ", "i")
+    if sum(char.isupper() for char in word) >= 2 and not any(char in "ÇĞÖŞÜ" for char in word):
+        return word.lower()
+    return word.translate(_TURKISH_UPPER).lower()
+
+
+def _can_strip(token: str, suffix: str) -> bool:
+    stem = token[: -len(suffix)]
+    if len(stem) < _MIN_STEM:
+        return False
+    if suffix[0] in "dc":
+        # Ünsüz benzeşmesi: "geliştir-dim", "eğitim-de"; "yönet-tim", "şirket-te" (t/ç ile)
+        return stem[-1] not in _VOICELESS
+    if suffix[0] in "tç":
+        return stem[-1] in _VOICELESS  # "eği-tim", "yöne-tim" geçmiş zaman değil
+    if suffix[0] in "sy" and suffix not in ("sız", "siz", "suz", "süz"):
+        return stem[-1] in _VOWELS     # Kaynaştırma ünsüzü sadece ünlüden sonra gelir
+    return True
+
+
+def _normalize_tail(token: str) -> str:
+    """
+    Sözlüksüz ayırt edilemeyen sonları her iki tarafta aynı biçime indirir: ünlüden sonraki
+    l/s/y düşülür ("servis" ve "servi-si" -> "servi"), sonra uyumlu dar ünlü iyelik / belirtme
+    eki sayılır ("yönetim-i", "servi" -> "serv"). Uyumsuz ünlüye dokunulmaz ("fastapi", "java").
+    """
+    if len(token) > _MIN_STEM and token[-1] in _AMBIGUOUS_FINALS and token[-2] in _VOWELS:
+        token = token[:-1]
+    if len(token) > _MIN_STEM and token[-1] in _VOWELS and token[-2] not in _VOWELS:
+        last_vowel = next((char for char in reversed(token[:-1]) if char in _VOWELS), None)
+        if last_vowel is not None and _HIGH_VOWEL_FOR[last_vowel] == token[-1]:
+            token = token[:-1]
+    return token
+
+
+def stem(token: str) -> str:
+    """
+    Sondan ek atarak kaba kök bulur. Rakam veya teknik karakter ('+', '#', '.')
+    içeren terimlere dokunulmaz. Kök en az _MIN_STEM harf kalır.
+    """
+    if not token.isalpha():
+        return token
+    original = token
+    candidates = _SUFFIXES
+    for _ in range(_MAX_PASSES):
+        suffix = next((suffix for suffix in candidates if token.endswith(suffix) and _can_strip(token, suffix)), None)
+        if suffix is None:
+            break
+        token = token[: -len(suffix)]
+        if suffix in _POSSESSIVES:
+            candidates = _DERIVATIONAL_SUFFIXES
+    token = _normalize_tail(token)
+    if token != original and token[-1] in _HARDEN:
+        token = token[:-1] + _HARDEN[token[-1]]
+    return token
+
+
+def tokenize(text: str) -> list[str]:
+    """Küçük harfe çevrilmiş, durak kelimelerden arındırılmış ham terimler."""
+    tokens = (turkish_lower(word) for word in _TOKEN_RE.findall(unicodedata.normalize("NFC", text)))
+    return [token for token in tokens if len(token) > 1 and token not in STOPWORDS]
+
+
+def normalize_term(token: str) -> str:
+    return stem(token).translate(_ASCII_FOLD)
+
+
+def analyze(text: str) -> Counter:
+    """Metni indekslenecek terim -> frekans sayımına çevirir."""
+    return Counter(normalize_term(token) for token in tokenize(text))
+
+
+def analyze_with_surface(text: str) -> tuple[Counter, dict[str, str]]:
+    """
+    'analyze' ile aynı, ayrıca her terim için metinde en sık geçen yüzey biçimini
+    döndürür (kullanıcıya "deney" yerine "deneyim" göstermek için).
+    """
+    counts: Counter = Counter()
+    surfaces: dict[str, Counter] = {}
+    for token in tokenize(text):
+        term = normalize_term(token)
+        counts[term] += 1
+        surfaces.setdefault(term, Counter())[token] += 1
+    return counts, {term: forms.most_common(1)[0][0] for term, forms in surfaces.items()}
@@ -0,0 +1,224 @@
+# app/services/upload_service.py
+import asyncio
+import hashlib
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Awaitable, Optional, TypeVar
+
+from fastapi import HTTPException, status
+from starlette.concurrency import run_in_threadpool
+
+from app.core.admission import parse_pool
+from app.core.cache import Cache
+from app.core.config import get_settings
+from app.core.metrics import PARSE_STAGE_DURATION, timed_stage
+from app.repositories import cv_repository, storage_repository
+from app.services import cv_ranking_service
+from app.services.cv_sections import CV_SECTIONS_VERSION, segment_cv
+from app.services.parser_service import ensure_supported_format, parse_document_to_text
+
+T = TypeVar("T")
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Ayrıştırılmış metin + bölümler, dosya içeriğinin özetine (SHA-256) göre: aynı dosyanın
+# tekrar yüklenmesi (revizyon denemeleri, toplu yüklemedeki kopyalar) OCR'ı tekrarlamaz.
+# Sürüm, segmentasyon biçiminin sürümüdür. CV metni kişisel veridir: sadece L1, diske yazılmaz.
+_parsed = Cache(
+    "parsed_text",
+    max_entries=settings.PARSED_TEXT_CACHE_MAX_ENTRIES,
+    default_ttl=settings.PARSED_TEXT_CACHE_TTL_SECONDS,
+    version=CV_SECTIONS_VERSION,
+    shared=False,
+)
+
+
+@dataclass
+class CVIngestResult:
+    """Yükleme hattının (pipeline) sonucu."""
+    cv_id: str
+    file_name: str
+    storage_path: str
+    timings: dict[str, float] = field(default_factory=dict)  # Aşama -> milisaniye
+
+
+def build_storage_path(user_id: str, file_name: str) -> str:
+    """Dosya için benzersiz bir depolama yolu: '<user_id>/<uuid>.<uzantı>'."""
+    file_extension = f".{file_name.rsplit('.', 1)[-1]}" if "." in file_name else ""
+    # Mimari Not: Dosyaları 'user.id'ye göre klasörlemek en iyi pratiktir.
+    return f"{user_id}/{uuid.uuid4()}{file_extension}"
+
+
+async def _timed(stage: str, timings: dict[str, float], awaitable: Awaitable[T]) -> T:
+    started = time.perf_counter()
+    try:
+        return await awaitable
+    finally:
+        timings[stage] = round((time.perf_counter() - started) * 1000, 2)
+
+
+async def rollback_storage_upload(storage_path: str, timings: Optional[dict[str, float]] = None) -> None:
+    """
+    Telafi (compensating) adımı: sonraki bir adım başarısız olduğunda Storage'a
+    yüklenmiş nesneyi siler. İstek iptal edilse bile silme tamamlansın diye 'shield' edilir.
+    """
+    try:
+        await asyncio.shield(
+            _timed("rollback", timings if timings is not None else {}, storage_repository.remove_files([storage_path]))
+        )
+        logger.info("Rollback: Storage nesnesi silindi.", extra={"storage_path": storage_path})
+    except Exception as e:
+        # Janitor ileride sahipsiz nesneleri temizleyebilir; burada sadece logla
+        logger.warning("Rollback başarısız, Storage nesnesi sahipsiz kaldı: %s", e, extra={"storage_path": storage_path})
+
+
+@dataclass
+class PreparedCV:
+    """Ayrıştırılmış ve Storage'a yüklenmiş, ancak henüz DB'ye yazılmamış CV."""
+    file_name: str
+    storage_path: str
+    text: str
+    sections: Optional[dict] = None  # Tipli bölümler (bkz. cv_sections.segment_cv)
+
+
+async def _bounded(limiter: Optional[asyncio.Semaphore], awaitable: Awaitable[T]) -> T:
+    """Toplu işlemlerde eşzamanlılığı sınırlamak için (limiter None ise sınırsız)."""
+    if limiter is None:
+        return await awaitable
+    async with limiter:
+        return await awaitable
+
+
+async def prepare_cv(
+    user_id: str,
+    file_name: str,
+    content_type: Optional[str],
+    file_content: bytes,
+    timings: dict[str, float],
+    parse_limiter: Optional[asyncio.Semaphore] = None,
+    upload_limiter: Optional[asyncio.Semaphore] = None,
+    interactive: bool = True,
+) -> PreparedCV:
+    """
+    1. Dosya uzantısı kontrol edilir (ucuz, her şeyden önce).
+    2. Ayrıştırma kapasitesi ayırtılır (bkz. app/core/admission.py). Etkileşimli
+       isteklerde bu, Storage yüklemesi başlamadan yapılır: sunucu yoğunsa hemen 503.
+       Arka plan işleri ('interactive=False') reddedilmez, adil sıraya girer.
+    3. Ayrıştırma (parse/OCR) ve Storage yüklemesi AYNI ANDA başlatılır;
+       Storage yüklemesi ayrıştırma sonucuna bağlı değildir.
+    4. Ayrıştırılan metin tipli bölümlere ayrılır (segmentasyon; bir kez, burada).
+    5. Ayrıştırma başarısız olursa yüklenen nesne otomatik silinir.
+    """
+    ensure_supported_format(file_name)
+    parse_ticket = parse_pool.admit(user_id) if interactive else None
+
+    async def parse() -> tuple[str, dict]:
+        digest = await run_in_threadpool(lambda: hashlib.sha256(file_content).hexdigest())
+        cache_key = (digest, file_name.rsplit(".", 1)[-1].lower())
+        cached = await _parsed.get(cache_key)
+        if cached is not None:
+            if parse_ticket is not None:
+                parse_ticket.cancel()  # Ayrıştırma kapasitesi kullanılmadı
+            return cached
+
+        ticket = parse_ticket or parse_pool.reserve(user_id, enforce_deadline=False)
+        async with ticket:
+            text = await parse_document_to_text(file_content, file_name)
+            with timed_stage("segment", PARSE_STAGE_DURATION, stage="segment"):
+                sections = await run_in_threadpool(segment_cv, text)
+        await _parsed.set(cache_key, (text, sections))
+        return text, sections
+
+    storage_path = build_storage_path(user_id, file_name)
+
+    parse_result, upload_result = await asyncio.gather(
+        _timed("parse", timings, _bounded(parse_limiter, parse())),
+        _timed(
+            "storage_upload",
+            timings,
+            _bounded(upload_limiter, storage_repository.upload_file(storage_path, file_content, content_type)),
+        ),
+        return_exceptions=True,
+    )
+    uploaded = not isinstance(upload_result, BaseException)
+
+    try:
+        if isinstance(parse_result, HTTPException):
+            # parser_service'den gelen (415, 400, 500) hataları yansıt
+            raise parse_result
+        if isinstance(parse_result, BaseException):
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Dosya ayrıştırma sırasında beklenmedik hata: {str(parse_result)}"
+            )
+        if not uploaded:
+            logger.error("Supabase Storage'a yüklenemedi: %s", upload_result)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Dosya depolama alanına (Storage) yüklenirken hata oluştu: {str(upload_result)}"
+            )
+    except BaseException:
+        if uploaded:
+            await rollback_storage_upload(storage_path, timings)
+        raise
+
+    text, sections = parse_result
+    return PreparedCV(file_name=file_name, storage_path=storage_path, text=text, sections=sections)
+
+
+def build_cv_row(user_id: str, prepared: PreparedCV, parent_cv_id: Optional[str] = None) -> dict:
+    """'user_cvs' tablosuna eklenecek satır."""
+    row = {
+        "file_name": prepared.file_name,        # Orijinal adı
+        "cv_text_content": prepared.text,       # OCR'dan gelen metin
+        "cv_sections": prepared.sections,       # Tipli bölümler (segmentasyon)
+        "file_path": prepared.storage_path,     # Storage'daki yolu
+        "user_id": user_id,
+    }
+    if parent_cv_id is not None:
+        row["parent_cv_id"] = parent_cv_id      # Revizyon: önceki sürüm
+    return row
+
+
+async def ingest_cv(
+    user_id: str,
+    file_name: str,
+    content_type: Optional[str],
+    file_content: bytes,
+    parent_cv_id: Optional[str] = None,
+) -> CVIngestResult:
+    """
+    Tek bir CV için yükleme hattı: ayrıştırma + Storage yüklemesi (eşzamanlı,
+    bkz. 'prepare_cv'), ardından 'user_cvs' satırı eklenir.
+    DB kaydı başarısız olursa yüklenen nesne otomatik silinir.
+    'parent_cv_id' verilmişse CV, o CV'nin revizyonu olarak kaydedilir.
+    """
+    timings: dict[str, float] = {}
+    started = time.perf_counter()
+
+    prepared = await prepare_cv(user_id, file_name, content_type, file_content, timings)
+
+    try:
+        new_cv = await _timed("db_insert", timings, cv_repository.insert_cv(build_cv_row(user_id, prepared, parent_cv_id)))
+    except BaseException as e:
+        await rollback_storage_upload(prepared.storage_path, timings)
+        if not isinstance(e, Exception):
+            raise
+        logger.error("CV veritabanına kaydedilemedi: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"CV veritabanına kaydedilirken bir hata oluştu: {str(e)}"
+        )
+
+    cv_ranking_service.on_cv_created(user_id, new_cv.get("id"), file_name, prepared.text)
+
+    timings["total"] = round((time.perf_counter() - started) * 1000, 2)
+    return CVIngestResult(
+        cv_id=new_cv.get("id"),
+        file_name=file_name,
+        storage_path=prepared.storage_path,
+        timings=timings,
+    )
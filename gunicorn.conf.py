@@ -0,0 +1,19 @@
+# gunicorn.conf.py
+# Gunicorn, çalışma dizinindeki bu dosyayı otomatik olarak okur.
+import os
+import shutil
+
+
+def on_starting(server):
+    """Master başlarken önceki çalıştırmadan kalan Prometheus metrik dosyalarını temizler."""
+    multiproc_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if multiproc_dir:
+        shutil.rmtree(multiproc_dir, ignore_errors=True)
+        os.makedirs(multiproc_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    """Ölen worker'ın 'livesum' gauge değerleri toplamdan düşülsün."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
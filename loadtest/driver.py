@@ -0,0 +1,232 @@
+# loadtest/driver.py
+"""
+Senaryo tabanlı yük üreticisi. Her sanal kullanıcı şu yolculuğu (journey) tekrarlar:
+
+    register -> token -> upload -> analysis_start -> analysis_poll -> download_link -> redirect
+
+    python -m loadtest.driver --base-url http://127.0.0.1:8000 --concurrency 20 --journeys 200
+
+Sonunda adım bazında istek sayısı, hata oranı, gecikme yüzdelikleri (p50/p90/p99)
+ve saniyedeki yolculuk sayısı raporlanır. '--json' ile rapor dosyaya da yazılır.
+"""
+import argparse
+import asyncio
+import io
+import json
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Optional
+
+import docx
+import httpx
+
+JOB_DESCRIPTION = (
+    "Kıdemli Backend Geliştirici. Python, FastAPI, PostgreSQL ve bulut altyapısında "
+    "deneyimli; ölçeklenebilir servisler tasarlamış, ekip liderliği yapmış adaylar."
+)
+
+
+def build_sample_cv(paragraphs: int = 60) -> bytes:
+    """Metin içeren küçük bir .docx CV üretir (OCR gerektirmez)."""
+    document = docx.Document()
+    document.add_heading("Ad Soyad - Yazılım Mühendisi", level=1)
+    for index in range(paragraphs):
+        document.add_paragraph(
+            f"{index + 1}. Python ve FastAPI ile yüksek trafikli servisler geliştirdim; "
+            "PostgreSQL sorgularını optimize ederek gecikmeyi %30 azalttım."
+        )
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+@dataclass
+class Stats:
+    latencies: dict[str, list[float]] = field(default_factory=lambda: defaultdict(list))
+    errors: dict[str, dict[str, int]] = field(default_factory=lambda: defaultdict(lambda: defaultdict(int)))
+    journeys_completed: int = 0
+    journeys_failed: int = 0
+
+    def record(self, step: str, seconds: float, error: Optional[str] = None) -> None:
+        self.latencies[step].append(seconds)
+        if error is not None:
+            self.errors[step][error] += 1
+
+
+class StepFailed(Exception):
+    pass
+
+
+async def _step(stats: Stats, step: str, request, expected: tuple[int, ...]) -> httpx.Response:
+    started = time.perf_counter()
+    try:
+        response = await request
+    except httpx.HTTPError as e:
+        stats.record(step, time.perf_counter() - started, type(e).__name__)
+        raise StepFailed(step)
+    elapsed = time.perf_counter() - started
+    if response.status_code not in expected:
+        stats.record(step, elapsed, str(response.status_code))
+        raise StepFailed(step)
+    stats.record(step, elapsed)
+    return response
+
+
+async def run_journey(client: httpx.AsyncClient, stats: Stats, cv_bytes: bytes, args) -> None:
+    email = f"lt-{uuid.uuid4().hex[:12]}@loadtest.cvoptima.com"
+    password = "LoadTest-Passw0rd!"
+    journey_started = time.perf_counter()
+    try:
+        await _step(stats, "register", client.post(
+            "/api/v1/auth/register", json={"email": email, "password": password}), (201,))
+        token_response = await _step(stats, "token", client.post(
+            "/api/v1/auth/token", data={"username": email, "password": password}), (200,))
+        headers = {"Authorization": f"Bearer {token_response.json()['access_token']}"}
+
+        upload_response = await _step(stats, "upload", client.post(
+            "/api/v1/cv/upload", headers=headers,
+            files={"file": ("cv.docx", cv_bytes, "application/vnd.openxmlformats-officedocument.wordprocessingml.document")},
+        ), (201,))
+        cv_id = upload_response.json()["cv_id"]
+
+        start_response = await _step(stats, "analysis_start", client.post(
+            "/api/v1/analysis/start", headers=headers,
+            json={"cv_id": cv_id, "job_description_text": JOB_DESCRIPTION}), (202,))
+        task_id = start_response.json()["task_id"]
+
+        # Sonuç gelene kadar yokla; uçtan uca analiz süresi ayrıca ölçülür
+        analysis_started = time.perf_counter()
+        deadline = analysis_started + args.analysis_timeout
+        while True:
+            status_response = await _step(stats, "analysis_poll", client.get(
+                f"/api/v1/analysis/status/{task_id}", headers=headers), (200,))
+            job_status = status_response.json()["status"]
+            if job_status != "pending":
+                break
+            if time.perf_counter() > deadline:
+                stats.record("analysis_e2e", time.perf_counter() - analysis_started, "timeout")
+                raise StepFailed("analysis_e2e")
+            await asyncio.sleep(args.poll_interval)
+        stats.record(
+            "analysis_e2e", time.perf_counter() - analysis_started,
+            None if job_status == "completed" else job_status,
+        )
+
+        link_response = await _step(stats, "download_link", client.get(
+            f"/api/v1/cv/{cv_id}/download", headers=headers), (200,))
+        short_code = link_response.json()["short_code"]
+        await _step(stats, "redirect", client.get(f"/dl/{short_code}"), (302,))
+
+        stats.record("journey", time.perf_counter() - journey_started)
+        stats.journeys_completed += 1
+    except StepFailed:
+        stats.journeys_failed += 1
+
+
+def _percentile(sorted_values: list[float], percentile: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(percentile / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def build_report(stats: Stats, wall_seconds: float) -> dict:
+    steps = {}
+    for step, values in stats.latencies.items():
+        ordered = sorted(values)
+        error_count = sum(stats.errors[step].values())
+        steps[step] = {
+            "count": len(values),
+            "errors": dict(stats.errors[step]),
+            "error_rate": round(error_count / len(values), 4) if values else 0.0,
+            "rps": round(len(values) / wall_seconds, 2),
+            "p50_ms": round(_percentile(ordered, 50) * 1000, 1),
+            "p90_ms": round(_percentile(ordered, 90) * 1000, 1),
+            "p99_ms": round(_percentile(ordered, 99) * 1000, 1),
+            "max_ms": round(ordered[-1] * 1000, 1) if ordered else 0.0,
+        }
+    total = stats.journeys_completed + stats.journeys_failed
+    return {
+        "wall_seconds": round(wall_seconds, 2),
+        "journeys": total,
+        "journeys_completed": stats.journeys_completed,
+        "journeys_failed": stats.journeys_failed,
+        "journeys_per_second": round(stats.journeys_completed / wall_seconds, 2) if wall_seconds else 0.0,
+        "steps": steps,
+    }
+
+
+def print_report(report: dict) -> None:
+    print(
+        f"\nYolculuk: {report['journeys_completed']}/{report['journeys']} başarılı, "
+        f"{report['journeys_per_second']} yolculuk/sn, süre {report['wall_seconds']} sn\n"
+    )
+    header = f"{'adım':<16}{'istek':>8}{'hata%':>8}{'rps':>8}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+    print(header)
+    print("-" * len(header))
+    for step, row in report["steps"].items():
+        print(
+            f"{step:<16}{row['count']:>8}{row['error_rate'] * 100:>7.1f}%{row['rps']:>8}"
+            f"{row['p50_ms']:>10}{row['p90_ms']:>10}{row['p99_ms']:>10}{row['max_ms']:>10}"
+        )
+        if row["errors"]:
+            print(f"{'':<16}hatalar: {row['errors']}")
+
+
+def write_report(report: dict, path: str) -> None:
+    with open(path, "w", encoding="utf-8") as report_file:
+        json.dump(report, report_file, ensure_ascii=False, indent=2)
+
+
+async def run(args) -> dict:
+    cv_bytes = build_sample_cv()
+    stats = Stats()
+    remaining = args.journeys
+    deadline = time.perf_counter() + args.duration if args.duration else None
+
+    def take_journey() -> bool:
+        nonlocal remaining
+        if deadline is not None:
+            return time.perf_counter() < deadline
+        if remaining <= 0:
+            return False
+        remaining -= 1
+        return True
+
+    async def virtual_user(client: httpx.AsyncClient) -> None:
+        while take_journey():
+            await run_journey(client, stats, cv_bytes, args)
+
+    limits = httpx.Limits(max_connections=args.concurrency * 2, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(virtual_user(client) for _ in range(args.concurrency)))
+        wall_seconds = time.perf_counter() - started
+    return build_report(stats, wall_seconds)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="CVOptima yük testi sürücüsü")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=10, help="Eşzamanlı sanal kullanıcı sayısı")
+    parser.add_argument("--journeys", type=int, default=100, help="Toplam yolculuk sayısı")
+    parser.add_argument("--duration", type=float, default=0, help=">0 ise --journeys yerine bu kadar saniye çalışır")
+    parser.add_argument("--poll-interval", type=float, default=0.5)
+    parser.add_argument("--analysis-timeout", type=float, default=120)
+    parser.add_argument("--timeout", type=float, default=60, help="Tek istek zaman aşımı (sn)")
+    parser.add_argument("--json", dest="json_path", help="Raporu bu dosyaya da yaz")
+    return parser
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.json_path:
+        write_report(report, args.json_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# loadtest/fake_llm.py
+"""
+Gemini yerine kullanılan sahte model. Gecikme log-normal dağılımdan çekilir;
+belirli oranlarda hata fırlatır veya geçersiz JSON döndürür.
+
+Uygulama bu modeli AI_MODEL_FACTORY ile yükler:
+
+    AI_MODEL_FACTORY=loadtest.fake_llm:from_env
+
+Ortam değişkenleri (hepsi isteğe bağlı):
+    LOADTEST_LLM_MEDIAN_MS     Gecikme medyanı (varsayılan 2000)
+    LOADTEST_LLM_SIGMA         Log-normal sigma; kuyruk kalınlığı (varsayılan 0.5)
+    LOADTEST_LLM_ERROR_RATE    İstisna fırlatma oranı, 0-1 (varsayılan 0.02)
+    LOADTEST_LLM_INVALID_RATE  Geçersiz JSON döndürme oranı, 0-1 (varsayılan 0.01)
+"""
+import json
+import math
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+
+_CANNED_RESULT = {
+    "job_keywords": {"hard_skills": ["Python", "SQL", "FastAPI"], "soft_skills": ["İletişim", "Liderlik"]},
+    "cv_keywords": {"hard_skills": ["Python", "Django"], "soft_skills": ["Ekip Çalışması"]},
+    "gap_analysis": {"matching_skills": ["Python"], "missing_skills": ["SQL", "FastAPI"]},
+    "suggestions": [
+        {
+            "suggestion_title": "Deneyiminizi Nicelleştirin",
+            "suggestion_detail": "Projelerinizin etkisini ölçülebilir sonuçlarla ifade edin.",
+            "cv_example": "API gecikmesini %40 azaltan önbellek katmanını tasarladım.",
+        }
+    ],
+    "cover_letter_draft": "Sayın İşe Alım Ekibi, ... " * 40,
+}
+
+
+@dataclass
+class FakeUsageMetadata:
+    prompt_token_count: int
+    candidates_token_count: int
+
+
+@dataclass
+class FakeResponse:
+    text: str
+    usage_metadata: FakeUsageMetadata
+
+
+class FakeGeminiModel:
+    """'genai.GenerativeModel.generate_content' ile aynı arayüz (senkron, threadpool'da çağrılır)."""
+
+    def __init__(
+        self,
+        median_ms: float = 2000,
+        sigma: float = 0.5,
+        error_rate: float = 0.02,
+        invalid_json_rate: float = 0.01,
+        seed: int | None = None,
+    ):
+        self.median_seconds = median_ms / 1000
+        self.sigma = sigma
+        self.error_rate = error_rate
+        self.invalid_json_rate = invalid_json_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()  # random.Random thread-safe değil
+
+    def generate_content(self, prompt: str) -> FakeResponse:
+        with self._lock:
+            delay = self._random.lognormvariate(math.log(self.median_seconds), self.sigma)
+            roll = self._random.random()
+        time.sleep(delay)
+
+        if roll < self.error_rate:
+            raise RuntimeError("Fake LLM: 503 The model is overloaded. Please try again later.")
+        text = json.dumps(_CANNED_RESULT, ensure_ascii=False)
+        if roll < self.error_rate + self.invalid_json_rate:
+            text = text[: len(text) // 2]  # Yarıda kesilmiş yanıt
+        return FakeResponse(
+            text=text,
+            usage_metadata=FakeUsageMetadata(
+                prompt_token_count=len(prompt) // 4,
+                candidates_token_count=len(text) // 4,
+            ),
+        )
+
+
+def from_env() -> FakeGeminiModel:
+    return FakeGeminiModel(
+        median_ms=float(os.environ.get("LOADTEST_LLM_MEDIAN_MS", 2000)),
+        sigma=float(os.environ.get("LOADTEST_LLM_SIGMA", 0.5)),
+        error_rate=float(os.environ.get("LOADTEST_LLM_ERROR_RATE", 0.02)),
+        invalid_json_rate=float(os.environ.get("LOADTEST_LLM_INVALID_RATE", 0.01)),
+    )
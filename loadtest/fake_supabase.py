@@ -0,0 +1,339 @@
+# loadtest/fake_supabase.py
+"""
+Yük testi için bellek içi (in-memory) Supabase taklidi: uygulamanın kullandığı kadar
+PostgREST (/rest/v1), Storage (/storage/v1) ve Auth (/auth/v1).
+
+    python -m loadtest.fake_supabase --port 54321 --jwt-secret <secret> [--latency-ms 5]
+
+Uygulama SUPABASE_URL=http://127.0.0.1:54321 ve aynı SUPABASE_JWT_SECRET ile
+çalıştırılmalıdır (token'lar uygulamada yerel olarak doğrulanır).
+Tek süreç, tek olay döngüsü: kilide gerek yoktur. Veriler kalıcı değildir.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+import jwt
+import uvicorn
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
+
+# PostgREST embed ilişkileri: (tablo, gömülen tablo) -> yabancı anahtar sütunu
+EMBEDS = {("analysis_jobs", "user_cvs"): "cv_id"}
+# UNIQUE kısıtları: tablo -> sütunlar
+UNIQUE = {"shortened_urls": ("short_code",)}
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class FakeSupabase:
+    def __init__(self, jwt_secret: str, latency_ms: float = 0.0, jitter_ms: float = 0.0):
+        self.jwt_secret = jwt_secret
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.tables: dict[str, dict[str, dict]] = {}
+        self.objects: dict[str, dict[str, tuple[bytes, str]]] = {}  # bucket -> path -> (içerik, created_at)
+        self.users: dict[str, dict] = {}  # email -> {"user": ..., "password": ...}
+
+    async def simulate_latency(self) -> None:
+        delay = self.latency_ms + random.uniform(0, self.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+
+    # --- PostgREST ---
+    @staticmethod
+    def _coerce(raw: str) -> Any:
+        if raw == "null":
+            return None
+        if raw in ("true", "false"):
+            return raw == "true"
+        return raw
+
+    def _logical(self, row: dict, kind: str, raw: str) -> bool:
+        """PostgREST mantıksal grubu: kind='or'/'and', raw='(a.lt.1,and(a.eq.1,b.lt.2))'."""
+        depth, token, items = 0, "", []
+        for char in raw[1:-1]:
+            if char == "," and depth == 0:
+                items.append(token)
+                token = ""
+                continue
+            depth += char == "("
+            depth -= char == ")"
+            token += char
+        items.append(token)
+
+        results = []
+        for item in items:
+            if item.startswith(("and(", "or(")):
+                sub_kind, _, rest = item.partition("(")
+                results.append(self._logical(row, sub_kind, "(" + rest))
+            else:
+                column, op, value = item.split(".", 2)
+                results.append(self._matches(row, [(column, op, value.strip('"'))]))
+        return any(results) if kind == "or" else all(results)
+
+    def _matches(self, row: dict, filters: list[tuple[str, str, str]]) -> bool:
+        for column, op, raw in filters:
+            if column in ("or", "and"):
+                if not self._logical(row, column, raw):
+                    return False
+                continue
+            value = row.get(column)
+            value_str = None if value is None else str(value)
+            if op == "eq" and value_str != raw:
+                return False
+            if op == "neq" and value_str == raw:
+                return False
+            if op == "in":
+                options = [item.strip('"') for item in raw.strip("()").split(",")]
+                if value_str not in options:
+                    return False
+            if op == "is" and value is not self._coerce(raw):
+                return False
+            if op in ("lt", "lte", "gt", "gte"):
+                if value_str is None:
+                    return False
+                if op == "lt" and not value_str < raw:
+                    return False
+                if op == "lte" and not value_str <= raw:
+                    return False
+                if op == "gt" and not value_str > raw:
+                    return False
+                if op == "gte" and not value_str >= raw:
+                    return False
+        return True
+
+    def _project(self, table: str, row: dict, select: str) -> dict:
+        if select in ("", "*"):
+            return dict(row)
+        result = {}
+        depth, token, tokens = 0, "", []
+        for char in select:  # "id,user_cvs(file_name)" -> virgülle ayır (parantez içi hariç)
+            if char == "," and depth == 0:
+                tokens.append(token)
+                token = ""
+                continue
+            depth += char == "("
+            depth -= char == ")"
+            token += char
+        tokens.append(token)
+
+        for column in filter(None, tokens):
+            if "(" in column:
+                embedded, inner = column[:-1].split("(", 1)
+                foreign_key = EMBEDS[(table, embedded)]
+                target = self.tables.get(embedded, {}).get(str(row.get(foreign_key)))
+                result[embedded] = self._project(embedded, target, inner) if target else None
+            else:
+                result[column] = row.get(column)
+        return result
+
+    def select(self, table: str, params: list[tuple[str, str]]) -> list[dict]:
+        select, order, limit, filters = "*", None, None, []
+        for key, value in params:
+            if key == "select":
+                select = value
+            elif key == "order":
+                order = value
+            elif key == "limit":
+                limit = int(value)
+            elif key in ("or", "and"):
+                filters.append((key, "", value))
+            else:
+                op, _, raw = value.partition(".")
+                filters.append((key, op, raw))
+
+        rows = [row for row in self.tables.get(table, {}).values() if self._matches(row, filters)]
+        if order:
+            for part in reversed(order.split(",")):
+                column, _, direction = part.partition(".")
+                rows.sort(key=lambda r: (r.get(column) is None, str(r.get(column))), reverse=direction == "desc")
+        if limit is not None:
+            rows = rows[:limit]
+        return [self._project(table, row, select) for row in rows]
+
+    def insert(self, table: str, payload: dict | list[dict]) -> list[dict] | JSONResponse:
+        rows = payload if isinstance(payload, list) else [payload]
+        storage = self.tables.setdefault(table, {})
+        prepared = []
+        for row in rows:
+            row = {"id": str(uuid.uuid4()), "created_at": _now_iso(), **row}
+            for column in UNIQUE.get(table, ()):
+                if any(existing.get(column) == row.get(column) for existing in storage.values()):
+                    return JSONResponse(
+                        status_code=409,
+                        content={"code": "23505", "message": f"duplicate key value violates unique constraint \"{table}_{column}_key\"", "details": None},
+                    )
+            prepared.append(row)
+        for row in prepared:  # Toplu ekleme tek transaction: ya hepsi ya hiçbiri
+            storage[row["id"]] = row
+        return prepared
+
+    def filters_from(self, params: list[tuple[str, str]]) -> list[tuple[str, str, str]]:
+        filters = []
+        for key, value in params:
+            if key not in ("select", "order", "limit"):
+                op, _, raw = value.partition(".")
+                filters.append((key, op, raw))
+        return filters
+
+    # --- Auth ---
+    def issue_session(self, user: dict) -> dict:
+        now = int(time.time())
+        claims = {
+            "sub": user["id"], "email": user["email"], "role": "authenticated",
+            "aud": "authenticated", "iat": now, "exp": now + 3600,
+        }
+        return {
+            "access_token": jwt.encode(claims, self.jwt_secret, algorithm="HS256"),
+            "token_type": "bearer",
+            "expires_in": 3600,
+            "expires_at": now + 3600,
+            "refresh_token": uuid.uuid4().hex,
+            "user": user,
+        }
+
+
+def create_app(fake: FakeSupabase) -> FastAPI:
+    app = FastAPI(title="Fake Supabase (load test)")
+
+    @app.middleware("http")
+    async def latency(request: Request, call_next):
+        await fake.simulate_latency()
+        return await call_next(request)
+
+    # --- PostgREST ---
+    @app.api_route("/rest/v1/{table}", methods=["GET", "POST", "PATCH", "DELETE"])
+    async def postgrest(table: str, request: Request):
+        params = list(request.query_params.multi_items())
+        representation = "return=representation" in request.headers.get("prefer", "")
+
+        if request.method == "GET":
+            return fake.select(table, params)
+
+        if request.method == "POST":
+            result = fake.insert(table, json.loads(await request.body()))
+            if isinstance(result, JSONResponse):
+                return result
+            return JSONResponse(status_code=201, content=result if representation else None)
+
+        filters = fake.filters_from(params)
+        rows = fake.tables.get(table, {})
+        matched = [row for row in rows.values() if fake._matches(row, filters)]
+        if request.method == "PATCH":
+            values = json.loads(await request.body())
+            for row in matched:
+                row.update(values)
+        else:
+            for row in matched:
+                rows.pop(row["id"], None)
+        return JSONResponse(content=matched) if representation else Response(status_code=204)
+
+    # --- Storage (özel yollar, genel yükleme yolundan ÖNCE tanımlanmalı) ---
+    @app.post("/storage/v1/object/sign/{bucket}/{path:path}")
+    async def sign(bucket: str, path: str):
+        if path not in fake.objects.get(bucket, {}):
+            return JSONResponse(status_code=404, content={"message": "Object not found"})
+        return {"signedURL": f"/object/sign/{bucket}/{path}?token={uuid.uuid4().hex}"}
+
+    @app.get("/storage/v1/object/sign/{bucket}/{path:path}")
+    async def download(bucket: str, path: str):
+        stored = fake.objects.get(bucket, {}).get(path)
+        if stored is None:
+            return JSONResponse(status_code=404, content={"message": "Object not found"})
+        return Response(content=stored[0], media_type="application/octet-stream")
+
+    @app.post("/storage/v1/object/list/{bucket}")
+    async def list_objects(bucket: str, request: Request):
+        body = await request.json()
+        prefix = body.get("prefix", "").strip("/")
+        limit, offset = body.get("limit", 100), body.get("offset", 0)
+        entries: dict[str, dict] = {}
+        for path, (_, created_at) in fake.objects.get(bucket, {}).items():
+            if prefix and not path.startswith(prefix + "/"):
+                continue
+            rest = path[len(prefix) + 1:] if prefix else path
+            name, _, remainder = rest.partition("/")
+            if remainder:  # Alt klasör
+                entries.setdefault(name, {"name": name, "id": None, "created_at": None})
+            else:
+                entries[name] = {"name": name, "id": str(uuid.uuid5(uuid.NAMESPACE_URL, path)), "created_at": created_at}
+        ordered = [entries[name] for name in sorted(entries)]
+        return ordered[offset:offset + limit]
+
+    @app.delete("/storage/v1/object/{bucket}")
+    async def remove(bucket: str, request: Request):
+        body = await request.json()
+        removed = []
+        for path in body.get("prefixes", []):
+            if fake.objects.get(bucket, {}).pop(path, None) is not None:
+                removed.append({"name": path})
+        return removed
+
+    @app.post("/storage/v1/object/{bucket}/{path:path}")
+    async def upload(bucket: str, path: str, request: Request):
+        objects = fake.objects.setdefault(bucket, {})
+        if path in objects and request.headers.get("x-upsert") != "true":
+            return JSONResponse(status_code=400, content={"message": "The resource already exists"})
+        objects[path] = (await request.body(), _now_iso())
+        return {"Key": f"{bucket}/{path}"}
+
+    # --- Auth ---
+    @app.post("/auth/v1/signup")
+    async def signup(request: Request):
+        body = await request.json()
+        email = body.get("email")
+        if email in fake.users:
+            return JSONResponse(status_code=422, content={"code": 422, "error_code": "user_already_exists", "msg": "User already registered"})
+        user = {
+            "id": str(uuid.uuid4()), "aud": "authenticated", "role": "authenticated", "email": email,
+            "app_metadata": {"provider": "email"}, "user_metadata": {}, "created_at": _now_iso(),
+        }
+        fake.users[email] = {"user": user, "password": body.get("password")}
+        return user  # E-posta onayı açık projelerdeki gibi: oturum yok, sadece kullanıcı
+
+    @app.post("/auth/v1/token")
+    async def token(request: Request):
+        body = await request.json()
+        account = fake.users.get(body.get("email"))
+        if account is None or account["password"] != body.get("password"):
+            return JSONResponse(status_code=400, content={"code": 400, "error_code": "invalid_credentials", "msg": "Invalid login credentials"})
+        return fake.issue_session(account["user"])
+
+    @app.get("/auth/v1/user")
+    async def current_user(request: Request):
+        token = request.headers.get("authorization", "").removeprefix("Bearer ").strip()
+        try:
+            claims = jwt.decode(token, fake.jwt_secret, algorithms=["HS256"], audience="authenticated")
+        except jwt.PyJWTError:
+            return JSONResponse(status_code=401, content={"code": 401, "msg": "invalid JWT"})
+        for account in fake.users.values():
+            if account["user"]["id"] == claims["sub"]:
+                return account["user"]
+        return JSONResponse(status_code=404, content={"code": 404, "msg": "User not found"})
+
+    return app
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Yük testi için sahte Supabase sunucusu")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--jwt-secret", required=True)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Her isteğe eklenen sabit gecikme")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Gecikmeye eklenen rastgele (0..N) pay")
+    args = parser.parse_args(argv)
+
+    fake = FakeSupabase(args.jwt_secret, args.latency_ms, args.jitter_ms)
+    uvicorn.run(create_app(fake), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
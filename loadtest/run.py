@@ -0,0 +1,136 @@
+# loadtest/run.py
+"""
+Uçtan uca yük testi: sahte Supabase'i ve GERÇEK FastAPI uygulamasını (sahte LLM ile)
+yerel süreçler olarak başlatır, sürücüyü çalıştırır ve raporu yazdırır.
+Gemini kotası harcanmaz, gerçek Supabase'e dokunulmaz.
+
+    python -m loadtest.run --concurrency 20 --journeys 200 --workers 2 --llm-median-ms 1500
+
+Sürücü seçenekleri (--concurrency, --journeys, --duration, --json, ...) aynen geçerlidir;
+bkz. 'python -m loadtest.driver --help'.
+"""
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+from loadtest import driver
+
+JWT_SECRET = "loadtest-secret-loadtest-secret-0123456789"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_port(port: int, process: subprocess.Popen, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Süreç erken sonlandı (çıkış kodu {process.returncode}).")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise TimeoutError(f"127.0.0.1:{port} {timeout} sn içinde açılmadı.")
+
+
+def _wait_until_ready(url: str, process: subprocess.Popen, timeout: float = 60) -> None:
+    """
+    Gunicorn master soketi worker'lar hazır olmadan açar; port açık olsa da istekler
+    worker'ın lifespan'i (ön ısıtma) bitene kadar bekler. Bu yüzden HTTP 200 beklenir.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Süreç erken sonlandı (çıkış kodu {process.returncode}).")
+        try:
+            if httpx.get(url, timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise TimeoutError(f"{url} {timeout} sn içinde hazır olmadı.")
+
+
+def build_parser():
+    parser = driver.build_parser()
+    parser.description = "Sahte Supabase + sahte LLM ile uçtan uca yük testi"
+    parser.add_argument("--workers", type=int, default=1, help="Uygulama worker sayısı (gunicorn)")
+    parser.add_argument("--db-latency-ms", type=float, default=5.0)
+    parser.add_argument("--db-jitter-ms", type=float, default=5.0)
+    parser.add_argument("--llm-median-ms", type=float, default=2000)
+    parser.add_argument("--llm-sigma", type=float, default=0.5)
+    parser.add_argument("--llm-error-rate", type=float, default=0.02)
+    parser.add_argument("--llm-invalid-rate", type=float, default=0.01)
+    parser.add_argument("--rate-limit", action="store_true", help="Uygulamanın rate limit'ini açık bırak")
+    return parser
+
+
+def main(argv=None) -> None:
+    args = build_parser().parse_args(argv)
+    supabase_port, app_port = _free_port(), _free_port()
+    args.base_url = f"http://127.0.0.1:{app_port}"
+
+    app_env = {
+        **os.environ,
+        "SUPABASE_URL": f"http://127.0.0.1:{supabase_port}",
+        "SUPABASE_SERVICE_KEY": "loadtest-service-key",
+        "SUPABASE_JWT_SECRET": JWT_SECRET,
+        "GOOGLE_API_KEY": "loadtest",
+        "AI_MODEL_FACTORY": "loadtest.fake_llm:from_env",
+        "LOADTEST_LLM_MEDIAN_MS": str(args.llm_median_ms),
+        "LOADTEST_LLM_SIGMA": str(args.llm_sigma),
+        "LOADTEST_LLM_ERROR_RATE": str(args.llm_error_rate),
+        "LOADTEST_LLM_INVALID_RATE": str(args.llm_invalid_rate),
+        "WEB_CONCURRENCY": str(args.workers),  # Uygulama kapasitesini worker sayısına göre böler
+        "RATE_LIMIT_ENABLED": "true" if args.rate_limit else "false",
+        "JANITOR_INTERVAL_SECONDS": "0",
+    }
+
+    processes = []
+    try:
+        fake_supabase = subprocess.Popen([
+            sys.executable, "-m", "loadtest.fake_supabase",
+            "--port", str(supabase_port), "--jwt-secret", JWT_SECRET,
+            "--latency-ms", str(args.db_latency_ms), "--jitter-ms", str(args.db_jitter_ms),
+        ])
+        processes.append(fake_supabase)
+        _wait_for_port(supabase_port, fake_supabase)
+
+        app_server = subprocess.Popen(
+            [
+                sys.executable, "-m", "gunicorn", "app.main:app",
+                "--workers", str(args.workers),
+                "--worker-class", "uvicorn.workers.UvicornWorker",
+                "--bind", f"127.0.0.1:{app_port}",
+                "--log-level", "warning",
+            ],
+            env=app_env,
+            stdout=subprocess.DEVNULL,  # Uygulamanın istek başına logları raporu boğmasın
+        )
+        processes.append(app_server)
+        _wait_until_ready(f"{args.base_url}/", app_server)
+
+        report = asyncio.run(driver.run(args))
+        driver.print_report(report)
+        if args.json_path:
+            driver.write_report(report, args.json_path)
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+# tests/test_text_processing.py
+import pytest
+
+from app.services.text_processing import analyze, normalize_term, stem
+
+
+# Aynı kelimenin yalın ve çekimli biçimi aynı terime düşmeli (BM25 puanı bölünmesin)
+@pytest.mark.parametrize(
+    "base, inflected",
+    [
+        ("yönetim", "yönetimi"),
+        ("eğitim", "eğitimi"),
+        ("mühendis", "mühendisi"),
+        ("servis", "servisi"),
+        ("model", "modeli"),
+        ("analist", "analisti"),
+        ("proje", "projesi"),
+        ("proje", "projelerde"),
+        ("müşteri", "müşterisi"),
+        ("yönetici", "yöneticisi"),
+        ("deneyim", "deneyimlerimde"),
+        ("deneyim", "deneyimli"),
+        ("kalite", "kaliteli"),
+        ("ekip", "ekibi"),
+        ("şirket", "şirkette"),
+        ("geliştir", "geliştirdim"),
+        ("yönet", "yönettim"),
+    ],
+)
+def test_inflections_share_a_term(base, inflected):
+    assert normalize_term(base) == normalize_term(inflected)
+
+
+@pytest.mark.parametrize("word", ["yönetim", "eğitim"])
+def test_noun_ending_in_tim_is_not_past_tense(word):
+    assert stem(word) == word
+
+
+def test_ascii_spelling_matches_turkish_spelling():
+    assert normalize_term("gelistirdim") == normalize_term("geliştirdim")
+
+
+@pytest.mark.parametrize("text, term", [("FastAPI", "fastapi"), ("java", "java"), ("kafka", "kafka"), ("c++", "c++")])
+def test_stem_final_vowels_and_technical_terms_are_kept(text, term):
+    assert analyze(text) == {term: 1}